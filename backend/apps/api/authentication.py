@@ -0,0 +1,106 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.api.roles import EMITIDO_EM_CLAIM, GRUPOS_CLAIM, SUPERUSER_CLAIM, set_grupos
+
+
+def get_chave_token_revogado(jti: str) -> str:
+    return f'api:token-revogado:{jti}'
+
+
+def get_chave_usuario_revogado(user_id) -> str:
+    return f'api:usuario-revogado:{user_id}'
+
+
+def revogar_token(token) -> None:
+    ''' Revoga um token específico (ex.: logout) até ele expirar. '''
+    restante = token['exp'] - time.time()
+    if restante > 0:
+        cache.set(get_chave_token_revogado(token[api_settings.JTI_CLAIM]), True, timeout=restante)
+
+
+def revogar_tokens_do_usuario(user_id) -> None:
+    '''
+    Revoga os access tokens já emitidos para o usuário. Os próximos, gerados pelo
+    refresh, trazem os claims atualizados e voltam a ser aceitos.
+    '''
+    timeout = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(get_chave_usuario_revogado(user_id), time.time(), timeout=timeout)
+
+
+def is_revogado(token) -> bool:
+    ''' Consulta a lista de revogação em uma única leitura do cache. '''
+    chave_token = get_chave_token_revogado(token.get(api_settings.JTI_CLAIM))
+    chave_usuario = get_chave_usuario_revogado(token.get(api_settings.USER_ID_CLAIM))
+    revogados = cache.get_many([chave_token, chave_usuario])
+    if chave_token in revogados:
+        return True
+
+    revogado_em = revogados.get(chave_usuario)
+    # Tokens antigos, sem o claim, usam o iat inteiro: os do mesmo segundo da revogação também caem
+    emitido_em = token.get(EMITIDO_EM_CLAIM, token.get('iat', 0))
+    return revogado_em is not None and emitido_em <= revogado_em
+
+
+class GrupoJWTAuthentication(JWTAuthentication):
+    '''
+    Autenticação JWT que reaproveita os grupos gravados no token.
+
+    A assinatura do token já foi validada quando get_user é chamado, então os
+    grupos do claim são confiáveis e as checagens de papel não consultam o banco.
+    '''
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if settings.API_JWT_REVOGACAO and is_revogado(validated_token):
+            raise InvalidToken('O token foi revogado.')
+        return validated_token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        grupos = validated_token.get(GRUPOS_CLAIM)
+        if grupos is not None:
+            set_grupos(user, grupos)
+
+        return user
+
+
+class GrupoTokenUserAuthentication(GrupoJWTAuthentication):
+    '''
+    Autenticação sem consulta ao banco: o usuário é um TokenUser montado a partir
+    do id, dos grupos e do is_superuser assinados no token.
+    '''
+    def get_user(self, validated_token):
+        if GRUPOS_CLAIM not in validated_token or SUPERUSER_CLAIM not in validated_token:
+            # Token emitido antes dos claims existirem: carrega o usuário do banco
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('O token não identifica o usuário.')
+
+        user = api_settings.TOKEN_USER_CLASS(validated_token)
+        set_grupos(user, validated_token[GRUPOS_CLAIM])
+        return user
+
+
+class TokenUserNaLeituraMixin:
+    '''
+    Autentica as leituras (GET, HEAD, OPTIONS) da view com o GrupoTokenUserAuthentication.
+    As escritas continuam com as authentication_classes padrão, que carregam o usuário do banco.
+    '''
+    authentication_classes_leitura = [GrupoTokenUserAuthentication]
+    leitura = False
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.leitura = request.method in SAFE_METHODS
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_authenticators(self):
+        if self.leitura:
+            return [auth() for auth in self.authentication_classes_leitura]
+        return super().get_authenticators()
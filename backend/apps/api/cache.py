@@ -0,0 +1,130 @@
+import hashlib
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from apps.api.roles import get_grupo_principal, is_aluno
+
+CHAVE_VERSAO_CATALOGO = 'api:versao-catalogo'
+
+
+def get_versao_catalogo() -> int:
+    ''' Retorna a versão atual dos dados do catálogo, usada para compor as chaves de cache. '''
+    versao = cache.get(CHAVE_VERSAO_CATALOGO)
+    if versao is None:
+        # Inicia pelo relógio para nunca reaproveitar uma versão antiga após o cache ser limpo
+        cache.add(CHAVE_VERSAO_CATALOGO, time.time_ns(), timeout=None)
+        versao = cache.get(CHAVE_VERSAO_CATALOGO)
+    return versao
+
+
+def invalidar_catalogo() -> None:
+    ''' Avança a versão do catálogo, tornando obsoletas todas as entradas em cache. '''
+    try:
+        cache.incr(CHAVE_VERSAO_CATALOGO)
+    except ValueError:
+        cache.set(CHAVE_VERSAO_CATALOGO, time.time_ns(), timeout=None)
+
+
+def get_papel_cache(user) -> str:
+    ''' Identifica o conjunto de dados visível ao usuário: alunos veem apenas as próprias turmas. '''
+    if is_aluno(user):
+        return f'aluno-{user.pk}'
+    if user.is_superuser:
+        return 'superuser'
+    return get_grupo_principal(user) or 'sem-grupo'
+
+
+def get_hash_parametros(query_params, ignorar=()) -> str:
+    ''' Resume os parâmetros da query string em um hash curto e estável. '''
+    parametros = sorted(
+        (chave, valor)
+        for chave, valores in query_params.lists() if chave not in ignorar
+        for valor in valores
+    )
+    return hashlib.md5(urlencode(parametros).encode('utf-8')).hexdigest()
+
+
+def get_chave_catalogo(prefixo: str, *partes) -> str:
+    ''' Monta uma chave de cache atrelada à versão atual do catálogo. '''
+    return ':'.join(['api', prefixo, str(get_versao_catalogo()), *map(str, partes)])
+
+
+def get_chave_contador(prefixo: str, resultado: str) -> str:
+    return f'api:cache-resposta:{prefixo}:{resultado}'
+
+
+def contar_acesso_cache(prefixo: str, resultado: str) -> None:
+    ''' Incrementa o contador de acertos ("hits") ou faltas ("misses") do cache de respostas. '''
+    chave = get_chave_contador(prefixo, resultado)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.set(chave, 1, timeout=None)
+
+
+def get_estatisticas_cache(prefixos) -> dict[str, dict]:
+    ''' Acertos e faltas do cache de respostas por endpoint, lidos em uma única consulta ao cache. '''
+    chaves = {
+        prefixo: (get_chave_contador(prefixo, 'hits'), get_chave_contador(prefixo, 'misses'))
+        for prefixo in prefixos
+    }
+    valores = cache.get_many([chave for par in chaves.values() for chave in par])
+
+    estatisticas = {}
+    for prefixo, (chave_hits, chave_misses) in chaves.items():
+        hits = valores.get(chave_hits, 0)
+        misses = valores.get(chave_misses, 0)
+        estatisticas[prefixo] = {
+            'hits': hits,
+            'misses': misses,
+            'taxa_acerto': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return estatisticas
+
+
+class CacheRespostaMixin:
+    '''
+    Guarda no cache as respostas de list e retrieve por endpoint, papel do usuário e
+    parâmetros (página, filtros). As chaves seguem a versão do catálogo, então
+    qualquer alteração registrada em apps.api.signals as torna obsoletas.
+    '''
+
+    def get_prefixo_cache(self) -> str:
+        return self.basename
+
+    def get_chave_resposta(self, request) -> str:
+        return get_chave_catalogo(
+            'resposta',
+            request.build_absolute_uri(request.path),
+            get_papel_cache(request.user),
+            get_hash_parametros(request.query_params),
+            # O bloqueio de acesso dos alunos depende da data atual
+            date.today().isoformat(),
+        )
+
+    def get_resposta_cache(self, request, gerar_resposta, *args, **kwargs) -> Response:
+        if not settings.API_RESPONSE_CACHE_TIMEOUT:
+            return gerar_resposta(request, *args, **kwargs)
+
+        chave = self.get_chave_resposta(request)
+        dados = cache.get(chave)
+        if dados is not None:
+            contar_acesso_cache(self.get_prefixo_cache(), 'hits')
+            return Response(dados)
+
+        contar_acesso_cache(self.get_prefixo_cache(), 'misses')
+        response = gerar_resposta(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(chave, response.data, settings.API_RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_resposta_cache(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_resposta_cache(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends cujo conteúdo não é visto pelos outros processos
+CACHES_POR_PROCESSO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.security, Tags.caches, deploy=True)
+def check_cache_revogacao(app_configs, **kwargs):
+    ''' A lista de revogação de tokens precisa de um cache compartilhado entre os workers. '''
+    if settings.API_JWT_REVOGACAO and settings.CACHES['default']['BACKEND'] in CACHES_POR_PROCESSO:
+        return [Warning(
+            'A revogação de tokens usa um cache local ao processo: com mais de um worker, '
+            'um token revogado continua aceito nos demais até expirar.',
+            hint='Defina CACHE_BACKEND/CACHE_LOCATION com um cache compartilhado (ex.: Redis ou Memcached).',
+            id='api.W001',
+        )]
+    return []
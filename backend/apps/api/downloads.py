@@ -0,0 +1,178 @@
+import mimetypes
+import os
+import re
+import zipfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+MODO_X_ACCEL_REDIRECT = 'x-accel-redirect'
+MODO_X_SENDFILE = 'x-sendfile'
+
+
+class IntervaloInvalido(Exception):
+    ''' O intervalo pedido no header Range não cabe no arquivo. '''
+
+
+def get_etag(stat) -> str:
+    ''' ETag forte derivado do tamanho e da data de modificação do arquivo. '''
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def get_intervalo(request, tamanho: int, etag: str, modificado_em: int) -> tuple[int, int] | None:
+    '''
+    Lê o header Range e retorna o intervalo (início, fim) pedido, com o fim incluso.
+    Retorna None quando o arquivo deve ser enviado inteiro.
+    '''
+    header = request.META.get('HTTP_RANGE', '').strip()
+    # Múltiplos intervalos não são suportados: responde com o arquivo inteiro, como permite a RFC 9110
+    if not header or ',' in header:
+        return None
+
+    # If-Range: só atende o intervalo se o cliente ainda tiver a mesma versão do arquivo
+    if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+    if if_range:
+        if if_range.startswith('"'):
+            if if_range != etag:
+                return None
+        elif parse_http_date_safe(if_range) != modificado_em:
+            return None
+
+    match = RANGE_RE.match(header)
+    if not match:
+        return None
+
+    inicio, fim = match.groups()
+    if not inicio and not fim:
+        return None
+
+    if not inicio:
+        # Sufixo "bytes=-N": os últimos N bytes
+        sufixo = int(fim)
+        if sufixo == 0 or tamanho == 0:
+            raise IntervaloInvalido()
+        return max(tamanho - sufixo, 0), tamanho - 1
+
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        raise IntervaloInvalido()
+    return inicio, fim
+
+
+def ler_intervalo(caminho: str, inicio: int, tamanho: int, chunk_size: int):
+    ''' Lê "tamanho" bytes do arquivo a partir de "inicio", em blocos. '''
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        restante = tamanho
+        while restante > 0:
+            bloco = arquivo.read(min(chunk_size, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def servir_arquivo(request, caminho: str, filename: str, nome_relativo: str):
+    '''
+    Entrega um arquivo com suporte a GET condicional (ETag/Last-Modified) e a
+    intervalos de bytes (206), ou delega a transferência ao servidor web via
+    X-Accel-Redirect/X-Sendfile conforme settings.RECURSOS_SENDFILE.
+    '''
+    stat = os.stat(caminho)
+    etag = get_etag(stat)
+    modificado_em = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    def cabecalhos(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modificado_em)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    condicional = get_conditional_response(request, etag=etag, last_modified=modificado_em)
+    if condicional is not None:
+        return cabecalhos(condicional)
+
+    modo = settings.RECURSOS_SENDFILE
+    if modo in (MODO_X_ACCEL_REDIRECT, MODO_X_SENDFILE):
+        # O servidor web envia os bytes (e trata o Range); o worker só autoriza o download
+        response = HttpResponse(content_type=content_type)
+        if modo == MODO_X_ACCEL_REDIRECT:
+            response['X-Accel-Redirect'] = settings.RECURSOS_SENDFILE_PREFIXO + nome_relativo
+        else:
+            response['X-Sendfile'] = caminho
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        return cabecalhos(response)
+
+    try:
+        intervalo = get_intervalo(request, stat.st_size, etag, modificado_em)
+    except IntervaloInvalido:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return cabecalhos(response)
+
+    if intervalo is None:
+        # FileResponse usa o wsgi.file_wrapper (sendfile) quando o servidor oferece
+        response = FileResponse(open(caminho, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+        return cabecalhos(response)
+
+    inicio, fim = intervalo
+    tamanho = fim - inicio + 1
+    response = StreamingHttpResponse(
+        ler_intervalo(caminho, inicio, tamanho, settings.RECURSOS_DOWNLOAD_CHUNK_SIZE),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Range'] = f'bytes {inicio}-{fim}/{stat.st_size}'
+    response['Content-Length'] = str(tamanho)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return cabecalhos(response)
+
+
+def get_indice_zip(caminho: str, nome_relativo: str) -> dict[str, dict]:
+    '''
+    Lista os membros do ZIP a partir do diretório central, sem extrair nada.
+    O índice é cacheado pelo nome no storage, que muda junto com o conteúdo do arquivo.
+    '''
+    chave = f'api:zip-indice:{nome_relativo}'
+    indice = cache.get(chave)
+    if indice is None:
+        with zipfile.ZipFile(caminho) as arquivo_zip:
+            indice = {
+                info.filename: {'tamanho': info.file_size, 'comprimido': info.compress_size, 'crc': info.CRC}
+                for info in arquivo_zip.infolist() if not info.is_dir()
+            }
+        cache.set(chave, indice, settings.RECURSOS_ZIP_INDICE_TIMEOUT)
+    return indice
+
+
+def ler_membro_zip(caminho: str, membro: str, chunk_size: int):
+    ''' Descompacta um único membro em blocos, a partir da posição dele dentro do ZIP. '''
+    with zipfile.ZipFile(caminho) as arquivo_zip, arquivo_zip.open(membro) as arquivo:
+        while bloco := arquivo.read(chunk_size):
+            yield bloco
+
+
+def servir_membro_zip(request, caminho: str, membro: str, info: dict):
+    ''' Entrega um arquivo de dentro do ZIP, com GET condicional pelo CRC do membro. '''
+    etag = f'"{info["crc"]:08x}-{info["tamanho"]:x}"'
+    condicional = get_conditional_response(request, etag=etag)
+    if condicional is not None:
+        condicional['ETag'] = etag
+        return condicional
+
+    filename = os.path.basename(membro)
+    response = StreamingHttpResponse(
+        ler_membro_zip(caminho, membro, settings.RECURSOS_DOWNLOAD_CHUNK_SIZE),
+        content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+    )
+    response['Content-Length'] = str(info['tamanho'])
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    return response
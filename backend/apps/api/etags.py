@@ -0,0 +1,121 @@
+import hashlib
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+
+from apps.api.cache import get_chave_catalogo, get_hash_parametros, get_papel_cache
+
+
+def get_versao(consultas: dict) -> dict:
+    '''
+    Impressão digital barata dos dados: total de linhas e maior atualizado_em de cada
+    tabela lida pelo serializer, uma consulta agregada por tabela, sem joins entre elas.
+    Exclusões são percebidas pela contagem; inclusões e alterações, pelo atualizado_em.
+    '''
+    return {
+        nome: consulta.order_by().aggregate(total=Count('pk'), atualizado_em=Max('atualizado_em'))
+        for nome, consulta in consultas.items()
+    }
+
+
+def get_partes_requisicao(request, *extras) -> list:
+    ''' O que muda a resposta para os mesmos dados. '''
+    return [
+        request.build_absolute_uri(request.path),
+        get_papel_cache(request.user),
+        get_hash_parametros(request.query_params),
+        request.accepted_media_type,
+        # O bloqueio de acesso dos alunos depende da data atual
+        date.today().isoformat(),
+        *extras,
+    ]
+
+
+def get_etag(request, versao, *extras) -> str:
+    ''' ETag da resposta: a versão dos dados mais as partes da requisição. '''
+    conteudo = json.dumps([*get_partes_requisicao(request, *extras), versao], default=str, sort_keys=True)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+
+def get_etag_cacheado(request, calcular_versao, *extras) -> str | None:
+    '''
+    ETag da requisição, guardado no cache sob a versão do catálogo: as agregações de
+    calcular_versao só rodam na primeira requisição após cada alteração do catálogo.
+    Retorna None se calcular_versao retornar None (objeto inexistente).
+    '''
+    if not settings.API_RESPONSE_CACHE_TIMEOUT:
+        versao = calcular_versao()
+        return get_etag(request, versao, *extras) if versao is not None else None
+
+    partes = json.dumps(get_partes_requisicao(request, *extras), default=str)
+    chave = get_chave_catalogo('etag', hashlib.md5(partes.encode('utf-8')).hexdigest())
+    etag = cache.get(chave)
+    if etag is None:
+        versao = calcular_versao()
+        if versao is None:
+            return None
+        etag = get_etag(request, versao, *extras)
+        cache.set(chave, etag, settings.API_RESPONSE_CACHE_TIMEOUT)
+    return etag
+
+
+def get_resposta_condicional(request, etag, gerar_resposta):
+    '''
+    Responde 304 se o cliente já tem a versão atual (If-None-Match), sem chamar
+    gerar_resposta, ou seja, sem buscar nem serializar os objetos.
+    '''
+    response = get_conditional_response(request, etag=quote_etag(etag))
+    if response is None:
+        response = gerar_resposta()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = quote_etag(etag)
+    # O conteúdo depende do usuário autenticado
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ETagMixin:
+    '''
+    Adiciona ETag e GET condicional ao list e ao retrieve. get_etag_consultas informa,
+    para cada tabela cujos dados aparecem na resposta, as linhas envolvidas; a primeira
+    consulta é a dos próprios objetos da view.
+    '''
+
+    def get_etag_queryset(self):
+        queryset = self.get_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_etag_consultas(self, objetos) -> dict:
+        ''' objetos: subquery com as chaves primárias dos objetos da view. '''
+        return {'objetos': self.get_queryset().model.objects.filter(pk__in=objetos)}
+
+    def calcular_versao(self) -> dict | None:
+        # Reaplica o filtro via subquery, descartando prefetch, select_related e anotações da view
+        objetos = self.get_etag_queryset().order_by().values('pk')
+        versao = get_versao(self.get_etag_consultas(objetos))
+        if not next(iter(versao.values()))['total'] and (self.lookup_url_kwarg or self.lookup_field) in self.kwargs:
+            # Objeto inexistente ou fora do alcance do usuário
+            return None
+        return versao
+
+    def get_resposta_etag(self, request, gerar_resposta, *args, **kwargs):
+        etag = get_etag_cacheado(request, self.calcular_versao)
+        if etag is None:
+            # Segue o fluxo normal, que responde 404
+            return gerar_resposta(request, *args, **kwargs)
+        return get_resposta_condicional(request, etag, lambda: gerar_resposta(request, *args, **kwargs))
+
+    def list(self, request, *args, **kwargs):
+        return self.get_resposta_etag(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_resposta_etag(request, super().retrieve, *args, **kwargs)
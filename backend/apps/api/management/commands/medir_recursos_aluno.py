@@ -0,0 +1,103 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.api.querysets import recursos_do_aluno
+from apps.treinamento.models import Matricula, Recursos, Treinamento, Turma
+from apps.users.models import Aluno, CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a consulta de recursos do aluno (/api/recursos/) com cada vez mais turmas, recursos '
+        'e matrículas no banco. Com os índices certos o tempo cresce com log n, ou seja, fica '
+        'praticamente estável. Os dados criados são descartados no fim.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tamanhos', nargs='*', type=int, default=[1000, 10000, 50000],
+                            help='Quantidades de turmas (cada uma com um recurso) a medir.')
+        parser.add_argument('--matriculas-aluno', type=int, default=5, help='Turmas em que o aluno medido está matriculado.')
+        parser.add_argument('--outros-alunos', type=int, default=50, help='Alunos que ocupam as demais matrículas.')
+        parser.add_argument('--repeticoes', type=int, default=20, help='Execuções por tamanho; é exibida a mediana.')
+
+    def handle(self, *args, tamanhos, matriculas_aluno, outros_alunos, repeticoes, **options):
+        tamanhos = sorted(tamanhos)
+        if not tamanhos or tamanhos[0] < matriculas_aluno or outros_alunos < 2 or repeticoes < 1:
+            raise CommandError('Os tamanhos devem ser maiores que --matriculas-aluno, com --outros-alunos >= 2.')
+
+        with transaction.atomic():
+            aluno, *outros = self.criar_alunos(outros_alunos + 1)
+            treinamento = Treinamento.objects.create(nome='Treinamento benchmark', descricao='Benchmark')
+
+            criadas = 0
+            for tamanho in tamanhos:
+                turmas = self.criar_turmas(treinamento, criadas, tamanho, outros)
+                if not criadas:
+                    Matricula.objects.bulk_create(Matricula(aluno=aluno, turma=turma) for turma in turmas[:matriculas_aluno])
+                criadas = tamanho
+
+                tempo = self.medir(aluno.pk, repeticoes)
+                self.stdout.write(f'{tamanho:>8} turmas e recursos, {tamanho * 2:>8} matrículas: {tempo * 1000:.2f} ms')
+
+            self.stdout.write('\nPlano da consulta da página:')
+            self.stdout.write(self.get_pagina(aluno.pk).explain())
+            transaction.set_rollback(True)
+
+    def criar_alunos(self, quantidade: int) -> list[Aluno]:
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f'benchmark.{indice}@teste.com', username=f'benchmark {indice}') for indice in range(quantidade)
+        )
+        return Aluno.objects.bulk_create(Aluno(user=user, telefone='11999999999') for user in users)
+
+    def criar_turmas(self, treinamento, inicio: int, fim: int, outros: list[Aluno]) -> list[Turma]:
+        ''' Cria as turmas [inicio, fim) com um recurso cada e duas matrículas de outros alunos. '''
+        hoje = date.today()
+        turmas = Turma.objects.bulk_create(
+            Turma(
+                treinamento=treinamento,
+                nome=f'Turma {indice}',
+                # Mistura turmas passadas, em andamento e futuras
+                data_inicio=hoje + timedelta(days=indice % 3 * 30 - 40),
+                data_fim=hoje + timedelta(days=indice % 3 * 30 - 20),
+                link_acesso='https://teste.com',
+            )
+            for indice in range(inicio, fim)
+        )
+        Recursos.objects.bulk_create(
+            Recursos(
+                turma=turma,
+                tipo_recurso='pdf',
+                recurso=f'recursos/benchmark-{indice}.pdf',
+                acesso_previo=indice % 2 == 0,
+                draft=indice % 4 == 0,
+                nome_recurso=f'Recurso benchmark {indice}',
+                descricao_recurso='Benchmark',
+            )
+            for indice, turma in enumerate(turmas, start=inicio)
+        )
+        Matricula.objects.bulk_create(
+            Matricula(aluno=outros[(indice + deslocamento) % len(outros)], turma=turma)
+            for indice, turma in enumerate(turmas, start=inicio)
+            for deslocamento in (0, 1)
+        )
+        return turmas
+
+    def get_pagina(self, aluno_id):
+        ''' A consulta da primeira página de /api/recursos/ para o aluno. '''
+        queryset = recursos_do_aluno(aluno_id, Recursos.objects.select_related('turma'))
+        return queryset.order_by('pk')[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+
+    def medir(self, aluno_id, repeticoes: int) -> float:
+        ''' Mediana, em segundos, da contagem mais a primeira página, como na listagem paginada. '''
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            recursos_do_aluno(aluno_id).count()
+            list(self.get_pagina(aluno_id))
+            tempos.append(time.perf_counter() - inicio)
+        return statistics.median(tempos)
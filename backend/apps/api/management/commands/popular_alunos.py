@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.api.cache import invalidar_catalogo
+from apps.api.roles import GRUPO_ALUNO
+from apps.treinamento.models import Matricula, Treinamento, Turma
+from apps.users.models import Aluno, CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria alunos de carga matriculados em turmas, para medir a latência de /api/alunos/, '
+        '/api/alunos/todos e /api/me/ com muitos alunos (ex.: 10000 e 50000).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quantidade', type=int, help='Quantidade de alunos a criar.')
+        parser.add_argument('--turmas', type=int, default=3, help='Turmas em que cada aluno é matriculado.')
+        parser.add_argument('--senha', default='123456', help='Senha dos alunos criados.')
+        parser.add_argument('--prefixo', default='carga', help='Prefixo do email e do nome dos alunos.')
+        parser.add_argument('--lote', type=int, default=1000, help='Alunos inseridos por transação.')
+
+    def handle(self, *args, quantidade, turmas, senha, prefixo, lote, **options):
+        if quantidade < 1 or lote < 1:
+            raise CommandError('Informe uma quantidade e um lote maiores que zero.')
+
+        turmas = self.get_turmas(turmas, prefixo)
+        grupo, _ = Group.objects.get_or_create(name=GRUPO_ALUNO)
+        # Um único hash para todos: o make_password por aluno dominaria o tempo da carga
+        senha = make_password(senha)
+        inicio = CustomUser.objects.filter(email__startswith=f'{prefixo}.').count()
+
+        for offset in range(inicio, inicio + quantidade, lote):
+            indices = range(offset, min(offset + lote, inicio + quantidade))
+            # bulk_create não dispara os signals; o cache é invalidado uma vez, no fim
+            with transaction.atomic():
+                users = CustomUser.objects.bulk_create([
+                    CustomUser(
+                        email=f'{prefixo}.{indice}@teste.com',
+                        username=f'{prefixo} {indice}',
+                        first_name=f'{prefixo} {indice}'.title(),
+                        password=senha,
+                    )
+                    for indice in indices
+                ])
+                CustomUser.groups.through.objects.bulk_create(
+                    CustomUser.groups.through(customuser_id=user.pk, group_id=grupo.pk) for user in users
+                )
+                alunos = Aluno.objects.bulk_create(Aluno(user=user, telefone='11999999999') for user in users)
+                Matricula.objects.bulk_create(
+                    Matricula(aluno=aluno, turma=turma) for aluno in alunos for turma in turmas
+                )
+            self.stdout.write(f'{indices.stop - inicio}/{quantidade} alunos criados')
+
+        invalidar_catalogo()
+        self.stdout.write(self.style.SUCCESS(
+            f'{quantidade} alunos criados ({prefixo}.N@teste.com), cada um matriculado em {len(turmas)} turma(s).'
+        ))
+
+    def get_turmas(self, quantidade: int, prefixo: str) -> list[Turma]:
+        ''' Usa as turmas existentes e cria as que faltarem em um treinamento de carga. '''
+        turmas = list(Turma.objects.order_by('pk')[:quantidade])
+        if len(turmas) < quantidade:
+            treinamento, _ = Treinamento.objects.get_or_create(nome=f'Treinamento {prefixo}', defaults={'descricao': 'Carga'})
+            hoje = date.today()
+            for indice in range(len(turmas), quantidade):
+                turma, _ = Turma.objects.get_or_create(
+                    treinamento=treinamento,
+                    nome=f'Turma {indice}',
+                    defaults={
+                        'data_inicio': hoje - timedelta(days=30),
+                        'data_fim': hoje + timedelta(days=30),
+                        'link_acesso': 'https://teste.com',
+                    },
+                )
+                turmas.append(turma)
+        return turmas
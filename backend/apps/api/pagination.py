@@ -0,0 +1,103 @@
+from functools import cached_property, partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from apps.api.cache import get_chave_catalogo, get_hash_parametros, get_papel_cache
+
+# Ordenação usada quando a view não declara cursor_ordering
+ORDENACAO_PADRAO = ('pk',)
+
+
+class PaginacaoCursor(CursorPagination):
+    ''' Paginação por cursor (keyset): sem COUNT e sem OFFSET, estável em páginas profundas. '''
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'cursor_ordering', ORDENACAO_PADRAO))
+
+
+class PaginatorContagemCache(Paginator):
+    ''' Paginator que guarda o total de registros no cache em vez de contar a cada página. '''
+    def __init__(self, *args, chave_contagem, **kwargs):
+        self.chave_contagem = chave_contagem
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self) -> int:
+        contagem = cache.get(self.chave_contagem)
+        if contagem is None:
+            contagem = super().count
+            cache.set(self.chave_contagem, contagem, settings.API_COUNT_CACHE_TIMEOUT)
+        return contagem
+
+
+class PaginacaoPadrao(PageNumberPagination):
+    '''
+    Paginação por número de página, com paginação por cursor opcional.
+
+    O modo cursor é escolhido com "?paginacao=cursor" (ou ao enviar "?cursor=")
+    e ordena pelo cursor_ordering da view, que deve ser único e imutável.
+    No modo por página, o total é cacheado por endpoint, papel do usuário e
+    filtros, sendo invalidado quando o catálogo muda (ver apps.api.signals).
+    '''
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    modo_query_param = 'paginacao'
+    cursor_paginator = None
+
+    def usa_cursor(self, request) -> bool:
+        return (
+            request.query_params.get(self.modo_query_param) == 'cursor'
+            or PaginacaoCursor.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.usa_cursor(request):
+            self.cursor_paginator = PaginacaoCursor()
+            page = self.cursor_paginator.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor_paginator.display_page_controls
+            return page
+
+        if not queryset.ordered:
+            queryset = queryset.order_by(*getattr(view, 'cursor_ordering', ORDENACAO_PADRAO))
+        self.django_paginator_class = partial(PaginatorContagemCache, chave_contagem=self.get_chave_contagem(request))
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_chave_contagem(self, request) -> str:
+        ignorar = (self.page_query_param, self.page_size_query_param)
+        return get_chave_catalogo(
+            'count', request.path, get_papel_cache(request.user), get_hash_parametros(request.query_params, ignorar)
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        parametros = super().get_schema_operation_parameters(view)
+        return parametros + [
+            {
+                'name': self.modo_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Envie "cursor" para paginar por cursor, sem contagem total.',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': PaginacaoCursor.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(PaginacaoCursor.cursor_query_description),
+                'schema': {'type': 'string'},
+            },
+        ]
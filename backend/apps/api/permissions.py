@@ -1,5 +1,6 @@
 from rest_framework import permissions
 
+from apps.api.roles import is_aluno, pertence_a
 
 
 class OnlySuperUser(permissions.BasePermission):
@@ -15,7 +16,7 @@ class IsInGroup(permissions.BasePermission):
         if not required_groups:
             return True
         
-        return request.user.groups.filter(name__in=required_groups).exists() or request.user.is_superuser
+        return pertence_a(request.user, *required_groups) or request.user.is_superuser
 
     
 class AlunoOnlyRead(permissions.BasePermission):
@@ -23,8 +24,9 @@ class AlunoOnlyRead(permissions.BasePermission):
     def has_permission(self, request, view) -> bool:
         user = request.user
 
-        if user.groups.filter(name='aluno').exists():
-            if request.method == 'GET':
+        if is_aluno(user):
+            # HEAD e OPTIONS também são leitura (ex.: tamanho do download antes de retomá-lo)
+            if request.method in permissions.SAFE_METHODS:
                 return True
             return False
             
@@ -0,0 +1,98 @@
+from datetime import date
+
+from django.db.models import BooleanField, Case, F, Prefetch, Q, Value, When
+
+from apps.treinamento.models import Matricula, Recursos, Turma
+from apps.users.models import Aluno
+
+
+def expressao_bloqueia_acesso(prefixo_turma='', prefixo_recurso=''):
+    '''
+    Expressão SQL que indica se o aluno está bloqueado de acessar o recurso hoje.
+    Acesso prévio libera o recurso antes do início da turma e draft libera após o fim.
+    '''
+    hoje = date.today()
+    return Case(
+        When(Q(**{f'{prefixo_turma}data_inicio__gt': hoje, f'{prefixo_recurso}acesso_previo': False}), then=Value(True)),
+        When(Q(**{f'{prefixo_turma}data_fim__lt': hoje, f'{prefixo_recurso}draft': False}), then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+
+
+def turmas_com_relacionados(queryset=None, aluno=False):
+    '''
+    Carrega junto das turmas tudo o que o TurmaSerializer lê, para que a
+    serialização rode em um número constante de queries. Para alunos, anota
+    também o bloqueio de acesso ao recurso da turma.
+    '''
+    if queryset is None:
+        queryset = Turma.objects.all()
+
+    bloqueia_acesso = expressao_bloqueia_acesso(prefixo_recurso='recurso__') if aluno else Value(False)
+    return queryset.select_related('treinamento', 'recurso').prefetch_related(
+        Prefetch('matriculas', queryset=Matricula.objects.select_related('aluno__user'))
+    ).annotate(bloqueia_acesso=bloqueia_acesso)
+
+
+def com_data_cadastro(queryset):
+    '''
+    Anota a data de cadastro do usuário em cadastrado_em. A paginação por cursor lê a
+    posição como atributo do objeto, e não segue relações como user__date_joined.
+    '''
+    return queryset.annotate(cadastrado_em=F('user__date_joined'))
+
+
+def recursos_do_aluno(aluno_id, queryset=None):
+    '''
+    Recursos que o aluno pode acessar hoje, pelas regras de expressao_bloqueia_acesso.
+    Cada recurso tem uma turma e cada aluno uma matrícula por turma, então o join
+    pela matrícula não duplica linhas e dispensa o distinct().
+    '''
+    if queryset is None:
+        queryset = Recursos.objects.all()
+
+    return queryset.annotate(
+        bloqueia_acesso=expressao_bloqueia_acesso(prefixo_turma='turma__')
+    ).filter(bloqueia_acesso=False, turma__matriculas__aluno_id=aluno_id)
+
+
+def alunos_com_relacionados(queryset=None):
+    '''
+    Carrega junto dos alunos o usuário, os grupos e as turmas matriculadas,
+    lidos pelo AlunoSerializer, em um número constante de queries.
+    '''
+    if queryset is None:
+        queryset = Aluno.objects.all()
+
+    return queryset.select_related('user').prefetch_related(
+        'user__groups',
+        Prefetch('matriculas', queryset=Matricula.objects.select_related('turma__treinamento')),
+    )
+
+
+# Campos do AlunoSerializer que podem ser lidos direto das colunas, sem SerializerMethodFields
+CAMPOS_PROJECAO_ALUNO = {
+    'id': 'user_id',
+    'nome': 'user__username',
+    'sobrenome': 'user__last_name',
+    'email': 'user__email',
+    'telefone': 'telefone',
+}
+
+
+def projetar_alunos(campos, queryset=None):
+    '''
+    Retorna os alunos via .values(), lendo apenas as colunas dos campos pedidos
+    e as da ordenação (usadas na paginação por cursor, ver AlunoViewSet.cursor_ordering).
+    '''
+    if queryset is None:
+        queryset = Aluno.objects.all()
+
+    colunas = {CAMPOS_PROJECAO_ALUNO[campo] for campo in campos} | {'cadastrado_em', 'user_id'}
+    return com_data_cadastro(queryset).values(*colunas)
+
+
+def formatar_projecao(linha, campos) -> dict:
+    ''' Converte uma linha de projetar_alunos para os nomes de campos da API. '''
+    return {campo: linha[CAMPOS_PROJECAO_ALUNO[campo]] for campo in campos}
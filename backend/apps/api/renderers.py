@@ -0,0 +1,57 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+# Tamanho mínimo dos blocos enviados ao cliente nas respostas em streaming
+TAMANHO_BLOCO_STREAM = 64 * 1024
+
+
+def _dumps(item) -> bytes:
+    return json.dumps(item, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _agrupar_em_blocos(partes):
+    ''' Junta pedaços pequenos de bytes em blocos, evitando uma escrita no socket por objeto. '''
+    buffer = []
+    tamanho = 0
+    for parte in partes:
+        buffer.append(parte)
+        tamanho += len(parte)
+        if tamanho >= TAMANHO_BLOCO_STREAM:
+            yield b''.join(buffer)
+            buffer = []
+            tamanho = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream_json_array(itens):
+    ''' Gera um array JSON em blocos, à medida que os itens são produzidos. '''
+    def partes():
+        yield b'['
+        for indice, item in enumerate(itens):
+            if indice:
+                yield b','
+            yield _dumps(item)
+        yield b']'
+    return _agrupar_em_blocos(partes())
+
+
+def stream_ndjson(itens):
+    ''' Gera JSON delimitado por quebra de linha (um objeto por linha) em blocos. '''
+    return _agrupar_em_blocos(_dumps(item) + b'\n' for item in itens)
+
+
+class NDJSONRenderer(BaseRenderer):
+    ''' Renderiza listas como JSON delimitado por quebra de linha. '''
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(stream_ndjson(data))
@@ -0,0 +1,37 @@
+GRUPO_ADMIN = 'admin'
+GRUPO_ALUNO = 'aluno'
+
+# Claim do JWT que carrega os grupos do usuário
+GRUPOS_CLAIM = 'grupos'
+# Claim com o is_superuser, lido pelo TokenUser do SimpleJWT
+SUPERUSER_CLAIM = 'is_superuser'
+# Claim com o instante de emissão em frações de segundo (o iat é inteiro), comparado com a revogação
+EMITIDO_EM_CLAIM = 'emitido_em'
+
+
+def get_grupos(user) -> frozenset[str]:
+    ''' Retorna os grupos do usuário, consultando o banco no máximo uma vez por requisição. '''
+    grupos = getattr(user, '_grupos', None)
+    if grupos is None:
+        # Itera sobre .all() para aproveitar um prefetch_related('groups') quando existir
+        grupos = frozenset(grupo.name for grupo in user.groups.all())
+        user._grupos = grupos
+    return grupos
+
+
+def set_grupos(user, grupos) -> None:
+    ''' Define os grupos já resolvidos do usuário (ex.: a partir do token). '''
+    user._grupos = frozenset(grupos)
+
+
+def get_grupo_principal(user) -> str | None:
+    ''' Retorna o nome do grupo do usuário, ou None se ele não pertencer a nenhum. '''
+    return next(iter(sorted(get_grupos(user))), None)
+
+
+def pertence_a(user, *grupos: str) -> bool:
+    return not get_grupos(user).isdisjoint(grupos)
+
+
+def is_aluno(user) -> bool:
+    return GRUPO_ALUNO in get_grupos(user)
@@ -0,0 +1,27 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme, TokenObtainPairSerializerExtension,
+    TokenRefreshSerializerExtension)
+from drf_spectacular.drainage import set_override
+
+from apps.api.authentication import GrupoTokenUserAuthentication
+
+
+class GrupoJWTScheme(SimpleJWTScheme):
+    ''' Documenta a GrupoJWTAuthentication como o esquema Bearer do SimpleJWT. '''
+    target_class = 'apps.api.authentication.GrupoJWTAuthentication'
+    # Inclui a GrupoTokenUserAuthentication, que usa o mesmo Bearer token
+    match_subclasses = True
+
+
+# As duas classes geram o mesmo componente "jwtAuth"
+set_override(GrupoTokenUserAuthentication, 'suppress_collision_warning', True)
+
+
+class GrupoTokenObtainPairSerializerExtension(TokenObtainPairSerializerExtension):
+    ''' Mantém o schema de login do SimpleJWT para o serializer com o claim de grupos. '''
+    target_class = 'apps.api.serializers.token_serializer.GrupoTokenObtainPairSerializer'
+
+
+class GrupoTokenRefreshSerializerExtension(TokenRefreshSerializerExtension):
+    ''' Mantém o schema do refresh do SimpleJWT para o serializer que relê os claims. '''
+    target_class = 'apps.api.serializers.token_serializer.GrupoTokenRefreshSerializer'
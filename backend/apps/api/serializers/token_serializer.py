@@ -0,0 +1,42 @@
+import time
+
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.api.roles import EMITIDO_EM_CLAIM, GRUPOS_CLAIM, SUPERUSER_CLAIM, get_grupos
+
+
+def set_claims_usuario(token, user) -> None:
+    ''' Grava no token os dados usados pelas permissões, dispensando consultas ao usuário. '''
+    token[GRUPOS_CLAIM] = sorted(get_grupos(user))
+    token[SUPERUSER_CLAIM] = user.is_superuser
+    token[EMITIDO_EM_CLAIM] = time.time()
+
+
+class GrupoTokenObtainPairSerializer(TokenObtainPairSerializer):
+    ''' Gera o par de tokens incluindo os grupos do usuário como claim. '''
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Os novos access tokens não copiam estes claims do refresh: o
+        # GrupoTokenRefreshSerializer os relê do banco a cada renovação.
+        set_claims_usuario(token, user)
+        return token
+
+
+class GrupoTokenRefreshSerializer(TokenRefreshSerializer):
+    ''' Renova o access token relendo os claims do usuário, em vez de copiá-los do refresh token. '''
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        access = AccessToken(data['access'])
+        user = get_user_model().objects.prefetch_related('groups').get(
+            **{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]}
+        )
+        set_claims_usuario(access, user)
+        data['access'] = str(access)
+        return data
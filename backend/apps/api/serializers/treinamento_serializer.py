@@ -53,33 +53,29 @@ class TurmaSerializer(serializers.ModelSerializer):
                 'email': matricula.aluno.user.email,
                 'telefone': matricula.aluno.telefone,
             }
-            for matricula in obj.matriculas.select_related('aluno', 'aluno__user').all()
+            # Usa o prefetch de matriculas -> aluno -> user feito pela viewset
+            for matricula in obj.matriculas.all()
         ]
 
-    def get_recurso(self, obj) -> dict[str, str]:
-        user = self.context['request'].user
-        hoje = date.today()
-
+    def get_recurso(self, obj) -> dict:
         try:
             recurso = obj.recurso
         except Turma.recurso.RelatedObjectDoesNotExist:
             return {}
 
-        if user.groups.filter(name='aluno').exists():
-            print('Entrou')
-            print(obj.data_inicio)
-            print(obj.data_fim)
-            
-            if hoje < obj.data_inicio and not recurso.acesso_previo:
-                return {'bloqueia_acesso': True}
-            
-            if hoje > obj.data_fim and not recurso.draft:
-                return {'bloqueia_acesso': True}
+        # Anotado no banco pela viewset (ver apps.api.querysets.turmas_com_relacionados)
+        if getattr(obj, 'bloqueia_acesso', False):
+            return {'bloqueia_acesso': True}
 
         return {
             "nome": recurso.nome_recurso,
             "tipo": recurso.tipo_recurso,
-            "link": recurso.recurso.url
+            "link": recurso.recurso.url,
+            # Representações mais leves, geradas em segundo plano (ver apps.treinamento.derivados)
+            "derivados": {
+                chave: recurso.recurso.storage.url(caminho)
+                for chave, caminho in recurso.derivados.items()
+            },
         }
 
     def validate(self, data):
@@ -101,7 +97,8 @@ class RecursosSerializer(serializers.ModelSerializer):
     turma = serializers.PrimaryKeyRelatedField(queryset=Turma.objects.all(), write_only=True)
     class Meta:
         model = Recursos
-        fields = ['id', 'turma', 'turma_nome', 'tipo_recurso', 'recurso', 'acesso_previo', 'draft', 'nome_recurso', 'descricao_recurso']
+        fields = ['id', 'turma', 'turma_nome', 'tipo_recurso', 'recurso', 'nome_arquivo', 'acesso_previo', 'draft', 'nome_recurso', 'descricao_recurso']
+        read_only_fields = ['nome_arquivo']
 
     def validate(self, data):
         ''' Valida o tipo e o nome do arquivo do recurso. '''
@@ -120,18 +117,12 @@ class RecursosSerializer(serializers.ModelSerializer):
         if regex_caracteres_invalidos.search(arquivo_name) or regex_acentos.search(arquivo_name):
             raise serializers.ValidationError("O nome do arquivo contém caracteres inválidos. Use apenas letras, números, pontos, hífens e sublinhados, sem acentos.")
 
+        # O storage grava pelo hash do conteúdo; o nome original é usado no download
+        data['nome_arquivo'] = os.path.basename(arquivo_name)
         return data
 
-    def create(self, validated_data):
-        ''' Cria um recurso, evitando duplicação de arquivos. '''
-        arquivo = validated_data.get('recurso')
-        
-        arquivo_name = arquivo.name.replace(" ", "_")
-        caminho_arquivo = os.path.join(settings.MEDIA_ROOT, 'recursos', arquivo_name)
-
-
-        if os.path.exists(caminho_arquivo):
-            validated_data['recurso'] = f"recursos/{arquivo_name}"
-            return Recursos.objects.create(**validated_data)
 
-        return super().create(validated_data)
\ No newline at end of file
+class UploadRecursoSerializer(serializers.Serializer):
+    ''' Dados para iniciar o upload em partes do arquivo de um recurso. '''
+    filename = serializers.CharField(max_length=255)
+    tamanho = serializers.IntegerField(min_value=1, max_value=settings.RECURSOS_UPLOAD_MAX_SIZE)
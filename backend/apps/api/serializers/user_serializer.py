@@ -3,6 +3,7 @@ from django.contrib.auth.models import Group
 from django.db import transaction
 from rest_framework import serializers
 
+from apps.api.roles import get_grupo_principal
 from apps.users.models import Aluno
 
 User = get_user_model()
@@ -17,7 +18,7 @@ class AdminSerializer(serializers.ModelSerializer):
     def get_grupo(self, obj) -> str:
         if obj.is_superuser:
             return 'admin'
-        return obj.groups.all().first().name
+        return get_grupo_principal(obj)
 
     def create(self, validated_data):
         ''' Cria um usuário administrador. '''
@@ -84,7 +85,7 @@ class AlunoSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome', 'sobrenome', 'email', 'telefone', 'password', 'turmas', 'grupo']
 
     def get_grupo(self, obj) -> str:
-        return obj.user.groups.all().first().name
+        return get_grupo_principal(obj.user)
 
     def get_turmas(self, obj) -> list[dict]:
         return [
@@ -95,7 +96,8 @@ class AlunoSerializer(serializers.ModelSerializer):
                 'inicio': matricula.turma.data_inicio,
                 'fim': matricula.turma.data_fim
             }
-            for matricula in obj.matriculas.select_related('turma', 'turma__treinamento').all()
+            # Usa o prefetch de matriculas -> turma -> treinamento feito pela view
+            for matricula in obj.matriculas.all()
         ]
     
     def validate_nome(self, value):
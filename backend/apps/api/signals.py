@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from apps.api.authentication import revogar_tokens_do_usuario
+from apps.api.cache import invalidar_catalogo
+from apps.treinamento.models import Matricula, Recursos, Treinamento, Turma
+from apps.users.models import Aluno, CustomUser
+
+# Modelos cujas alterações mudam o resultado das listagens da API.
+# O CustomUser entra porque as turmas exibem o nome e o email dos alunos matriculados
+MODELOS_CATALOGO = (Treinamento, Turma, Recursos, Matricula, Aluno, CustomUser)
+
+
+def invalidar_cache_catalogo(sender, **kwargs):
+    invalidar_catalogo()
+
+
+for modelo in MODELOS_CATALOGO:
+    post_save.connect(invalidar_cache_catalogo, sender=modelo, dispatch_uid=f'invalidar-catalogo-save-{modelo.__name__}')
+    post_delete.connect(invalidar_cache_catalogo, sender=modelo, dispatch_uid=f'invalidar-catalogo-delete-{modelo.__name__}')
+
+
+# Campos do usuário que os tokens sem consulta ao banco (TokenUser) carregam ou pressupõem
+CAMPOS_TOKEN = ('is_active', 'is_superuser')
+
+
+def agendar_revogacao(user_ids) -> None:
+    ''' Revoga após o commit, para que um refresh concorrente não emita um token com os dados antigos. '''
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: [revogar_tokens_do_usuario(user_id) for user_id in user_ids])
+
+
+def revogar_tokens_se_alterado(sender, instance, **kwargs):
+    ''' Revoga os access tokens do usuário quando muda algum dado assinado neles. '''
+    if instance._state.adding:
+        return
+    anterior = CustomUser.objects.filter(pk=instance.pk).values(*CAMPOS_TOKEN).first()
+    if anterior and any(anterior[campo] != getattr(instance, campo) for campo in CAMPOS_TOKEN):
+        agendar_revogacao([instance.pk])
+
+
+def revogar_tokens_usuario_removido(sender, instance, **kwargs):
+    agendar_revogacao([instance.pk])
+
+
+def revogar_tokens_grupos_alterados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        agendar_revogacao([instance.pk])
+    elif action == 'pre_clear':
+        # Alteração pelo lado do grupo: instance é o Group
+        agendar_revogacao(instance.user_set.values_list('pk', flat=True))
+    else:
+        agendar_revogacao(pk_set)
+
+
+pre_save.connect(revogar_tokens_se_alterado, sender=CustomUser, dispatch_uid='revogar-tokens-usuario-alterado')
+post_delete.connect(revogar_tokens_usuario_removido, sender=CustomUser, dispatch_uid='revogar-tokens-usuario-removido')
+m2m_changed.connect(revogar_tokens_grupos_alterados, sender=CustomUser.groups.through, dispatch_uid='revogar-tokens-grupos-alterados')
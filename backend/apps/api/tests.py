@@ -1,3 +1,799 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.api.authentication import get_chave_usuario_revogado, is_revogado, revogar_token
+from apps.api.cache import get_estatisticas_cache, invalidar_catalogo
+from apps.api.roles import EMITIDO_EM_CLAIM, GRUPO_ADMIN, GRUPO_ALUNO
+from apps.api.serializers.token_serializer import GrupoTokenObtainPairSerializer
+from apps.api.uploads import _trava_upload
+from apps.treinamento.models import Matricula, Recursos, Treinamento, Turma
+from apps.users.models import Aluno, CustomUser
+
+
+class APITestCase(TestCase):
+    '''
+    Base dos testes da API: um admin, alunos matriculados em turmas com recursos
+    e clientes autenticados com o mesmo token emitido por /api/token/.
+    '''
+    @classmethod
+    def setUpTestData(cls):
+        cls.grupo_admin = Group.objects.create(name=GRUPO_ADMIN)
+        cls.grupo_aluno = Group.objects.create(name=GRUPO_ALUNO)
+
+        cls.admin = CustomUser.objects.create_user(email='admin@teste.com', username='admin', password='senha')
+        cls.admin.groups.add(cls.grupo_admin)
+
+        hoje = date.today()
+        cls.turmas = []
+        for i in range(3):
+            treinamento = Treinamento.objects.create(nome=f'Treinamento {i}', descricao='Descrição')
+            for j in range(3):
+                turma = Turma.objects.create(
+                    treinamento=treinamento,
+                    nome=f'Turma {j}',
+                    data_inicio=hoje - timedelta(days=10),
+                    data_fim=hoje + timedelta(days=10),
+                    link_acesso='https://teste.com',
+                )
+                Recursos.objects.create(
+                    turma=turma,
+                    tipo_recurso='pdf',
+                    recurso=f'recursos/{i}-{j}.pdf',
+                    draft=False,
+                    nome_recurso=f'Recurso {i}-{j}',
+                    descricao_recurso='Descrição',
+                )
+                cls.turmas.append(turma)
+
+        cls.alunos = [cls.criar_aluno(i) for i in range(3)]
+        cls.aluno = cls.alunos[0]
+
+    @classmethod
+    def criar_aluno(cls, indice: int, turmas=None) -> Aluno:
+        user = CustomUser.objects.create_user(email=f'aluno{indice}@teste.com', username=f'aluno {indice}', password='senha')
+        user.groups.add(cls.grupo_aluno)
+        aluno = Aluno.objects.create(user=user, telefone='11999999999')
+        Matricula.objects.bulk_create(Matricula(aluno=aluno, turma=turma) for turma in (turmas or cls.turmas))
+        return aluno
+
+    def setUp(self):
+        # As respostas da API ficam em cache entre os testes; cada teste mede a primeira leitura
+        cache.clear()
+
+    def get_client(self, user, access_token=None) -> APIClient:
+        client = APIClient()
+        if access_token is None:
+            access_token = GrupoTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        return client
+
+    def get(self, client, url: str):
+        ''' Faz o GET, consumindo as respostas em streaming para que as consultas aconteçam. '''
+        response = client.get(url)
+        conteudo = b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(response.status_code, 200, conteudo)
+        return response
+
+    def assertGet(self, client, url: str, num_queries: int):
+        ''' Faz o GET com exatamente num_queries consultas, no máximo uma delas buscando os grupos do usuário. '''
+        with self.assertNumQueries(num_queries) as consultas:
+            response = self.get(client, url)
+        consultas_grupos = [consulta['sql'] for consulta in consultas.captured_queries if '"auth_group"' in consulta['sql']]
+        self.assertLessEqual(len(consultas_grupos), 1, consultas_grupos)
+        return response
+
+
+class ConsultasPorEndpointTests(APITestCase):
+    '''
+    Número de consultas de cada endpoint, por papel. O grupo do usuário vem do token,
+    então nenhuma leitura deve consultar os grupos mais de uma vez.
+    '''
+    def test_turmas(self):
+        self.assertGet(self.get_client(self.admin), '/api/turmas/', 9)
+        self.assertGet(self.get_client(self.aluno.user), '/api/turmas/', 9)
+
+    def test_treinamentos(self):
+        self.assertGet(self.get_client(self.admin), '/api/treinamentos/', 5)
+        self.assertGet(self.get_client(self.aluno.user), '/api/treinamentos/', 5)
+
+    def test_recursos(self):
+        self.assertGet(self.get_client(self.admin), '/api/recursos/', 3)
+        self.assertGet(self.get_client(self.aluno.user), '/api/recursos/', 3)
+
+    def test_me(self):
+        self.assertGet(self.get_client(self.admin), '/api/me/', 2)
+        self.assertGet(self.get_client(self.aluno.user), '/api/me/', 9)
+
+
+class ConsultasConstantesTests(APITestCase):
+    '''
+    As listagens de alunos, os recursos do aluno e o /me/ devem fazer o mesmo
+    número de consultas independentemente do volume de dados.
+    '''
+    def popular_alunos(self):
+        call_command('popular_alunos', 50, turmas=len(self.turmas), stdout=StringIO())
+
+    def popular_recursos(self):
+        treinamento = Treinamento.objects.create(nome='Treinamento extra', descricao='Descrição')
+        hoje = date.today()
+        for i in range(20):
+            turma = Turma.objects.create(
+                treinamento=treinamento,
+                nome=f'Turma {i}',
+                data_inicio=hoje - timedelta(days=10),
+                data_fim=hoje + timedelta(days=10),
+                link_acesso='https://teste.com',
+            )
+            Recursos.objects.create(
+                turma=turma,
+                tipo_recurso='pdf',
+                recurso=f'recursos/extra-{i}.pdf',
+                draft=False,
+                nome_recurso=f'Recurso extra {i}',
+                descricao_recurso='Descrição',
+            )
+            Matricula.objects.create(aluno=self.aluno, turma=turma)
+
+    def assertConsultasConstantes(self, user, url: str, popular):
+        client = self.get_client(user)
+        with CaptureQueriesContext(connection) as consultas:
+            self.get(client, url)
+
+        popular()
+        cache.clear()
+        self.assertGet(client, url, len(consultas.captured_queries))
+
+    def test_alunos(self):
+        self.assertConsultasConstantes(self.admin, '/api/alunos/', self.popular_alunos)
+
+    def test_alunos_todos(self):
+        self.assertConsultasConstantes(self.admin, '/api/alunos/todos', self.popular_alunos)
+
+    def test_me(self):
+        self.assertConsultasConstantes(self.aluno.user, '/api/me/', self.popular_alunos)
+
+    def test_recursos_aluno(self):
+        self.assertConsultasConstantes(self.aluno.user, '/api/recursos/', self.popular_recursos)
+
+
+class AlunosTodosStreamingTests(APITestCase):
+    ''' /api/alunos/todos em streaming: um array JSON ou um aluno por linha (NDJSON). '''
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def ler(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_array_json(self):
+        response, conteudo = self.ler('/api/alunos/todos')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        alunos = json.loads(conteudo)
+        self.assertCountEqual([aluno['email'] for aluno in alunos], [f'aluno{i}@teste.com' for i in range(3)])
+        self.assertEqual(len(alunos[0]['turmas']), len(self.turmas))
+
+    def test_ndjson(self):
+        response, conteudo = self.ler('/api/alunos/todos', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        linhas = conteudo.decode().splitlines()
+        self.assertEqual(len(linhas), 3)
+        self.assertCountEqual([json.loads(linha)['email'] for linha in linhas], [f'aluno{i}@teste.com' for i in range(3)])
+
+    @override_settings(API_STREAM_CHUNK_SIZE=1)
+    def test_lotes_menores_que_a_lista(self):
+        _, conteudo = self.ler('/api/alunos/todos')
+        self.assertEqual(len(json.loads(conteudo)), 3)
+
+    def test_lista_vazia(self):
+        Aluno.objects.all().delete()
+        _, conteudo = self.ler('/api/alunos/todos')
+        self.assertEqual(json.loads(conteudo), [])
+        _, conteudo = self.ler('/api/alunos/todos', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(conteudo, b'')
+
+
+class ProjecaoAlunosTests(APITestCase):
+    ''' Parâmetro fields= das listagens de alunos: só os campos pedidos, sem turmas nem grupo. '''
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def test_campos_pedidos(self):
+        response = self.client.get('/api/alunos/?fields=id,email')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        for aluno in response.data['results']:
+            self.assertEqual(set(aluno), {'id', 'email'})
+
+        response = self.client.get('/api/alunos/todos?fields=nome, email,nome')
+        alunos = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(list(alunos[0]), ['nome', 'email'])
+
+    def test_campo_desconhecido_retorna_400(self):
+        for url in ('/api/alunos/?fields=id,turmas', '/api/alunos/todos?fields=senha', '/api/alunos/?fields=,'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('fields', response.json())
+
+    def test_consultas_sem_relacionados(self):
+        # Usuário autenticado, contagem e página, sem os prefetches de grupos e turmas
+        self.assertGet(self.client, '/api/alunos/?fields=id,nome', 3)
+
+
+class PaginacaoCursorTests(APITestCase):
+    ''' Paginação por cursor: links next/previous sem contagem, na ordem de cadastro dos alunos. '''
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def test_links_do_cursor(self):
+        for url in ('/api/alunos/?paginacao=cursor&page_size=2', '/api/alunos/?paginacao=cursor&page_size=2&fields=email'):
+            with self.subTest(url=url):
+                primeira = self.client.get(url).data
+                self.assertNotIn('count', primeira)
+                self.assertIsNone(primeira['previous'])
+                self.assertIn('cursor=', primeira['next'])
+
+                segunda = self.client.get(primeira['next']).data
+                self.assertIsNone(segunda['next'])
+                self.assertIsNotNone(segunda['previous'])
+
+                emails = [aluno['email'] for aluno in primeira['results'] + segunda['results']]
+                self.assertEqual(emails, [f'aluno{i}@teste.com' for i in range(3)])
+
+                anterior = self.client.get(segunda['previous']).data
+                self.assertEqual(anterior['results'], primeira['results'])
+
+    def test_mesma_ordem_na_paginacao_por_pagina(self):
+        response = self.client.get('/api/alunos/?page_size=2&page=2')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([aluno['email'] for aluno in response.data['results']], ['aluno2@teste.com'])
+
+    def test_cursor_nos_viewsets_do_router(self):
+        response = self.client.get('/api/turmas/?paginacao=cursor&page_size=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([turma['id'] for turma in response.data['results']], [turma.id for turma in self.turmas[:5]])
+        self.assertIsNotNone(response.data['next'])
+
+
+class ContagemCacheTests(APITestCase):
+    ''' Total das listagens paginadas em cache, invalidado pelas escritas no catálogo. '''
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def get_contagem(self, client, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get(url)
+        contou = any('COUNT(' in consulta['sql'] for consulta in consultas.captured_queries)
+        return response.data['count'], contou
+
+    def test_contagem_reaproveitada_entre_paginas(self):
+        self.assertEqual(self.get_contagem(self.client, '/api/alunos/?page_size=2'), (3, True))
+        self.assertEqual(self.get_contagem(self.client, '/api/alunos/?page_size=2&page=2'), (3, False))
+        # Outros filtros têm outra contagem
+        self.assertEqual(self.get_contagem(self.client, '/api/alunos/?page_size=2&fields=id'), (3, True))
+
+    def test_escrita_invalida_a_contagem(self):
+        self.get_contagem(self.client, '/api/alunos/')
+        self.criar_aluno(3)
+        self.assertEqual(self.get_contagem(self.client, '/api/alunos/'), (4, True))
+
+        self.client.delete(f'/api/alunos/{self.aluno.pk}/')
+        self.assertEqual(self.get_contagem(self.client, '/api/alunos/'), (3, True))
+
+    def test_contagem_por_papel(self):
+        aluno = self.criar_aluno(3, turmas=self.turmas[:2])
+        self.assertEqual(self.get_contagem(self.client, '/api/turmas/')[0], 9)
+        self.assertEqual(self.get_contagem(self.get_client(aluno.user), '/api/turmas/')[0], 2)
+
+
+class JanelaDeAcessoTests(APITestCase):
+    ''' Bloqueio do recurso calculado no banco, nas datas-limite da turma. '''
+    def configurar(self, indice, inicio, fim, draft=False, acesso_previo=False) -> Turma:
+        turma = self.turmas[indice]
+        hoje = date.today()
+        Turma.objects.filter(pk=turma.pk).update(data_inicio=hoje + timedelta(days=inicio), data_fim=hoje + timedelta(days=fim))
+        Recursos.objects.filter(turma=turma).update(draft=draft, acesso_previo=acesso_previo)
+        return turma
+
+    def test_datas_limite(self):
+        casos = [
+            # (início e fim em dias a partir de hoje, draft, acesso prévio, bloqueado)
+            (0, 10, False, False, False),
+            (1, 10, False, False, True),
+            (1, 10, False, True, False),
+            (-10, 0, False, False, False),
+            (-10, -1, False, False, True),
+            (-10, -1, True, False, False),
+        ]
+        turmas = [
+            (self.configurar(indice, inicio, fim, draft, acesso_previo), bloqueado)
+            for indice, (inicio, fim, draft, acesso_previo, bloqueado) in enumerate(casos)
+        ]
+        client = self.get_client(self.aluno.user)
+
+        recursos = {recurso['id'] for recurso in client.get('/api/recursos/?page_size=50').data['results']}
+        for (turma, bloqueado), caso in zip(turmas, casos):
+            with self.subTest(caso=caso):
+                recurso = client.get(f'/api/turmas/{turma.id}/').data['recurso']
+                self.assertEqual(recurso.get('bloqueia_acesso', False), bloqueado)
+                self.assertEqual(turma.recurso.id not in recursos, bloqueado)
+
+    def test_admin_nunca_e_bloqueado(self):
+        turma = self.configurar(0, -10, -1)
+        recurso = self.get_client(self.admin).get(f'/api/turmas/{turma.id}/').data['recurso']
+        self.assertNotIn('bloqueia_acesso', recurso)
+
+
+class CacheRespostaTests(APITestCase):
+    ''' Respostas do catálogo em cache, invalidadas quando a versão do catálogo avança. '''
+    url = '/api/treinamentos/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def get_nomes(self):
+        return [treinamento['nome'] for treinamento in self.client.get(self.url).data['results']]
+
+    def test_segunda_leitura_sem_consultas(self):
+        self.get(self.client, self.url)
+        with self.assertNumQueries(0):
+            self.get(self.client, self.url)
+        self.assertEqual(get_estatisticas_cache(['treinamentos'])['treinamentos'], {'hits': 1, 'misses': 1, 'taxa_acerto': 0.5})
+
+    def test_escrita_invalida_a_resposta(self):
+        self.assertIn('Treinamento 0', self.get_nomes())
+        treinamento = self.turmas[0].treinamento
+        treinamento.nome = 'Renomeado'
+        treinamento.save()
+        self.assertIn('Renomeado', self.get_nomes())
+
+    def test_nova_versao_do_catalogo(self):
+        self.get_nomes()
+        # Alteração sem sinais: a resposta em cache continua valendo até a versão avançar
+        Treinamento.objects.filter(pk=self.turmas[0].treinamento_id).update(nome='Renomeado')
+        self.assertNotIn('Renomeado', self.get_nomes())
+        invalidar_catalogo()
+        self.assertIn('Renomeado', self.get_nomes())
+
+    def test_resposta_por_papel(self):
+        aluno = self.criar_aluno(3, turmas=self.turmas[:1])
+        self.assertEqual(len(self.get_nomes()), 3)
+        response = self.get_client(aluno.user).get(self.url)
+        self.assertEqual([treinamento['nome'] for treinamento in response.data['results']], ['Treinamento 0'])
+
+
+class ETagTests(APITestCase):
+    ''' GET condicional: 304 para quem já tem a versão atual, novo ETag depois de cada alteração. '''
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def test_if_none_match_retorna_304(self):
+        for url in ('/api/turmas/', f'/api/turmas/{self.turmas[0].id}/', '/api/treinamentos/', '/api/me/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Authorization', response['Vary'])
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_alteracao_muda_o_etag(self):
+        url = f'/api/turmas/{self.turmas[0].id}/'
+        etag = self.client.get(url)['ETag']
+
+        turma = Turma.objects.get(pk=self.turmas[0].pk)
+        turma.link_acesso = 'https://outro.com'
+        turma.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['link_acesso'], 'https://outro.com')
+
+    def test_alteracao_de_aluno_matriculado_muda_o_etag_da_turma(self):
+        url = f'/api/turmas/{self.turmas[0].id}/'
+        etag = self.client.get(url)['ETag']
+        user = CustomUser.objects.get(pk=self.aluno.pk)
+        user.email = 'novo@teste.com'
+        user.save()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_etag_por_usuario(self):
+        url = '/api/me/'
+        etag_admin = self.client.get(url)['ETag']
+        etag_aluno = self.get_client(self.aluno.user).get(url)['ETag']
+        self.assertNotEqual(etag_admin, etag_aluno)
+        response = self.get_client(self.aluno.user).get(url, HTTP_IF_NONE_MATCH=etag_admin)
+        self.assertEqual(response.status_code, 200)
+
+    def test_turma_inexistente(self):
+        self.assertEqual(self.client.get('/api/turmas/999/').status_code, 404)
+
+
+class MatriculaAlunoTurmaTests(APITestCase):
+    ''' Matrícula em lote por emails: idempotente e com o resultado de cada email. '''
+    def setUp(self):
+        super().setUp()
+        self.turma = Turma.objects.create(
+            treinamento=self.turmas[0].treinamento,
+            nome='Turma nova',
+            data_inicio=date.today(),
+            data_fim=date.today() + timedelta(days=10),
+            link_acesso='https://teste.com',
+        )
+        self.url = f'/api/turmas/{self.turma.id}/alunos/'
+        self.client = self.get_client(self.admin)
+
+    def matricular(self, emails):
+        return self.client.post(self.url, {'emails': emails}, format='json')
+
+    def test_repetir_a_matricula_nao_altera_nada(self):
+        emails = ['aluno0@teste.com', 'aluno1@teste.com']
+        response = self.matricular(emails)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totais'], {'matriculados': 2, 'ja_matriculados': 0, 'nao_encontrados': 0})
+
+        response = self.matricular(emails)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totais'], {'matriculados': 0, 'ja_matriculados': 2, 'nao_encontrados': 0})
+        self.assertEqual(Matricula.objects.filter(turma=self.turma).count(), 2)
+
+    def test_emails_repetidos_com_maiusculas_ou_espacos(self):
+        response = self.matricular(['aluno0@teste.com', ' ALUNO0@teste.com ', 'Aluno0@Teste.com'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totais'], {'matriculados': 1, 'ja_matriculados': 0, 'nao_encontrados': 0})
+        self.assertEqual(Matricula.objects.filter(turma=self.turma).count(), 1)
+
+    def test_email_sem_aluno(self):
+        response = self.matricular(['aluno0@teste.com', 'ninguem@teste.com'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['matriculados'], ['aluno0@teste.com'])
+        self.assertEqual(response.data['nao_encontrados'], ['ninguem@teste.com'])
+
+    def test_formato_invalido_retorna_400(self):
+        for emails in ([], 'aluno0@teste.com', [1, 2], ['  ']):
+            with self.subTest(emails=emails):
+                self.assertEqual(self.matricular(emails).status_code, 400)
+        self.assertFalse(Matricula.objects.filter(turma=self.turma).exists())
+
+
+class ArquivosTemporariosMixin:
+    ''' MEDIA_ROOT e RECURSOS_UPLOAD_DIR em uma pasta temporária, apagada ao fim de cada teste. '''
+    def setUp(self):
+        super().setUp()
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(
+            MEDIA_ROOT=os.path.join(pasta, 'media'),
+            RECURSOS_UPLOAD_DIR=os.path.join(pasta, 'uploads'),
+            RECURSOS_DERIVADOS_ATIVOS=False,
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+
+class DownloadRecursoTests(ArquivosTemporariosMixin, APITestCase):
+    ''' Download do recurso: intervalos de bytes (206/416), GETs condicionais e a janela de acesso do aluno. '''
+    conteudo = b'0123456789' * 10
+
+    def setUp(self):
+        super().setUp()
+        self.turma = self.turmas[0]
+        caminho = self.turma.recurso.recurso.path
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(self.conteudo)
+        self.url = f'/api/turmas/{self.turma.id}/baixar_recurso/'
+        self.client = self.get_client(self.aluno.user)
+
+    def baixar(self, **headers):
+        response = self.client.get(self.url, **headers)
+        conteudo = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, conteudo
+
+    def test_arquivo_inteiro(self):
+        response, conteudo = self.baixar()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(conteudo, self.conteudo)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+
+    def test_intervalo(self):
+        response, conteudo = self.baixar(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(conteudo, self.conteudo[10:20])
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_intervalo_sufixo(self):
+        response, conteudo = self.baixar(HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(conteudo, self.conteudo[-5:])
+        self.assertEqual(response['Content-Range'], 'bytes 95-99/100')
+
+    def test_intervalo_fora_do_arquivo_retorna_416(self):
+        response, _ = self.baixar(HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_if_range_desatualizado_envia_arquivo_inteiro(self):
+        response, conteudo = self.baixar(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"etag-antigo"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(conteudo, self.conteudo)
+
+        etag = self.baixar()[0]['ETag']
+        response, conteudo = self.baixar(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(conteudo, self.conteudo[10:20])
+
+    def test_if_none_match_retorna_304(self):
+        etag = self.baixar()[0]['ETag']
+        response, conteudo = self.baixar(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(conteudo, b'')
+
+    def test_head(self):
+        response = self.client.head(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.conteudo)))
+        self.assertEqual(b''.join(response.streaming_content) if response.streaming else response.content, b'')
+
+    def test_aluno_fora_da_janela_de_acesso(self):
+        # Turma encerrada: o recurso só continua liberado se estiver em draft
+        Turma.objects.filter(pk=self.turma.pk).update(
+            data_inicio=date.today() - timedelta(days=20), data_fim=date.today() - timedelta(days=1)
+        )
+        self.assertEqual(self.baixar()[0].status_code, 403)
+        Recursos.objects.filter(pk=self.turma.recurso.pk).update(draft=True)
+        self.assertEqual(self.baixar()[0].status_code, 200)
+
+        # Turma que ainda não começou: só com acesso prévio
+        Turma.objects.filter(pk=self.turma.pk).update(
+            data_inicio=date.today() + timedelta(days=1), data_fim=date.today() + timedelta(days=10)
+        )
+        self.assertEqual(self.baixar()[0].status_code, 403)
+        Recursos.objects.filter(pk=self.turma.recurso.pk).update(acesso_previo=True)
+        self.assertEqual(self.baixar()[0].status_code, 200)
+
+    def test_admin_fora_da_janela_de_acesso(self):
+        Turma.objects.filter(pk=self.turma.pk).update(
+            data_inicio=date.today() - timedelta(days=20), data_fim=date.today() - timedelta(days=1)
+        )
+        self.client = self.get_client(self.admin)
+        self.assertEqual(self.baixar()[0].status_code, 200)
+
+    def test_aluno_sem_matricula(self):
+        Matricula.objects.filter(aluno=self.aluno, turma=self.turma).delete()
+        response, _ = self.baixar()
+        self.assertEqual(response.status_code, 404)
+
+
+class RecursoZipTests(ArquivosTemporariosMixin, APITestCase):
+    ''' Índice e membros individuais de recursos ZIP, lidos sem extrair o pacote. '''
+    membros = {'aula1/slides.pdf': b'pdf' * 100, 'leia-me.txt': b'texto'}
+
+    def setUp(self):
+        super().setUp()
+        self.turma = self.turmas[0]
+        Recursos.objects.filter(turma=self.turma).update(tipo_recurso='zip')
+        caminho = self.turma.recurso.recurso.path
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as arquivo_zip:
+            arquivo_zip.writestr('aula1/', '')
+            for nome, conteudo in self.membros.items():
+                arquivo_zip.writestr(nome, conteudo)
+        self.url = f'/api/turmas/{self.turma.id}/baixar_recurso/arquivos/'
+        self.client = self.get_client(self.aluno.user)
+
+    def test_indice(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {membro['nome']: membro['tamanho'] for membro in response.data},
+            {nome: len(conteudo) for nome, conteudo in self.membros.items()},
+        )
+
+    def test_indice_em_cache(self):
+        self.client.get(self.url)
+        with mock.patch('apps.api.downloads.zipfile.ZipFile') as zip_file:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        zip_file.assert_not_called()
+
+    def test_membro(self):
+        response = self.client.get(self.url + 'aula1/slides.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.membros['aula1/slides.pdf'])
+        self.assertEqual(response['Content-Length'], str(len(self.membros['aula1/slides.pdf'])))
+
+        response = self.client.get(self.url + 'aula1/slides.pdf', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_membro_inexistente(self):
+        self.assertEqual(self.client.get(self.url + 'outro.txt').status_code, 404)
+        self.assertEqual(self.client.get(self.url + 'aula1/').status_code, 404)
+
+    def test_recurso_que_nao_e_zip(self):
+        Recursos.objects.filter(turma=self.turma).update(tipo_recurso='pdf')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_zip_corrompido(self):
+        with open(self.turma.recurso.recurso.path, 'wb') as arquivo:
+            arquivo.write(b'nao e um zip')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class UploadEmPartesTests(ArquivosTemporariosMixin, APITestCase):
+    ''' Protocolo do upload em partes: início, blocos com offset, consulta e finalização. '''
+    conteudo = b'0123456789' * 10
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.admin)
+
+    def iniciar(self) -> str:
+        response = self.client.post('/api/recursos/uploads/', {'filename': 'aula.pdf', 'tamanho': len(self.conteudo)}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['offset'], 0)
+        return f"/api/recursos/uploads/{response.data['upload_id']}/"
+
+    def put(self, url: str, offset: int, bloco: bytes):
+        return self.client.generic('PUT', url, bloco, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_blocos_e_consulta_do_offset(self):
+        url = self.iniciar()
+        response = self.put(url, 0, self.conteudo[:40])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '40')
+
+        self.assertEqual(self.client.get(url).data['offset'], 40)
+        response = self.client.head(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '40')
+
+    def test_offset_diferente_retorna_409(self):
+        url = self.iniciar()
+        self.put(url, 0, self.conteudo[:40])
+        # Bloco repetido: o arquivo parcial não muda
+        response = self.put(url, 0, self.conteudo[:40])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '40')
+        self.assertEqual(self.client.get(url).data['offset'], 40)
+
+    def test_bloco_em_gravacao_retorna_409(self):
+        url = self.iniciar()
+        upload_id = url.rstrip('/').rsplit('/', 1)[1]
+        with _trava_upload(upload_id):
+            response = self.put(url, 0, self.conteudo[:40])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response['Upload-Offset'], '0')
+
+    def test_bloco_alem_do_tamanho_retorna_400(self):
+        url = self.iniciar()
+        self.assertEqual(self.put(url, 0, self.conteudo + b'x').status_code, 400)
+
+    def test_finalizar(self):
+        url = self.iniciar()
+        dados = {'turma': self.turmas[0].pk, 'tipo_recurso': 'pdf', 'nome_recurso': 'Aula', 'descricao_recurso': 'Descrição'}
+        Recursos.objects.filter(turma=self.turmas[0]).delete()
+
+        self.put(url, 0, self.conteudo[:40])
+        # Incompleto: ainda não pode ser finalizado
+        self.assertEqual(self.client.post(f'{url}finalizar/', dados, format='json').status_code, 409)
+
+        self.put(url, 40, self.conteudo[40:])
+        response = self.client.post(f'{url}finalizar/', dados, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        recurso = Recursos.objects.get(turma=self.turmas[0])
+        self.assertIn(hashlib.sha256(self.conteudo).hexdigest(), recurso.recurso.name)
+        self.assertEqual(recurso.nome_arquivo, 'aula.pdf')
+        with recurso.recurso.open('rb') as arquivo:
+            self.assertEqual(arquivo.read(), self.conteudo)
+        # O estado e o arquivo parcial são descartados
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class RevogacaoTokenTests(APITestCase):
+    ''' Tokens revogados, por logout ou por mudança nos dados do usuário assinados neles. '''
+    def test_token_revogado(self):
+        access_token = GrupoTokenObtainPairSerializer.get_token(self.admin).access_token
+        revogar_token(access_token)
+        self.assertEqual(self.get_client(self.admin, access_token).get('/api/turmas/').status_code, 401)
+
+    def test_alteracao_de_grupo_revoga_tokens_emitidos(self):
+        user = self.aluno.user
+        client = self.get_client(user)
+        self.assertEqual(client.get('/api/turmas/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.groups.add(self.grupo_admin)
+
+        self.assertEqual(client.get('/api/turmas/').status_code, 401)
+        # O token emitido depois da alteração, com os grupos novos, é aceito
+        user = CustomUser.objects.get(pk=user.pk)
+        self.assertEqual(self.get_client(user).get('/api/alunos/').status_code, 200)
+
+    def test_desativar_usuario_revoga_tokens_emitidos(self):
+        user = self.aluno.user
+        client = self.get_client(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.is_active = False
+            user.save()
+        self.assertEqual(client.get('/api/turmas/').status_code, 401)
+
+    def test_token_emitido_no_mesmo_segundo_antes_da_revogacao(self):
+        token = GrupoTokenObtainPairSerializer.get_token(self.admin).access_token
+        emitido_em = token[EMITIDO_EM_CLAIM]
+        token['iat'] = int(emitido_em)
+        chave = get_chave_usuario_revogado(self.admin.pk)
+
+        # Revogado uma fração de segundo depois: o iat inteiro empataria, o claim não
+        cache.set(chave, emitido_em + 0.001)
+        self.assertTrue(is_revogado(token))
+
+        # Token emitido depois da revogação
+        cache.set(chave, emitido_em - 0.001)
+        self.assertFalse(is_revogado(token))
+
+    def test_token_sem_claim_usa_iat(self):
+        token = GrupoTokenObtainPairSerializer.get_token(self.admin).access_token
+        del token[EMITIDO_EM_CLAIM]
+        cache.set(get_chave_usuario_revogado(self.admin.pk), float(token['iat']))
+        self.assertTrue(is_revogado(token))
+
+
+class TokenUserNaLeituraTests(APITestCase):
+    ''' Leituras de turmas e treinamentos autenticam pelo token, sem carregar o usuário do banco. '''
+    def assertLeituraSemUsuario(self, url: str):
+        client = self.get_client(self.aluno.user)
+        with CaptureQueriesContext(connection) as consultas:
+            self.get(client, url)
+        self.assertEqual([c['sql'] for c in consultas.captured_queries if self.is_carga_do_usuario(c['sql'])], [])
+
+    def is_carga_do_usuario(self, sql: str) -> bool:
+        # A autenticação pelo banco busca o usuário pela chave; os alunos das turmas vêm em outro SELECT
+        return sql.startswith('SELECT "users_customuser"."password"')
+
+    def test_turmas(self):
+        self.assertLeituraSemUsuario('/api/turmas/')
+        self.assertLeituraSemUsuario(f'/api/turmas/{self.turmas[0].pk}/')
+
+    def test_treinamentos(self):
+        self.assertLeituraSemUsuario('/api/treinamentos/')
+
+    def test_escrita_carrega_usuario(self):
+        client = self.get_client(self.admin)
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.post('/api/treinamentos/', {'nome': 'Novo', 'descricao': 'Descrição'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(any(self.is_carga_do_usuario(c['sql']) for c in consultas.captured_queries))
+
+    def test_leitura_com_token_revogado(self):
+        access_token = GrupoTokenObtainPairSerializer.get_token(self.aluno.user).access_token
+        revogar_token(access_token)
+        self.assertEqual(self.get_client(self.aluno.user, access_token).get('/api/treinamentos/').status_code, 401)
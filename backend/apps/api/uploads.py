@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+
+from apps.treinamento.storage import TravaOcupada, trava_exclusiva
+
+# Tamanho dos blocos lidos do corpo da requisição e gravados no disco
+TAMANHO_BLOCO_GRAVACAO = 64 * 1024
+
+# SHA-256 parcial dos uploads em andamento neste processo: {upload_id: (offset, sha256)}.
+# O hashlib não serializa o estado intermediário, então ele não vai para o <id>.json; se um
+# bloco cair em outro worker, o storage calcula o hash relendo o arquivo montado
+_hashes_parciais = {}
+
+
+class UploadNaoEncontrado(Exception):
+    ''' O upload não existe, expirou ou pertence a outro usuário. '''
+
+
+class OffsetInvalido(Exception):
+    ''' O bloco enviado não começa onde o arquivo parcial termina. '''
+    def __init__(self, offset: int):
+        self.offset = offset
+        super().__init__(offset)
+
+
+class UploadEmAndamento(Exception):
+    ''' Outra requisição ainda está gravando um bloco deste upload. '''
+
+
+class ArquivoUploadCompleto(File):
+    '''
+    Arquivo já montado em disco pelo upload em partes. Expõe temporary_file_path
+    como o TemporaryUploadedFile, para que o FileSystemStorage mova o arquivo em vez de copiá-lo.
+    '''
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+
+def _caminho(upload_id: str, extensao: str) -> str:
+    return os.path.join(settings.RECURSOS_UPLOAD_DIR, f'{upload_id}.{extensao}')
+
+
+@contextmanager
+def _trava_upload(upload_id: str):
+    '''
+    Trava exclusiva do upload, entre processos, enquanto o offset é conferido e o bloco gravado.
+    Sem ela, um PUT repetido pelo cliente passaria na conferência enquanto o original,
+    preso numa conexão lenta, ainda grava, e os dois acrescentariam o mesmo trecho.
+    Não espera: se a trava já está com outra requisição, levanta UploadEmAndamento.
+    '''
+    try:
+        with trava_exclusiva(_caminho(upload_id, 'lock'), esperar=False):
+            yield
+    except TravaOcupada:
+        raise UploadEmAndamento()
+
+
+def limpar_uploads_expirados() -> None:
+    ''' Remove os uploads que não recebem blocos há mais de RECURSOS_UPLOAD_EXPIRACAO segundos. '''
+    limite = time.time() - settings.RECURSOS_UPLOAD_EXPIRACAO
+    for nome in os.listdir(settings.RECURSOS_UPLOAD_DIR):
+        upload_id, extensao = os.path.splitext(nome)
+        if extensao != '.json':
+            continue
+        try:
+            if os.path.getmtime(_caminho(upload_id, 'part')) < limite:
+                descartar_upload(upload_id)
+        except FileNotFoundError:
+            descartar_upload(upload_id)
+    # Hashes de uploads que continuaram ou terminaram em outro worker
+    for upload_id in list(_hashes_parciais):
+        if not os.path.exists(_caminho(upload_id, 'json')):
+            _hashes_parciais.pop(upload_id, None)
+
+
+def iniciar_upload(user, filename: str, tamanho: int) -> dict:
+    ''' Cria o arquivo parcial vazio e o estado do upload, retornando o estado. '''
+    os.makedirs(settings.RECURSOS_UPLOAD_DIR, exist_ok=True)
+    limpar_uploads_expirados()
+
+    estado = {
+        'upload_id': uuid.uuid4().hex,
+        'filename': os.path.basename(filename),
+        'tamanho': tamanho,
+        'usuario': str(user.pk),
+    }
+    open(_caminho(estado['upload_id'], 'part'), 'xb').close()
+    with open(_caminho(estado['upload_id'], 'json'), 'x', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo)
+    return {**estado, 'offset': 0}
+
+
+def get_upload(user, upload_id: str) -> dict:
+    ''' Retorna o estado do upload do usuário, com o offset atual (bytes já recebidos). '''
+    try:
+        with open(_caminho(upload_id, 'json'), encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+        estado['offset'] = os.path.getsize(_caminho(upload_id, 'part'))
+    except FileNotFoundError:
+        raise UploadNaoEncontrado()
+
+    if estado['usuario'] != str(user.pk):
+        raise UploadNaoEncontrado()
+    return estado
+
+
+def _salvar_estado(estado: dict) -> None:
+    with open(_caminho(estado['upload_id'], 'json'), 'w', encoding='utf-8') as arquivo:
+        json.dump({chave: valor for chave, valor in estado.items() if chave != 'offset'}, arquivo)
+
+
+def gravar_bloco(estado: dict, offset: int, stream, tamanho_bloco: int) -> int:
+    '''
+    Acrescenta ao arquivo parcial os bytes lidos do stream, em blocos pequenos.
+    Um bloco interrompido no meio mantém o que chegou: o cliente retoma a partir do novo offset.
+    Levanta UploadEmAndamento se outro bloco do upload ainda está sendo gravado.
+
+    O SHA-256 é atualizado com os mesmos blocos; quando o arquivo fica completo, o hash
+    vai para o estado do upload (estado['sha256']). Retorna o offset após a gravação.
+    '''
+    upload_id = estado['upload_id']
+    with _trava_upload(upload_id), open(_caminho(upload_id, 'part'), 'ab') as arquivo:
+        atual = arquivo.tell()
+        if offset != atual:
+            raise OffsetInvalido(atual)
+
+        parcial = _hashes_parciais.pop(upload_id, None)
+        if parcial and parcial[0] == atual:
+            sha256 = parcial[1]
+        else:
+            # Sem o hash dos blocos anteriores (outro worker), só dá para começar do zero
+            sha256 = hashlib.sha256() if atual == 0 else None
+
+        restante = tamanho_bloco
+        while restante > 0:
+            bloco = stream.read(min(TAMANHO_BLOCO_GRAVACAO, restante))
+            if not bloco:
+                break
+            arquivo.write(bloco)
+            if sha256 is not None:
+                sha256.update(bloco)
+            restante -= len(bloco)
+        novo_offset = arquivo.tell()
+
+        if sha256 is not None:
+            if novo_offset == estado['tamanho']:
+                _salvar_estado({**estado, 'sha256': sha256.hexdigest()})
+            else:
+                _hashes_parciais[upload_id] = (novo_offset, sha256)
+    return novo_offset
+
+
+def abrir_upload_completo(estado: dict) -> ArquivoUploadCompleto:
+    ''' Abre o arquivo montado, com o nome original e o hash calculado nos blocos, para ser salvo no FileField. '''
+    arquivo = ArquivoUploadCompleto(open(_caminho(estado['upload_id'], 'part'), 'rb'), name=estado['filename'])
+    arquivo.sha256 = estado.get('sha256')
+    return arquivo
+
+
+def descartar_upload(upload_id: str) -> None:
+    ''' Apaga o estado e o arquivo parcial, se ainda existirem. '''
+    _hashes_parciais.pop(upload_id, None)
+    for extensao in ('json', 'part', 'lock'):
+        try:
+            os.remove(_caminho(upload_id, extensao))
+        except FileNotFoundError:
+            pass
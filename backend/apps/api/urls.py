@@ -1,7 +1,9 @@
 from django.conf.urls.static import static
 from django.urls import path
 
-from .viewsets.treinamento_viewsets import (MatriculaAlunoTurma, RecursoDownloadView)
+from .viewsets.treinamento_viewsets import (MatriculaAlunoTurma, RecursoDownloadView,
+                                            RecursoZipView)
+from .views import CacheStatusView
 from .viewsets.user_viewsets import AlunoWithoutPages, MeView
 
 urlpatterns = [
@@ -9,8 +11,12 @@ urlpatterns = [
 
     path('turmas/<int:turma_id>/alunos/', MatriculaAlunoTurma.as_view(), name='alunos_turma'),
     path('turmas/<int:turma_id>/baixar_recurso/', RecursoDownloadView.as_view(), name='baixa_recurso'),
+    path('turmas/<int:turma_id>/baixar_recurso/arquivos/', RecursoZipView.as_view(), name='arquivos_recurso'),
+    path('turmas/<int:turma_id>/baixar_recurso/arquivos/<path:membro>', RecursoZipView.as_view(), name='arquivo_recurso'),
 
-    path('alunos/todos', AlunoWithoutPages.as_view(), name='todos_alunos')
+    path('alunos/todos', AlunoWithoutPages.as_view(), name='todos_alunos'),
+
+    path('status/cache/', CacheStatusView.as_view(), name='status_cache'),
 ]
 
 
@@ -2,7 +2,14 @@ from django.shortcuts import render
 
 # Create your views here.
 from drf_spectacular.utils import extend_schema
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
+
+from apps.api.cache import CacheRespostaMixin, get_estatisticas_cache
+from apps.api.permissions import IsInGroup
+from apps.api.router import route
 
 
 #Esconde as views de obtenção de tokens do jwt da documentação Swagger
@@ -12,4 +19,19 @@ class HiddenTokenObtainPairView(TokenObtainPairView):
 
 @extend_schema(exclude=True)
 class HiddenTokenRefreshView(TokenRefreshView):
-    pass
\ No newline at end of file
+    pass
+
+@extend_schema(exclude=True)
+class HiddenTokenVerifyView(TokenVerifyView):
+    ''' Usada pelo frontend para conferir a assinatura quando ele não tem a JWT_SIGNING_KEY. '''
+
+
+@extend_schema(exclude=True)
+class CacheStatusView(APIView):
+    ''' Acertos e faltas do cache de respostas por endpoint, para monitoramento. '''
+    permission_classes = [IsAuthenticated, IsInGroup]
+    required_groups = ['admin']
+
+    def get(self, request):
+        prefixos = [basename for _, viewset, basename in route.registry if issubclass(viewset, CacheRespostaMixin)]
+        return Response(get_estatisticas_cache(prefixos))
@@ -1,52 +1,100 @@
-from datetime import date
 import os
+import zipfile
 
 from django.conf import settings
-from django.db.models import Q
-from django.http import FileResponse, Http404
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Lower
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import (OpenApiExample, OpenApiResponse,
-                                   extend_schema)
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (OpenApiExample, OpenApiParameter,
+                                   OpenApiResponse, extend_schema)
 from rest_framework import parsers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.api.authentication import TokenUserNaLeituraMixin
+from apps.api.cache import CacheRespostaMixin, invalidar_catalogo
+from apps.api.downloads import get_indice_zip, servir_arquivo, servir_membro_zip
+from apps.api.etags import ETagMixin
 from apps.api.permissions import AlunoOnlyRead, IsInGroup
+from apps.api.querysets import (expressao_bloqueia_acesso, recursos_do_aluno,
+                                turmas_com_relacionados)
+from apps.api.roles import is_aluno
 from apps.api.serializers.treinamento_serializer import (RecursosSerializer,
                                                          TreinamentoSerializer,
-                                                         TurmaSerializer)
+                                                         TurmaSerializer,
+                                                         UploadRecursoSerializer)
+from apps.api.uploads import (OffsetInvalido, UploadEmAndamento,
+                              UploadNaoEncontrado, abrir_upload_completo,
+                              descartar_upload, get_upload, gravar_bloco,
+                              iniciar_upload)
 from apps.treinamento.models import Matricula, Recursos, Treinamento, Turma
 from apps.users.models import Aluno
 
+User = get_user_model()
+
 
 @extend_schema(tags=["Treinamentos"])
-class TreinamentoViewSet(viewsets.ModelViewSet):
+class TreinamentoViewSet(TokenUserNaLeituraMixin, ETagMixin, CacheRespostaMixin, viewsets.ModelViewSet):
     ''' Gera operações CRUD para treinamentos'''
     serializer_class = TreinamentoSerializer
     permission_classes = [IsAuthenticated, IsInGroup, AlunoOnlyRead] 
     required_groups = ['admin', 'aluno']
+    cursor_ordering = ('id',)
+
+    def get_etag_consultas(self, objetos) -> dict:
+        ''' Tabelas lidas pelo TreinamentoSerializer. '''
+        return {
+            'treinamentos': Treinamento.objects.filter(pk__in=objetos),
+            'turmas': Turma.objects.filter(treinamento__in=objetos),
+        }
 
     def get_queryset(self):
         ''' Retorna os treinamentos de acordo com o grupo do usuário.'''
         user = self.request.user
-        if user.groups.filter(name='aluno').exists():
-            return Treinamento.objects.filter(turmas__alunos=user.aluno).distinct()
-        return Treinamento.objects.all().distinct()
+        # As turmas são lidas pelo TreinamentoSerializer a partir do prefetch
+        qs = Treinamento.objects.prefetch_related('turmas')
+        if is_aluno(user):
+            # EXISTS em vez de join + distinct: cada treinamento é avaliado uma única vez
+            matriculado = Matricula.objects.filter(aluno_id=user.pk, turma__treinamento=OuterRef('pk'))
+            return qs.filter(Exists(matriculado))
+        return qs
 
 @extend_schema(tags=["Turmas"])
-class TurmaViewSet(viewsets.ModelViewSet):
+class TurmaViewSet(TokenUserNaLeituraMixin, ETagMixin, CacheRespostaMixin, viewsets.ModelViewSet):
     ''' Gera operações CRUD para turmas'''
     serializer_class = TurmaSerializer
     permission_classes = [IsAuthenticated, IsInGroup, AlunoOnlyRead] 
     required_groups = ['admin', 'aluno']
+    cursor_ordering = ('id',)
+
+    def get_etag_consultas(self, objetos) -> dict:
+        ''' Tabelas lidas pelo TurmaSerializer, cada uma filtrada por subquery. '''
+        matriculas = Matricula.objects.filter(turma__in=objetos)
+        # A chave primária do aluno é a do usuário
+        alunos = matriculas.values('aluno_id')
+        return {
+            'turmas': Turma.objects.filter(pk__in=objetos),
+            'treinamentos': Treinamento.objects.filter(pk__in=Turma.objects.filter(pk__in=objetos).values('treinamento_id')),
+            'recursos': Recursos.objects.filter(turma__in=objetos),
+            'matriculas': matriculas,
+            'alunos': Aluno.objects.filter(pk__in=alunos),
+            'usuarios': User.objects.filter(pk__in=alunos),
+        }
 
     def get_queryset(self):
         ''' Retorna as turmas de acordo com o grupo do usuário.'''
         user = self.request.user
-        if user.groups.filter(name='aluno').exists():
-            return Turma.objects.select_related('treinamento').filter(matriculas__aluno=user.aluno)
-        return Turma.objects.select_related('treinamento').all()
+        if is_aluno(user):
+            # A chave primária do aluno é o próprio usuário, evitando buscar user.aluno
+            return turmas_com_relacionados(Turma.objects.filter(matriculas__aluno_id=user.pk), aluno=True)
+        return turmas_com_relacionados()
 
 @extend_schema(tags=["Recursos"])
 class RecursosViewSet(viewsets.ModelViewSet):
@@ -55,25 +103,100 @@ class RecursosViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsInGroup, AlunoOnlyRead] 
     required_groups = ['admin', 'aluno']
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
+    cursor_ordering = ('id',)
 
     def get_queryset(self):
         ''' Retorna os recursos de acordo com o grupo do usuário.'''
-        qs = Recursos.objects.prefetch_related('turmas')
+        qs = Recursos.objects.select_related('turma')
 
         user = self.request.user
-        if user.groups.filter(name='aluno').exists():
-            hoje = date.today()
+        if is_aluno(user):
             # Filtra recursos baseando-se em regras de acesso.
             # Drafts podem acessar os recursos mesmo que o treinamento tenha acabado
             # Acesso prévio pode acessar os recursos mesmo que o treinamento não tenha começado
-            filtro = (
-                Q(turmas__data_inicio__lte=hoje, turmas__data_fim__gte=hoje) |
-                Q(draft=True, turmas__data_fim__lt=hoje) |
-                Q(acesso_previo=True, turmas__data_inicio__gt=hoje)
-            )
-            qs = qs.filter(filtro, turmas__alunos=user.aluno)
+            qs = recursos_do_aluno(user.pk, qs)
+
+        return qs
+
+    def get_upload(self, upload_id: str) -> dict:
+        ''' Retorna o estado do upload em partes do usuário ou 404. '''
+        try:
+            return get_upload(self.request.user, upload_id)
+        except UploadNaoEncontrado:
+            raise Http404('Upload não encontrado.')
+
+    def get_upload_response(self, estado: dict, status_code=status.HTTP_200_OK) -> Response:
+        dados = {'upload_id': estado['upload_id'], 'offset': estado['offset'], 'tamanho': estado['tamanho']}
+        return Response(dados, status=status_code, headers={'Upload-Offset': str(estado['offset'])})
+
+    @extend_schema(
+        request=UploadRecursoSerializer,
+        description="Inicia o upload em partes do arquivo de um recurso.",
+    )
+    @action(detail=False, methods=['post'], url_path='uploads', parser_classes=[parsers.JSONParser, parsers.FormParser])
+    def iniciar_upload(self, request) -> Response:
+        ''' Cria um upload vazio; os bytes são enviados depois, em blocos, via PUT. '''
+        serializer = UploadRecursoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        estado = iniciar_upload(request.user, **serializer.validated_data)
+        return self.get_upload_response(estado, status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        parameters=[OpenApiParameter('Upload-Offset', int, OpenApiParameter.HEADER, description='Posição do bloco no arquivo (obrigatório no PUT).')],
+        description="GET consulta quantos bytes já foram recebidos; PUT acrescenta um bloco a partir do offset informado.",
+    )
+    @action(detail=False, methods=['get', 'put'], url_path=r'uploads/(?P<upload_id>[0-9a-f]{32})', parser_classes=[])
+    def upload(self, request, upload_id: str) -> Response:
+        ''' Consulta o offset de um upload ou grava mais um bloco dele. '''
+        estado = self.get_upload(upload_id)
+        if request.method != 'PUT':
+            return self.get_upload_response(estado)
 
-        return qs.distinct()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            tamanho_bloco = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response({"erro": "Envie os headers Upload-Offset e Content-Length."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if tamanho_bloco > settings.RECURSOS_UPLOAD_MAX_CHUNK_SIZE:
+            return Response({"erro": "Bloco maior que o permitido."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if offset + tamanho_bloco > estado['tamanho']:
+            return Response({"erro": "O bloco ultrapassa o tamanho declarado do arquivo."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Lê o corpo direto do stream, sem passar pelos parsers nem carregar o bloco em memória
+            estado['offset'] = gravar_bloco(estado, offset, request.stream, tamanho_bloco) if tamanho_bloco else offset
+        except OffsetInvalido as erro:
+            estado['offset'] = erro.offset
+            return self.get_upload_response(estado, status.HTTP_409_CONFLICT)
+        except UploadEmAndamento:
+            # Outro PUT do mesmo upload ainda grava; o cliente consulta o offset e tenta de novo
+            response = self.get_upload_response(self.get_upload(upload_id), status.HTTP_409_CONFLICT)
+            response['Retry-After'] = '1'
+            return response
+        return self.get_upload_response(estado)
+
+    @extend_schema(
+        request=RecursosSerializer,
+        responses={201: RecursosSerializer},
+        description="Cria o recurso com o arquivo montado pelo upload em partes. Os campos são os do recurso, sem o arquivo.",
+    )
+    @action(detail=False, methods=['post'], url_path=r'uploads/(?P<upload_id>[0-9a-f]{32})/finalizar', parser_classes=[parsers.JSONParser, parsers.FormParser, parsers.MultiPartParser])
+    def finalizar_upload(self, request, upload_id: str) -> Response:
+        ''' Valida e cria o recurso; o arquivo é movido para o storage, sem cópia. '''
+        estado = self.get_upload(upload_id)
+        if estado['offset'] != estado['tamanho']:
+            return self.get_upload_response(estado, status.HTTP_409_CONFLICT)
+
+        dados = request.data.copy()
+        with abrir_upload_completo(estado) as arquivo:
+            dados['recurso'] = arquivo
+            serializer = self.get_serializer(data=dados)
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
+        descartar_upload(upload_id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
 
 
@@ -97,9 +220,60 @@ class MatriculaAlunoTurma(APIView):
             )
         return alunos, None
 
+    def get_emails(self, emails) -> list[str] | None:
+        '''
+        Normaliza a lista de emails recebida (sem espaços, em minúsculas e sem repetições);
+        None se o formato for inválido.
+        '''
+        if not isinstance(emails, list) or not emails or not all(isinstance(email, str) for email in emails):
+            return None
+        return list(dict.fromkeys(email.strip().lower() for email in emails if email.strip()))
+
+    def matricular(self, turma: Turma, emails: list[str]) -> dict[str, list[str]]:
+        '''
+        Matricula na turma os alunos dos emails, em lotes de API_MATRICULA_BATCH_SIZE.
+        É idempotente: quem já está matriculado é apenas informado no resultado.
+        '''
+        tamanho_lote = settings.API_MATRICULA_BATCH_SIZE
+        alunos_por_email = {}
+        for inicio in range(0, len(emails), tamanho_lote):
+            lote = emails[inicio:inicio + tamanho_lote]
+            alunos_por_email.update(
+                Aluno.objects.annotate(email=Lower('user__email'))
+                .filter(email__in=lote).values_list('email', 'pk')
+            )
+
+        aluno_ids = list(alunos_por_email.values())
+        ja_matriculados = set()
+        for inicio in range(0, len(aluno_ids), tamanho_lote):
+            lote = aluno_ids[inicio:inicio + tamanho_lote]
+            ja_matriculados.update(
+                Matricula.objects.filter(turma=turma, aluno_id__in=lote).values_list('aluno_id', flat=True)
+            )
+
+        resultado = {'matriculados': [], 'ja_matriculados': [], 'nao_encontrados': []}
+        novas = []
+        for email in emails:
+            aluno_id = alunos_por_email.get(email)
+            if aluno_id is None:
+                resultado['nao_encontrados'].append(email)
+            elif aluno_id in ja_matriculados:
+                resultado['ja_matriculados'].append(email)
+            else:
+                resultado['matriculados'].append(email)
+                novas.append(Matricula(aluno_id=aluno_id, turma=turma))
+
+        # ignore_conflicts: uma matrícula criada em paralelo não derruba o lote inteiro
+        Matricula.objects.bulk_create(novas, batch_size=tamanho_lote, ignore_conflicts=True)
+        return resultado
+
     @extend_schema(
         tags=["Turmas"],
-        description="Adiciona um ou mais os alunos a uma turma.",
+        description=(
+            "Matricula um ou mais alunos em uma turma.\n\n"
+            "A operação é idempotente: alunos já matriculados e emails sem aluno "
+            "cadastrado não geram erro, apenas aparecem no resultado."
+        ),
         request={
         "application/json": {
             "type": "object",
@@ -111,13 +285,24 @@ class MatriculaAlunoTurma(APIView):
                         "description": "Lista de emails dos alunos a adicionar"
                     }
                 },
-                "required": ["alunos"]
+                "required": ["emails"]
             }
         },
         responses={
             200: OpenApiResponse(
-                response=TurmaSerializer,
-                description="Retorna a turma atualizada após adicionar os recursos."
+                description="Resumo da matrícula: totais e os emails de cada resultado.",
+                examples=[
+                    OpenApiExample(
+                        'Resultado',
+                        value={
+                            "turma": 1,
+                            "totais": {"matriculados": 1, "ja_matriculados": 1, "nao_encontrados": 1},
+                            "matriculados": ["email1@example.com"],
+                            "ja_matriculados": ["email2@example.com"],
+                            "nao_encontrados": ["email3@example.com"],
+                        },
+                    ),
+                ],
             ),
         },
     )
@@ -125,24 +310,24 @@ class MatriculaAlunoTurma(APIView):
         ''' Adiciona alunos a uma turma. '''
         turma = get_object_or_404(Turma, id=turma_id)
 
-        print(request.data)
-
-        emails = request.data.get("emails", [])
-        
-        print(emails)
-        alunos, error_response = self.get_alunos(emails)
-        if error_response:
-            return error_response
-        
-        Matricula.objects.bulk_create(
-            [Matricula(
-                aluno=aluno,
-                turma=turma
-            ) for aluno in alunos] 
-        )
-
-        serializer = TurmaSerializer(turma)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        emails = self.get_emails(request.data.get("emails", []))
+        if not emails:
+            return Response(
+                {"erro": "Envie uma lista de emails no formato ['email1', 'email2', ...]."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            resultado = self.matricular(turma, emails)
+        if resultado['matriculados']:
+            # bulk_create não dispara post_save
+            invalidar_catalogo()
+
+        return Response({
+            "turma": turma.pk,
+            "totais": {chave: len(valor) for chave, valor in resultado.items()},
+            **resultado,
+        }, status=status.HTTP_200_OK)
     
     @extend_schema(
         tags=["Turmas"],
@@ -168,7 +353,8 @@ class MatriculaAlunoTurma(APIView):
             
             turma.matriculas.filter(aluno__in=alunos).delete()
 
-        serializer = TurmaSerializer(turma)
+        turma = turmas_com_relacionados().get(pk=turma.pk)
+        serializer = TurmaSerializer(turma, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -177,26 +363,62 @@ class RecursoDownloadView(APIView):
     permission_classes = [IsAuthenticated, IsInGroup, AlunoOnlyRead]
     required_groups = ['admin', 'aluno']
 
+    def get_recurso(self, request, turma_id: int) -> Recursos:
+        ''' Retorna o recurso da turma, respeitando a matrícula e a janela de acesso do aluno. '''
+        qs = Turma.objects.select_related('recurso')
+        if is_aluno(request.user):
+            qs = qs.filter(matriculas__aluno_id=request.user.pk).annotate(
+                bloqueia_acesso=expressao_bloqueia_acesso(prefixo_recurso='recurso__')
+            )
+        turma = get_object_or_404(qs, pk=turma_id)
+
+        try:
+            recurso = turma.recurso
+        except Turma.recurso.RelatedObjectDoesNotExist:
+            raise Http404("A turma não possui recurso")
+
+        if getattr(turma, 'bloqueia_acesso', False):
+            raise PermissionDenied("O recurso desta turma não está disponível no momento.")
+
+        if not recurso.recurso or not os.path.exists(recurso.recurso.path):
+            raise Http404("Arquivo não encontrado")
+        return recurso
+
     @extend_schema(exclude=True)
     def get(self, request, turma_id):
         """
-        Função para baixar o recurso da turma
+        Função para baixar o recurso da turma, com suporte a Range e GET condicional
         """
+        recurso = self.get_recurso(request, turma_id)
+        caminho = recurso.recurso.path
+        filename = recurso.nome_arquivo or os.path.basename(caminho)
+        return servir_arquivo(request, caminho, filename, recurso.recurso.name)
+
+
+class RecursoZipView(RecursoDownloadView):
+    ''' Lista e baixa arquivos individuais de recursos ZIP, sem transferir o pacote inteiro. '''
+
+    def get_indice(self, request, turma_id: int) -> tuple[Recursos, dict[str, dict]]:
+        recurso = self.get_recurso(request, turma_id)
+        if recurso.tipo_recurso != 'zip':
+            raise Http404("O recurso desta turma não é um arquivo ZIP")
         try:
-            turma = Turma.objects.get(pk=turma_id)
-            
-            caminho_relativo = turma.recurso.recurso.path
-            print(caminho_relativo)
-            caminho = os.path.join(caminho_relativo)
-            print(caminho)
-            if not os.path.exists(caminho):
-                raise Http404("Arquivo não encontrado")
-
-            filename = os.path.basename(caminho)
-            return FileResponse(
-                open(caminho, 'rb'),
-                as_attachment=True,
-                filename=filename,
-            )
-        except Exception as e:
-            print(e)
\ No newline at end of file
+            return recurso, get_indice_zip(recurso.recurso.path, recurso.recurso.name)
+        except zipfile.BadZipFile:
+            raise Http404("O arquivo ZIP do recurso está corrompido")
+
+    @extend_schema(exclude=True)
+    def get(self, request, turma_id, membro=None):
+        """
+        Sem membro, lista os arquivos do ZIP; com membro, baixa apenas aquele arquivo
+        """
+        recurso, indice = self.get_indice(request, turma_id)
+        if membro is None:
+            return Response([
+                {'nome': nome, 'tamanho': info['tamanho'], 'comprimido': info['comprimido']}
+                for nome, info in indice.items()
+            ])
+
+        if membro not in indice:
+            raise Http404("Arquivo não encontrado no ZIP")
+        return servir_membro_zip(request, recurso.recurso.path, membro, indice[membro])
@@ -1,21 +1,56 @@
 
+from django.conf import settings
 from django.db import transaction
-from rest_framework import status, viewsets
+from django.http import StreamingHttpResponse
+from rest_framework import serializers, status, viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from drf_spectacular.utils import extend_schema, OpenApiExample
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 
+from apps.api.etags import get_etag_cacheado, get_resposta_condicional, get_versao
 from apps.api.permissions import IsInGroup, OnlySuperUser
+from apps.api.querysets import (CAMPOS_PROJECAO_ALUNO, alunos_com_relacionados, com_data_cadastro,
+                                 formatar_projecao, projetar_alunos)
+from apps.api.renderers import NDJSONRenderer, stream_json_array, stream_ndjson
+from apps.api.roles import is_aluno
 from apps.api.serializers.user_serializer import (AdminSerializer, AdminUpdateSerializer, AlunoSerializer,
                                                   AlunoUpdateSerializer, User)
+from apps.treinamento.models import Matricula, Treinamento, Turma
 from apps.users.models import Aluno
 
+PARAMETRO_FIELDS = OpenApiParameter(
+    'fields',
+    str,
+    description=(
+        "Lista de campos separados por vírgula para uma resposta enxuta, sem as turmas "
+        f"e o grupo. Campos disponíveis: {', '.join(CAMPOS_PROJECAO_ALUNO)}."
+    ),
+)
+
+
+def get_campos_projecao(request) -> list[str] | None:
+    ''' Lê o parâmetro "fields" da requisição, validando os campos pedidos. '''
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+
+    campos = list(dict.fromkeys(campo.strip() for campo in fields.split(',') if campo.strip()))
+    invalidos = [campo for campo in campos if campo not in CAMPOS_PROJECAO_ALUNO]
+    if invalidos or not campos:
+        raise serializers.ValidationError({
+            'fields': f"Campos inválidos: {', '.join(invalidos)}. Use: {', '.join(CAMPOS_PROJECAO_ALUNO)}."
+        })
+    return campos
+
+
 @extend_schema(tags=["Administradores"])
 class AdminViewSet(viewsets.ModelViewSet):
     '''Gera as operações CRUD para usuários administradores'''
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated, OnlySuperUser] 
+    cursor_ordering = ('id',)
 
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
@@ -25,15 +60,29 @@ class AdminViewSet(viewsets.ModelViewSet):
 @extend_schema(tags=["Alunos"])
 class AlunoViewSet(viewsets.ModelViewSet):
     '''Gera as operações CRUD para usuários alunos'''
-    queryset = Aluno.objects.select_related('user').all()
+    queryset = com_data_cadastro(alunos_com_relacionados())
     permission_classes = [IsAuthenticated, IsInGroup] 
     required_groups = ['admin']
+    # O id do usuário é um UUID: a data de cadastro dá a ordem, e o id desempata
+    cursor_ordering = ('cadastrado_em', 'user_id')
 
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
             return AlunoUpdateSerializer
         return AlunoSerializer
 
+    @extend_schema(parameters=[PARAMETRO_FIELDS])
+    def list(self, request, *args, **kwargs):
+        campos = get_campos_projecao(request)
+        if campos is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = projetar_alunos(campos)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([formatar_projecao(linha, campos) for linha in page])
+        return Response([formatar_projecao(linha, campos) for linha in queryset])
+
     @transaction.atomic
     def destroy(self, request, *args, **kwargs):
         '''Remove um aluno e o usuário associado.'''
@@ -48,11 +97,26 @@ class AlunoWithoutPages(APIView):
     permission_classes = [IsAuthenticated, IsInGroup]
     required_groups = ['admin']
     pagination_class = None
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
 
     def get(self, request):
-        alunos = Aluno.objects.all()
-        serializer = AlunoSerializer(alunos, many=True)
-        return Response(serializer.data)
+        '''
+        Lista todos os alunos em streaming, lendo o banco em blocos.
+        Envie "Accept: application/x-ndjson" para receber um aluno por linha e
+        "?fields=id,nome,email" para receber apenas esses campos.
+        '''
+        campos = get_campos_projecao(request)
+        if campos is None:
+            alunos = alunos_com_relacionados().order_by('pk').iterator(chunk_size=settings.API_STREAM_CHUNK_SIZE)
+            serializer = AlunoSerializer()
+            itens = (serializer.to_representation(aluno) for aluno in alunos)
+        else:
+            linhas = projetar_alunos(campos).order_by('pk').iterator(chunk_size=settings.API_STREAM_CHUNK_SIZE)
+            itens = (formatar_projecao(linha, campos) for linha in linhas)
+
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return StreamingHttpResponse(stream_ndjson(itens), content_type=NDJSONRenderer.media_type)
+        return StreamingHttpResponse(stream_json_array(itens), content_type='application/json')
 
 
 @extend_schema(exclude=True)
@@ -60,8 +124,31 @@ class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        if request.user.groups.filter(name='aluno').exists():
-            serializer = AlunoSerializer(request.user.aluno)
+        ''' Perfil do usuário autenticado, com ETag: sem alterações, responde 304 sem serializar. '''
+        # O papel de todos os admins é o mesmo: o ETag inclui o próprio usuário
+        etag = get_etag_cacheado(request, lambda: self.calcular_versao(request), str(request.user.pk))
+        return get_resposta_condicional(request, etag, lambda: self.get_resposta(request))
+
+    def calcular_versao(self, request) -> dict:
+        usuario = User.objects.filter(pk=request.user.pk)
+        if not is_aluno(request.user):
+            return get_versao({'usuario': usuario})
+
+        # Tabelas lidas pelo AlunoSerializer
+        matriculas = Matricula.objects.filter(aluno_id=request.user.pk)
+        turmas = matriculas.values('turma_id')
+        return get_versao({
+            'usuario': usuario,
+            'aluno': Aluno.objects.filter(pk=request.user.pk),
+            'matriculas': matriculas,
+            'turmas': Turma.objects.filter(pk__in=turmas),
+            'treinamentos': Treinamento.objects.filter(pk__in=Turma.objects.filter(pk__in=turmas).values('treinamento_id')),
+        })
+
+    def get_resposta(self, request):
+        if is_aluno(request.user):
+            aluno = alunos_com_relacionados(Aluno.objects.filter(pk=request.user.pk)).get()
+            serializer = AlunoSerializer(aluno)
         else:
             serializer = AdminSerializer(request.user)
         return Response(serializer.data)
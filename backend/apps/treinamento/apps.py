@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TreinamentoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.treinamento'
+
+    def ready(self):
+        from apps.treinamento import signals  # noqa: F401
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import shutil
+import subprocess
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Sufixo de cada artefato derivado, gravado ao lado do arquivo original
+SUFIXOS_DERIVADOS = {
+    'video_leve': '.leve.mp4',
+    'capa': '.capa.png',
+    'manifesto': '.manifesto.json',
+}
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.RECURSOS_DERIVADOS_WORKERS, thread_name_prefix='derivados')
+    return _executor
+
+
+def get_caminho_derivado(name: str, chave: str) -> str:
+    ''' Caminho do artefato no storage: como o original é endereçado por conteúdo, o derivado também é. '''
+    return os.path.splitext(name)[0] + SUFIXOS_DERIVADOS[chave]
+
+
+def get_caminhos_derivados(name: str) -> list[str]:
+    return [get_caminho_derivado(name, chave) for chave in SUFIXOS_DERIVADOS]
+
+
+def _executar(comando: list[str], temporario: str) -> bool:
+    ''' Executa o gerador externo, descartando a saída parcial em caso de falha. '''
+    try:
+        subprocess.run(comando, check=True, capture_output=True, timeout=settings.RECURSOS_DERIVADOS_TIMEOUT)
+    except (OSError, subprocess.SubprocessError) as erro:
+        logger.warning('Falha ao executar %s: %s', comando[0], erro)
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        return False
+    return True
+
+
+def gerar_video_leve(origem: str, destino: str) -> bool:
+    ''' Reencoda o vídeo em resolução e bitrate menores, com o moov no início para tocar durante o download. '''
+    ffmpeg = shutil.which(settings.RECURSOS_FFMPEG)
+    if not ffmpeg:
+        return False
+
+    temporario = destino + '.tmp.mp4'
+    comando = [
+        ffmpeg, '-y', '-loglevel', 'error', '-i', origem,
+        '-vf', f'scale=-2:trunc(min({settings.RECURSOS_VIDEO_ALTURA}\\,ih)/2)*2',
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28',
+        '-c:a', 'aac', '-b:a', '96k',
+        '-movflags', '+faststart',
+        temporario,
+    ]
+    if not _executar(comando, temporario):
+        return False
+    os.replace(temporario, destino)
+    return True
+
+
+def gerar_capa_pdf(origem: str, destino: str) -> bool:
+    ''' Renderiza a primeira página do PDF como PNG. '''
+    pdftoppm = shutil.which(settings.RECURSOS_PDFTOPPM)
+    if not pdftoppm:
+        return False
+
+    # O pdftoppm acrescenta a extensão .png ao prefixo informado
+    prefixo = destino + '.tmp'
+    comando = [
+        pdftoppm, '-png', '-singlefile', '-f', '1', '-l', '1',
+        '-scale-to', str(settings.RECURSOS_CAPA_TAMANHO),
+        origem, prefixo,
+    ]
+    if not _executar(comando, prefixo + '.png'):
+        return False
+    os.replace(prefixo + '.png', destino)
+    return True
+
+
+def gerar_manifesto_zip(origem: str, destino: str) -> bool:
+    ''' Lista os arquivos do ZIP (lendo só o diretório central) em um JSON. '''
+    try:
+        with zipfile.ZipFile(origem) as arquivo_zip:
+            itens = [
+                {'nome': info.filename, 'tamanho': info.file_size, 'comprimido': info.compress_size}
+                for info in arquivo_zip.infolist() if not info.is_dir()
+            ]
+    except (OSError, zipfile.BadZipFile) as erro:
+        logger.warning('Falha ao ler o ZIP %s: %s', origem, erro)
+        return False
+
+    temporario = destino + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(itens, arquivo, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporario, destino)
+    return True
+
+
+GERADORES = {
+    'video': {'video_leve': gerar_video_leve},
+    'pdf': {'capa': gerar_capa_pdf},
+    'zip': {'manifesto': gerar_manifesto_zip},
+}
+
+
+def gerar_derivados(recurso_id: int) -> None:
+    ''' Gera os artefatos do recurso que ainda não existem e grava seus caminhos em Recursos.derivados. '''
+    from apps.treinamento.models import Recursos
+
+    try:
+        recurso = Recursos.objects.filter(pk=recurso_id).first()
+        if recurso is None or not recurso.recurso:
+            return
+
+        storage = recurso.recurso.storage
+        name = recurso.recurso.name
+        derivados = {}
+        for chave, gerador in GERADORES.get(recurso.tipo_recurso, {}).items():
+            caminho = get_caminho_derivado(name, chave)
+            # Mesmo conteúdo já processado para outro recurso: reaproveita o artefato
+            if storage.exists(caminho) or gerador(storage.path(name), storage.path(caminho)):
+                derivados[chave] = caminho
+
+        # O arquivo pode ter sido trocado enquanto os artefatos eram gerados
+        if derivados and Recursos.objects.filter(pk=recurso_id, recurso=name).exists():
+            recurso.derivados = derivados
+            recurso.save(update_fields=['derivados', 'atualizado_em'])
+    except Exception:
+        logger.exception('Falha ao gerar os derivados do recurso %s', recurso_id)
+
+
+def get_recursos_pendentes():
+    '''
+    Recursos de tipos com derivados que ainda não têm nenhum: geração que falhou ou que
+    se perdeu com o worker (ver RECURSOS_DERIVADOS_EM_PROCESSO).
+    '''
+    from apps.treinamento.models import Recursos
+
+    return Recursos.objects.filter(tipo_recurso__in=GERADORES, derivados={}).exclude(recurso='')
+
+
+def _gerar_em_segundo_plano(recurso_id: int) -> None:
+    try:
+        gerar_derivados(recurso_id)
+    finally:
+        # A thread do executor abre a própria conexão com o banco
+        connection.close()
+
+
+def agendar_derivados(recurso_id: int) -> None:
+    '''
+    Agenda a geração dos derivados no pool de threads do processo, após o commit da transação atual.
+    Sem RECURSOS_DERIVADOS_EM_PROCESSO, o comando gerar_derivados encontra o recurso pendente.
+    '''
+    if settings.RECURSOS_DERIVADOS_ATIVOS and settings.RECURSOS_DERIVADOS_EM_PROCESSO:
+        transaction.on_commit(lambda: get_executor().submit(_gerar_em_segundo_plano, recurso_id))
@@ -0,0 +1,45 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from apps.treinamento.derivados import get_caminhos_derivados
+from apps.treinamento.models import Recursos
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga os arquivos de recursos (e derivados) que nenhum recurso referencia e que não foram '
+        'gravados nem reaproveitados nos últimos RECURSOS_GC_CARENCIA segundos. Rode periodicamente (ex.: cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help='Apenas lista os arquivos que seriam apagados.')
+
+    def handle(self, *args, simular, **options):
+        campo = Recursos._meta.get_field('recurso')
+        storage = campo.storage
+        pasta = campo.upload_to.rstrip('/')
+        if not os.path.isdir(storage.path(pasta)):
+            return
+
+        apagados = 0
+        for raiz, _, arquivos in os.walk(storage.path(pasta)):
+            for arquivo in arquivos:
+                name = os.path.relpath(os.path.join(raiz, arquivo), storage.location).replace('\\', '/')
+                # Mesma trava do _save: um upload idêntico não reaproveita o arquivo no meio da remoção
+                with storage.get_trava():
+                    if storage.is_recente(name) or self.is_referenciado(name):
+                        continue
+                    if not simular:
+                        storage.delete(name)
+                apagados += 1
+                self.stdout.write(name)
+
+        acao = 'seriam apagados' if simular else 'apagados'
+        self.stdout.write(self.style.SUCCESS(f'{apagados} arquivo(s) {acao}.'))
+
+    def is_referenciado(self, name: str) -> bool:
+        ''' O arquivo é de um recurso ou é um derivado dele (mesmo hash, outro sufixo). '''
+        base = name.split('.', 1)[0]
+        originais = Recursos.objects.filter(recurso__startswith=base).values_list('recurso', flat=True)
+        return any(name == original or name in get_caminhos_derivados(original) for original in originais)
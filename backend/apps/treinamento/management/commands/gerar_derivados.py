@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.treinamento.derivados import gerar_derivados, get_recursos_pendentes
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera os derivados dos recursos que ainda não têm nenhum. Agende periodicamente (ex.: cron) para '
+        'refazer as gerações perdidas, ou rode com --continuo como worker quando RECURSOS_DERIVADOS_EM_PROCESSO=False. '
+        'Rode uma única instância por vez.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Continua procurando recursos pendentes.')
+        parser.add_argument('--intervalo', type=int, default=60, help='Segundos entre as buscas no modo contínuo.')
+
+    def handle(self, *args, continuo, intervalo, **options):
+        if not settings.RECURSOS_DERIVADOS_ATIVOS:
+            self.stdout.write(self.style.WARNING('RECURSOS_DERIVADOS_ATIVOS=False: nada a fazer.'))
+            return
+
+        # No modo contínuo, um recurso que falhou só é tentado de novo se o arquivo mudar
+        tentados = set()
+        while True:
+            pendentes = [
+                recurso_id for recurso_id, name in get_recursos_pendentes().values_list('pk', 'recurso')
+                if (recurso_id, name) not in tentados
+            ]
+            for recurso_id in pendentes:
+                gerar_derivados(recurso_id)
+
+            # Sem as ferramentas externas (ffmpeg, pdftoppm) os recursos continuam pendentes
+            restantes = get_recursos_pendentes().filter(pk__in=pendentes).count()
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(pendentes) - restantes} recurso(s) processado(s), {restantes} sem derivados.'
+            ))
+            if not continuo:
+                return
+            tentados.update(get_recursos_pendentes().filter(pk__in=pendentes).values_list('pk', 'recurso'))
+            time.sleep(intervalo)
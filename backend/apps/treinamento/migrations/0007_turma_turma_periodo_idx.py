@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treinamento', '0006_alter_turma_unique_together_recursos_turma_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='turma',
+            index=models.Index(fields=['data_inicio', 'data_fim'], name='turma_periodo_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:39
+
+import os
+
+import apps.treinamento.storage
+from django.db import migrations, models
+
+
+def preencher_nome_arquivo(apps, schema_editor):
+    ''' Recursos existentes ainda estão gravados pelo nome original. '''
+    Recursos = apps.get_model('treinamento', 'Recursos')
+    for recurso in Recursos.objects.exclude(recurso='').only('pk', 'recurso'):
+        Recursos.objects.filter(pk=recurso.pk).update(nome_arquivo=os.path.basename(recurso.recurso.name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treinamento', '0007_turma_turma_periodo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recursos',
+            name='nome_arquivo',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='recursos',
+            name='recurso',
+            field=models.FileField(storage=apps.treinamento.storage.ArmazenamentoPorConteudo(), upload_to='recursos/'),
+        ),
+        migrations.RunPython(preencher_nome_arquivo, migrations.RunPython.noop),
+    ]
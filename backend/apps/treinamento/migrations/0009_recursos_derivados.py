@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('treinamento', '0008_recursos_nome_arquivo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recursos',
+            name='derivados',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
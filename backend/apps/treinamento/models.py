@@ -1,11 +1,14 @@
 from django.db import models
 from django.forms import ValidationError
 
+from apps.treinamento.storage import ArmazenamentoPorConteudo
 from apps.users.models import Aluno
 
 class Treinamento(models.Model):
     nome = models.CharField(max_length=255, unique=True)
     descricao = models.CharField(max_length=255)
+    # Usado na versão (ETag) das respostas da API, ver apps.api.etags
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nome
@@ -16,6 +19,7 @@ class Turma(models.Model):
     data_inicio = models.DateField()
     data_fim = models.DateField()
     link_acesso = models.URLField()
+    atualizado_em = models.DateTimeField(auto_now=True)
     
 
     def __str__(self):
@@ -23,15 +27,23 @@ class Turma(models.Model):
     
     class Meta:
         unique_together = ('treinamento', 'nome')
+        indexes = [
+            models.Index(fields=['data_inicio', 'data_fim'], name='turma_periodo_idx'),
+        ]
 
 class Recursos(models.Model):
     turma = models.OneToOneField(Turma, null=True, blank=True, on_delete=models.SET_NULL, related_name='recurso')
     tipo_recurso = models.CharField(max_length=50, choices=[('video', 'Video'), ('pdf', 'PDF'), ('zip', 'ZIP')])
-    recurso = models.FileField(upload_to='recursos/')
+    recurso = models.FileField(upload_to='recursos/', storage=ArmazenamentoPorConteudo())
+    # Nome original do arquivo enviado, já que o storage grava pelo hash do conteúdo
+    nome_arquivo = models.CharField(max_length=255, blank=True, default='')
+    # Caminhos no storage dos artefatos gerados em segundo plano (ver apps.treinamento.derivados)
+    derivados = models.JSONField(default=dict, blank=True)
     acesso_previo = models.BooleanField(default=False)
     draft = models.BooleanField(default=True)
     nome_recurso = models.CharField(max_length=255)
     descricao_recurso = models.CharField(max_length=255)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return (self.nome_recurso + " - " + self.tipo_recurso)
@@ -42,6 +54,7 @@ class Recursos(models.Model):
 class Matricula(models.Model):
     aluno = models.ForeignKey('users.Aluno', on_delete=models.CASCADE, related_name='matriculas')
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='matriculas')
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('aluno', 'turma')
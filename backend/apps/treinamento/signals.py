@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.treinamento.derivados import agendar_derivados, get_caminhos_derivados
+from apps.treinamento.models import Recursos
+
+
+def remover_arquivo_sem_referencias(storage, name: str) -> None:
+    '''
+    Apaga o arquivo e seus derivados do storage se nenhum recurso ainda apontar para ele.
+    Arquivos gravados ou reaproveitados há pouco ficam: um upload idêntico pode estar
+    gravando o registro que os referencia. O comando coletar_arquivos_orfaos os remove depois.
+    '''
+    if not name:
+        return
+    with storage.get_trava():
+        if Recursos.objects.filter(recurso=name).exists() or storage.is_recente(name):
+            return
+        for caminho in [name, *get_caminhos_derivados(name)]:
+            storage.delete(caminho)
+
+
+def agendar_remocao(storage, name: str) -> None:
+    # Só depois do commit: um rollback não pode deixar registros apontando para um arquivo apagado
+    transaction.on_commit(lambda: remover_arquivo_sem_referencias(storage, name))
+
+
+def guardar_arquivo_anterior(sender, instance, update_fields=None, **kwargs):
+    ''' Guarda o arquivo atual do recurso, para coletá-lo caso seja substituído, e descarta os derivados antigos. '''
+    instance._arquivo_anterior = None
+    if instance.pk is None or (update_fields is not None and 'recurso' not in update_fields):
+        return
+    anterior = Recursos.objects.filter(pk=instance.pk).values_list('recurso', flat=True).first()
+    if anterior and anterior != instance.recurso.name:
+        instance._arquivo_anterior = anterior
+        instance.derivados = {}
+
+
+def processar_arquivo_salvo(sender, instance, created, **kwargs):
+    ''' Gera os derivados de arquivos novos e coleta o arquivo substituído. '''
+    anterior = getattr(instance, '_arquivo_anterior', None)
+    if anterior:
+        agendar_remocao(instance.recurso.storage, anterior)
+    if (created or anterior) and instance.recurso:
+        agendar_derivados(instance.pk)
+
+
+def coletar_arquivo_removido(sender, instance, **kwargs):
+    if instance.recurso:
+        agendar_remocao(instance.recurso.storage, instance.recurso.name)
+
+
+pre_save.connect(guardar_arquivo_anterior, sender=Recursos, dispatch_uid='recursos-guardar-arquivo-anterior')
+post_save.connect(processar_arquivo_salvo, sender=Recursos, dispatch_uid='recursos-processar-arquivo-salvo')
+post_delete.connect(coletar_arquivo_removido, sender=Recursos, dispatch_uid='recursos-coletar-arquivo-removido')
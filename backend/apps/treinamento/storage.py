@@ -0,0 +1,99 @@
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Tamanho dos blocos lidos ao calcular o hash do arquivo
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+def calcular_sha256(content) -> str:
+    ''' Calcula o SHA-256 do arquivo lendo-o em blocos, sem carregá-lo inteiro em memória. '''
+    sha256 = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for bloco in content.chunks(TAMANHO_BLOCO_HASH):
+        sha256.update(bloco)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return sha256.hexdigest()
+
+
+class TravaOcupada(Exception):
+    ''' A trava pedida sem espera está com outra requisição. '''
+
+
+@contextmanager
+def trava_exclusiva(caminho: str, esperar: bool = True):
+    '''
+    Trava exclusiva entre processos sobre o arquivo `caminho`, criado se não existir.
+    Com esperar=False não aguarda a trava de outra requisição e levanta TravaOcupada.
+    A trava é liberada ao sair do bloco.
+    '''
+    with open(caminho, 'a+b') as trava:
+        try:
+            if fcntl:
+                fcntl.flock(trava, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                trava.seek(0)
+                msvcrt.locking(trava.fileno(), msvcrt.LK_LOCK if esperar else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            if esperar:
+                raise
+            raise TravaOcupada()
+        yield
+
+
+@deconstructible
+class ArmazenamentoPorConteudo(FileSystemStorage):
+    '''
+    Storage endereçado por conteúdo: cada arquivo é gravado como
+    "<pasta>/<2 primeiros caracteres do hash>/<sha256><extensão>".
+
+    Arquivos idênticos enviados com nomes diferentes compartilham o mesmo caminho,
+    e arquivos diferentes com o mesmo nome nunca colidem. Como o caminho pode ser
+    usado por vários registros, a remoção fica a cargo de apps.treinamento.signals,
+    que só apaga o arquivo quando nenhum registro o referencia.
+
+    Se o arquivo já traz o hash calculado durante o upload (content.sha256), ele não é relido.
+
+    Reaproveitar um arquivo existente renova o seu mtime, sob a mesma trava usada na
+    coleta: assim a coleta de um registro apagado não remove o arquivo que um upload
+    idêntico, ainda sem commit, acabou de reaproveitar (ver is_recente).
+    '''
+    def get_trava(self):
+        ''' Trava que serializa o reaproveitamento de arquivos no _save e a sua remoção pela coleta. '''
+        os.makedirs(self.location, exist_ok=True)
+        return trava_exclusiva(os.path.join(self.location, '.trava-conteudo'))
+
+    def is_recente(self, name: str) -> bool:
+        ''' O arquivo foi gravado ou reaproveitado há menos de RECURSOS_GC_CARENCIA segundos. '''
+        try:
+            return os.path.getmtime(self.path(name)) > time.time() - settings.RECURSOS_GC_CARENCIA
+        except FileNotFoundError:
+            return False
+
+    def get_caminho_conteudo(self, name: str, sha256: str) -> str:
+        pasta, nome = os.path.split(name)
+        extensao = os.path.splitext(nome)[1].lower()
+        return os.path.join(pasta, sha256[:2], f'{sha256}{extensao}').replace('\\', '/')
+
+    def _save(self, name, content):
+        sha256 = getattr(content, 'sha256', None) or calcular_sha256(content)
+        name = self.get_caminho_conteudo(name, sha256)
+        with self.get_trava():
+            if self.exists(name):
+                # Mesmo conteúdo já armazenado: nada a gravar, só marca o arquivo como em uso
+                os.utime(self.path(name))
+                return name
+        return super()._save(name, content)
@@ -1,3 +1,184 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.treinamento.models import Recursos, Treinamento, Turma
+
+
+class ArmazenamentoPorConteudoTests(TestCase):
+    '''
+    Deduplicação dos arquivos de recursos e coleta dos que ficam sem referência.
+    A coleta roda no on_commit, então os testes usam captureOnCommitCallbacks(execute=True).
+    '''
+    @classmethod
+    def setUpTestData(cls):
+        treinamento = Treinamento.objects.create(nome='Treinamento', descricao='Descrição')
+        hoje = date.today()
+        cls.turmas = [
+            Turma.objects.create(
+                treinamento=treinamento,
+                nome=f'Turma {i}',
+                data_inicio=hoje,
+                data_fim=hoje + timedelta(days=10),
+                link_acesso='https://teste.com',
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta, RECURSOS_DERIVADOS_ATIVOS=False, RECURSOS_GC_CARENCIA=0)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def criar_recurso(self, indice: int, nome: str, conteudo: bytes) -> Recursos:
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recursos.objects.create(
+                turma=self.turmas[indice],
+                tipo_recurso='pdf',
+                recurso=SimpleUploadedFile(nome, conteudo),
+                nome_recurso=f'Recurso {indice}',
+                descricao_recurso='Descrição',
+            )
+
+    def envelhecer(self, recurso: Recursos) -> None:
+        ''' Volta o mtime do arquivo para antes da carência da coleta. '''
+        antigo = time.time() - 3600
+        os.utime(recurso.recurso.path, (antigo, antigo))
+
+    def test_arquivos_iguais_compartilham_o_arquivo(self):
+        primeiro = self.criar_recurso(0, 'a.pdf', b'conteudo')
+        segundo = self.criar_recurso(1, 'b.pdf', b'conteudo')
+        terceiro = self.criar_recurso(2, 'a.pdf', b'outro conteudo')
+
+        self.assertEqual(primeiro.recurso.name, segundo.recurso.name)
+        self.assertNotEqual(primeiro.recurso.name, terceiro.recurso.name)
+        self.assertEqual(len(os.listdir(os.path.dirname(primeiro.recurso.path))), 1)
+
+    def test_remocao_apaga_apenas_arquivo_sem_referencias(self):
+        primeiro = self.criar_recurso(0, 'a.pdf', b'conteudo')
+        segundo = self.criar_recurso(1, 'b.pdf', b'conteudo')
+        caminho = primeiro.recurso.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primeiro.delete()
+        self.assertTrue(os.path.exists(caminho))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segundo.delete()
+        self.assertFalse(os.path.exists(caminho))
+
+    def test_substituicao_apaga_arquivo_anterior(self):
+        recurso = self.criar_recurso(0, 'a.pdf', b'conteudo')
+        anterior = recurso.recurso.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recurso.recurso = SimpleUploadedFile('b.pdf', b'novo conteudo')
+            recurso.save()
+
+        self.assertFalse(os.path.exists(anterior))
+        self.assertTrue(os.path.exists(recurso.recurso.path))
+
+    @override_settings(RECURSOS_GC_CARENCIA=15 * 60)
+    def test_remocao_nao_apaga_arquivo_reaproveitado_por_upload_em_andamento(self):
+        recurso = self.criar_recurso(0, 'a.pdf', b'conteudo')
+        self.envelhecer(recurso)
+        storage = recurso.recurso.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recurso.delete()
+            # Upload idêntico reaproveita o arquivo antes da coleta, e o registro ainda não existe
+            name = storage.save('recursos/b.pdf', ContentFile(b'conteudo'))
+        self.assertTrue(storage.exists(name))
+
+        # Se o registro nunca for gravado, o arquivo é coletado depois da carência
+        os.utime(storage.path(name), (time.time() - 3600, time.time() - 3600))
+        call_command('coletar_arquivos_orfaos', stdout=StringIO())
+        self.assertFalse(storage.exists(name))
+
+    @override_settings(RECURSOS_GC_CARENCIA=15 * 60)
+    def test_coletar_arquivos_orfaos(self):
+        recurso = self.criar_recurso(0, 'a.pdf', b'conteudo')
+        self.envelhecer(recurso)
+        storage = recurso.recurso.storage
+        # Os derivados são gravados direto no disco, ao lado do original
+        derivado = recurso.recurso.name.replace('.pdf', '.capa.png')
+        with open(storage.path(derivado), 'wb') as arquivo:
+            arquivo.write(b'png')
+        os.utime(storage.path(derivado), (time.time() - 3600, time.time() - 3600))
+        orfao = recurso.recurso.name.replace(recurso.recurso.name.rsplit('/', 1)[1], 'orfao.pdf')
+        with open(storage.path(orfao), 'wb') as arquivo:
+            arquivo.write(b'orfao')
+        os.utime(storage.path(orfao), (time.time() - 3600, time.time() - 3600))
+        recente = storage.save('recursos/novo.pdf', ContentFile(b'recente'))
+
+        call_command('coletar_arquivos_orfaos', stdout=StringIO())
+
+        self.assertTrue(storage.exists(recurso.recurso.name))
+        self.assertTrue(storage.exists(derivado))
+        self.assertTrue(storage.exists(recente))
+        self.assertFalse(storage.exists(orfao))
+
+
+class GerarDerivadosTests(TestCase):
+    ''' Geração dos derivados pelo comando gerar_derivados, fora do pool de threads do servidor. '''
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(
+            MEDIA_ROOT=pasta, RECURSOS_DERIVADOS_ATIVOS=True, RECURSOS_DERIVADOS_EM_PROCESSO=False,
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        treinamento = Treinamento.objects.create(nome='Treinamento', descricao='Descrição')
+        self.turma = Turma.objects.create(
+            treinamento=treinamento,
+            nome='Turma',
+            data_inicio=date.today(),
+            data_fim=date.today() + timedelta(days=10),
+            link_acesso='https://teste.com',
+        )
+
+    def criar_recurso_zip(self) -> Recursos:
+        conteudo = BytesIO()
+        with zipfile.ZipFile(conteudo, 'w') as arquivo_zip:
+            arquivo_zip.writestr('leia-me.txt', 'texto')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            recurso = Recursos.objects.create(
+                turma=self.turma,
+                tipo_recurso='zip',
+                recurso=SimpleUploadedFile('pacote.zip', conteudo.getvalue()),
+                nome_recurso='Recurso',
+                descricao_recurso='Descrição',
+            )
+        # Fora do processo: nada é agendado no pool de threads
+        self.assertEqual(callbacks, [])
+        return recurso
+
+    def test_gera_derivados_pendentes(self):
+        recurso = self.criar_recurso_zip()
+        self.assertEqual(recurso.derivados, {})
+
+        saida = StringIO()
+        call_command('gerar_derivados', stdout=saida)
+
+        recurso.refresh_from_db()
+        self.assertEqual(list(recurso.derivados), ['manifesto'])
+        self.assertTrue(recurso.recurso.storage.exists(recurso.derivados['manifesto']))
+        self.assertIn('1 recurso(s) processado(s), 0 sem derivados', saida.getvalue())
+
+        # Sem pendências, a próxima execução não faz nada
+        saida = StringIO()
+        call_command('gerar_derivados', stdout=saida)
+        self.assertIn('0 recurso(s) processado(s)', saida.getvalue())
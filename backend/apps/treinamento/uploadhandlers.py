@@ -0,0 +1,33 @@
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class Sha256UploadMixin:
+    '''
+    Calcula o SHA-256 do arquivo enquanto os bytes chegam e o guarda em arquivo.sha256,
+    para que o ArmazenamentoPorConteudo não precise reler o arquivo ao salvá-lo.
+    '''
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # O handler em memória não ativado só repassa os bytes ao próximo handler, que faz o hash
+        if getattr(self, 'activated', True):
+            self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        arquivo = super().file_complete(file_size)
+        if arquivo is not None:
+            arquivo.sha256 = self.sha256.hexdigest()
+        return arquivo
+
+
+class Sha256MemoryFileUploadHandler(Sha256UploadMixin, MemoryFileUploadHandler):
+    ''' MemoryFileUploadHandler que calcula o SHA-256 durante o upload. '''
+
+
+class Sha256TemporaryFileUploadHandler(Sha256UploadMixin, TemporaryFileUploadHandler):
+    ''' TemporaryFileUploadHandler que calcula o SHA-256 durante o upload. '''
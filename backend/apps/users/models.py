@@ -7,10 +7,18 @@ class CustomUser(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     username = models.CharField(max_length=150, unique=False, blank=True, null=True)
     email = models.EmailField(unique=True)
+    # Usado na versão (ETag) das respostas da API, ver apps.api.etags
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Ordenação estável da paginação dos alunos (o id é um UUID aleatório)
+            models.Index(fields=['date_joined', 'id'], name='customuser_date_joined_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         self.first_name = self.username.title()
         super().save(*args, **kwargs)
@@ -18,6 +26,7 @@ class CustomUser(AbstractUser):
 class Aluno(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True)
     telefone = models.CharField(max_length=14)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.user.username
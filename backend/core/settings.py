@@ -111,6 +111,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# O padrão (memória local) vale por processo: com vários workers, use um backend compartilhado,
+# como django.core.cache.backends.filebased.FileBasedCache (LOCATION = diretório) ou
+# django.core.cache.backends.redis.RedisCache (LOCATION = redis://host:6379), para que a
+# invalidação feita por um worker valha para todos.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -141,16 +157,35 @@ SPECTACULAR_SETTINGS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.api.authentication.GrupoJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.api.pagination.PaginacaoPadrao',
     'PAGE_SIZE': 10,
 }
 
+# Maior page_size aceito nas listagens paginadas
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 500))
+
+# Segundos que o total de registros das listagens paginadas fica em cache
+API_COUNT_CACHE_TIMEOUT = int(os.getenv('API_COUNT_CACHE_TIMEOUT', 300))
+# Segundos que as respostas de leitura do catálogo (treinamentos e turmas) e os ETags ficam em cache; 0 desativa
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 300))
+
+# Quantidade de registros lidos do banco por vez nos endpoints em streaming
+API_STREAM_CHUNK_SIZE = int(os.getenv('API_STREAM_CHUNK_SIZE', 500))
+
+# Emails consultados e matrículas inseridas por query na matrícula em lote de alunos
+API_MATRICULA_BATCH_SIZE = int(os.getenv('API_MATRICULA_BATCH_SIZE', 500))
+
+# Lista de revogação de tokens (apps.api.authentication), guardada no cache. Com o LocMemCache
+# padrão a revogação só vale no worker que a registrou; com mais de um worker use um cache
+# compartilhado (CACHE_BACKEND), como avisa o "manage.py check --deploy"
+API_JWT_REVOGACAO = os.getenv('API_JWT_REVOGACAO', 'True') == 'True'
+
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 SESSION_COOKIE_HTTPONLY = True
@@ -163,6 +198,10 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_SAMESITE": "None",
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    # Chave própria dos tokens, compartilhada com o frontend (JWT_SIGNING_KEY) para que ele valide a assinatura localmente
+    "SIGNING_KEY": os.getenv('JWT_SIGNING_KEY', SECRET_KEY),
+    "TOKEN_OBTAIN_SERIALIZER": "apps.api.serializers.token_serializer.GrupoTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "apps.api.serializers.token_serializer.GrupoTokenRefreshSerializer",
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -206,6 +245,46 @@ MEDIA_URL = 'media/'
 
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Entrega dos downloads de recursos: vazio (o Django envia os bytes),
+# 'x-accel-redirect' (nginx) ou 'x-sendfile' (Apache/lighttpd)
+RECURSOS_SENDFILE = os.getenv('RECURSOS_SENDFILE') or None
+# Location interna do nginx que aponta para o MEDIA_ROOT, usada com X-Accel-Redirect
+RECURSOS_SENDFILE_PREFIXO = os.getenv('RECURSOS_SENDFILE_PREFIXO', '/protected-media/')
+RECURSOS_DOWNLOAD_CHUNK_SIZE = int(os.getenv('RECURSOS_DOWNLOAD_CHUNK_SIZE', 256 * 1024))
+# Arquivos de recursos gravados ou reaproveitados há menos que isso (em segundos) não são apagados
+# ao remover o recurso, pois um upload idêntico pode estar em andamento; o comando
+# coletar_arquivos_orfaos os remove depois
+RECURSOS_GC_CARENCIA = int(os.getenv('RECURSOS_GC_CARENCIA', 15 * 60))
+# Validade do índice de membros dos ZIPs no cache (a chave muda com o conteúdo do arquivo)
+RECURSOS_ZIP_INDICE_TIMEOUT = int(os.getenv('RECURSOS_ZIP_INDICE_TIMEOUT', 24 * 60 * 60))
+
+# Os handlers padrão do Django, calculando o SHA-256 usado pelo storage enquanto o arquivo chega
+FILE_UPLOAD_HANDLERS = [
+    'apps.treinamento.uploadhandlers.Sha256MemoryFileUploadHandler',
+    'apps.treinamento.uploadhandlers.Sha256TemporaryFileUploadHandler',
+]
+
+# Upload de recursos em partes: arquivos parciais ficam fora do MEDIA_ROOT até a finalização
+RECURSOS_UPLOAD_DIR = os.getenv('RECURSOS_UPLOAD_DIR', os.path.join(BASE_DIR, 'uploads'))
+RECURSOS_UPLOAD_MAX_SIZE = int(os.getenv('RECURSOS_UPLOAD_MAX_SIZE', 4 * 1024 ** 3))
+RECURSOS_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('RECURSOS_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 ** 2))
+# Uploads sem novos blocos por mais tempo que isso (em segundos) são descartados
+RECURSOS_UPLOAD_EXPIRACAO = int(os.getenv('RECURSOS_UPLOAD_EXPIRACAO', 24 * 60 * 60))
+
+# Derivados dos recursos (vídeo mais leve, capa do PDF, manifesto do ZIP), gerados em segundo plano
+RECURSOS_DERIVADOS_ATIVOS = os.getenv('RECURSOS_DERIVADOS_ATIVOS', 'True') == 'True'
+# Com True, cada worker do servidor gera os derivados em um pool de RECURSOS_DERIVADOS_WORKERS threads:
+# sem fila compartilhada, N workers fazem até N * RECURSOS_DERIVADOS_WORKERS conversões ao mesmo tempo,
+# e as que estiverem em andamento se perdem quando o worker reinicia. Com False, a geração fica só com
+# o comando gerar_derivados (agendado ou com --continuo), que também refaz as que se perderam
+RECURSOS_DERIVADOS_EM_PROCESSO = os.getenv('RECURSOS_DERIVADOS_EM_PROCESSO', 'True') == 'True'
+RECURSOS_DERIVADOS_WORKERS = int(os.getenv('RECURSOS_DERIVADOS_WORKERS', 2))
+RECURSOS_DERIVADOS_TIMEOUT = int(os.getenv('RECURSOS_DERIVADOS_TIMEOUT', 60 * 60))
+RECURSOS_FFMPEG = os.getenv('RECURSOS_FFMPEG', 'ffmpeg')
+RECURSOS_PDFTOPPM = os.getenv('RECURSOS_PDFTOPPM', 'pdftoppm')
+RECURSOS_VIDEO_ALTURA = int(os.getenv('RECURSOS_VIDEO_ALTURA', 480))
+RECURSOS_CAPA_TAMANHO = int(os.getenv('RECURSOS_CAPA_TAMANHO', 480))
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
@@ -2,7 +2,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
-from apps.api.views import HiddenTokenObtainPairView, HiddenTokenRefreshView
+from apps.api.views import HiddenTokenObtainPairView, HiddenTokenRefreshView, HiddenTokenVerifyView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 from apps.api.router import route
@@ -15,6 +15,7 @@ urlpatterns = [
 
     path('api/token/', HiddenTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', HiddenTokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/verify/', HiddenTokenVerifyView.as_view(), name='token_verify'),
 
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
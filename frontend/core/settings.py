@@ -138,6 +138,40 @@ MEDIA_URL = 'media/'
 
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Tamanho dos blocos repassados ao navegador no download de recursos
+RECURSO_PROXY_CHUNK_SIZE = int(os.getenv('RECURSO_PROXY_CHUNK_SIZE', 256 * 1024))
+# Upload de recursos em partes para a API: tamanho de cada bloco e tentativas por bloco
+RECURSO_UPLOAD_CHUNK_SIZE = int(os.getenv('RECURSO_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+RECURSO_UPLOAD_TENTATIVAS = int(os.getenv('RECURSO_UPLOAD_TENTATIVAS', 3))
+
+# Cliente HTTP da API: pool de conexões keep-alive por worker, timeouts (em segundos) e novas tentativas.
+# API_HTTP_POOL_MAXSIZE deve acompanhar o número de threads do worker (gunicorn --threads)
+API_HTTP_POOL_CONNECTIONS = int(os.getenv('API_HTTP_POOL_CONNECTIONS', 4))
+API_HTTP_POOL_MAXSIZE = int(os.getenv('API_HTTP_POOL_MAXSIZE', 10))
+API_HTTP_CONNECT_TIMEOUT = float(os.getenv('API_HTTP_CONNECT_TIMEOUT', 3.05))
+API_HTTP_READ_TIMEOUT = float(os.getenv('API_HTTP_READ_TIMEOUT', 30))
+API_HTTP_RETRIES = int(os.getenv('API_HTTP_RETRIES', 2))
+API_HTTP_BACKOFF_FACTOR = float(os.getenv('API_HTTP_BACKOFF_FACTOR', 0.3))
+
+# Tempo (em segundos) que o perfil do usuário (/me/) fica em cache entre páginas; 0 desativa
+USER_DATA_CACHE_TIMEOUT = int(os.getenv('USER_DATA_CACHE_TIMEOUT', 0))
+# Threads por worker para as chamadas paralelas à API; mantenha API_HTTP_POOL_MAXSIZE maior ou igual
+API_PARALLEL_WORKERS = int(os.getenv('API_PARALLEL_WORKERS', 8))
+# Tempo (em segundos) que o ETag e o corpo das respostas da API ficam guardados por usuário
+# para os GETs condicionais (304); 0 desativa
+API_ETAG_CACHE_TIMEOUT = int(os.getenv('API_ETAG_CACHE_TIMEOUT', 60 * 60))
+# Pool do cliente assíncrono (views ASGI): conexões simultâneas por worker e quantas ficam abertas
+API_ASYNC_MAX_CONNECTIONS = int(os.getenv('API_ASYNC_MAX_CONNECTIONS', 200))
+API_ASYNC_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('API_ASYNC_MAX_KEEPALIVE_CONNECTIONS', 50))
+
+# Validação local do access token: mesma chave do SIMPLE_JWT["SIGNING_KEY"] do backend.
+# Sem JWT_SIGNING_KEY a assinatura é conferida em /token/verify/ da API (uma chamada por token)
+JWT_SIGNING_KEY = os.getenv('JWT_SIGNING_KEY')
+JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
+# Segundos antes da expiração em que o access token já é renovado
+JWT_REFRESH_AHEAD = int(os.getenv('JWT_REFRESH_AHEAD', 60))
+
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.security)
+def check_jwt_signing_key(app_configs, **kwargs):
+    """
+    Sem JWT_SIGNING_KEY o frontend não confere a assinatura dos tokens localmente:
+    cada novo access token é conferido na API, o que custa uma chamada a mais (e,
+    nas views assíncronas, bloqueia o event loop durante essa chamada).
+    """
+    if settings.JWT_SIGNING_KEY:
+        return []
+    return [
+        Warning(
+            "JWT_SIGNING_KEY não definida: a assinatura dos tokens será conferida na API a cada novo token.",
+            hint='Use a mesma chave do SIMPLE_JWT["SIGNING_KEY"] do backend.',
+            id="frontend.W001",
+        )
+    ]
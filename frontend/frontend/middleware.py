@@ -1,55 +1,107 @@
 import jwt
-import requests
-from datetime import datetime, timezone
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
-from .services.base_service import TOKEN_SERVICE  # seu serviço que chama a API
-from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from .services.base_service import API_SERVICE, ASYNC_API_SERVICE, TOKEN_SERVICE  # seu serviço que chama a API
+from .services.token_service import (SessaoExpirada, aplica_novo_access_token, decodificar_access_token,
+                                     precisa_renovar, segundos_para_expirar)
 
 class JWTAuthenticationMiddleware:
     """
     Middleware que garante que o request tenha um JWT válido.
     Atualiza o access_token se necessário e adiciona request.user_data
+
+    A assinatura do token é conferida localmente (JWT_SIGNING_KEY) e o token é renovado
+    JWT_REFRESH_AHEAD segundos antes de expirar; requisições simultâneas com o mesmo
+    refresh token compartilham uma única chamada a /token/refresh/.
+
+    Funciona nos dois modos: no ASGI, com views assíncronas, o refresh usa o
+    cliente assíncrono e não bloqueia o event loop.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def token_expirado(self, payload):
+        return segundos_para_expirar(payload) <= 0
+
+    def aplica_novo_token(self, request, new_tokens):
+        # Atualiza o cookie na resposta
+        aplica_novo_access_token(request, new_tokens["access"])
+
+    def process_exception(self, request, exception):
+        # A API recusou o token (ex.: revogado) e o refresh também falhou
+        if isinstance(exception, SessaoExpirada):
+            return redirect("login")
+        return None
+
+    def prepara_request(self, request):
+        # Perfil do usuário (/me/): buscado no primeiro acesso e reaproveitado pelos mixins da requisição.
+        # As views assíncronas usam ASYNC_API_SERVICE.get_user_data no lugar
+        request.user_data = SimpleLazyObject(lambda: API_SERVICE.get_user_data(request))
+
+    def atualiza_cookie(self, request, response):
+        # Atualiza o cookie se houve refresh
+        if hasattr(request, "_new_access_token"):
+            response.set_cookie(
+                "access_token",
+                request._new_access_token,
+                httponly=True,
+            )
+
+        return response
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         access_token = request.COOKIES.get("access_token")
         refresh_token = request.COOKIES.get("refresh_token")
 
         if access_token:
             try:
-                # Decodifica sem validar assinatura
-                decoded = jwt.decode(access_token, options={"verify_signature": False})
-                exp_timestamp = decoded.get("exp")
-                expiration = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-                if expiration < datetime.now(timezone.utc):
-                    # Token expirado → tenta refresh
-                    if refresh_token:
-                        new_tokens = TOKEN_SERVICE.refresh_jwt_token(refresh_token)
-                        if new_tokens:
-                            access_token = new_tokens["access"]
-
-                            request.COOKIES["access_token"] = access_token
-                            # Atualiza o cookie na resposta
-                            request._new_access_token = access_token
-                        else:
-                            return redirect("login")
-                    else:
-                        return redirect("login")
-            except (jwt.ExpiredSignatureError, jwt.DecodeError):
+                payload = decodificar_access_token(access_token)
+            except jwt.InvalidTokenError:
                 return redirect("login")
 
+            if precisa_renovar(payload):
+                # Token expirado ou perto de expirar → tenta refresh
+                new_tokens = TOKEN_SERVICE.renovar_tokens(refresh_token) if refresh_token else None
+                if new_tokens:
+                    self.aplica_novo_token(request, new_tokens)
+                elif self.token_expirado(payload):
+                    return redirect("login")
+
+        self.prepara_request(request)
+
         # Processa a view
         response = self.get_response(request)
+        return self.atualiza_cookie(request, response)
 
-        # Atualiza o cookie se houve refresh
-        if hasattr(request, "_new_access_token"):
-            response.set_cookie(
-                "access_token",
-                request._new_access_token,
-                httponly=True,
-            )
+    async def __acall__(self, request):
+        access_token = request.COOKIES.get("access_token")
+        refresh_token = request.COOKIES.get("refresh_token")
+
+        if access_token:
+            try:
+                payload = decodificar_access_token(access_token)
+            except jwt.InvalidTokenError:
+                return redirect("login")
+
+            if precisa_renovar(payload):
+                # Token expirado ou perto de expirar → tenta refresh
+                new_tokens = await ASYNC_API_SERVICE.renovar_tokens(refresh_token, request=request) if refresh_token else None
+                if new_tokens:
+                    self.aplica_novo_token(request, new_tokens)
+                elif self.token_expirado(payload):
+                    return redirect("login")
 
-        return response
\ No newline at end of file
+        self.prepara_request(request)
+
+        # Processa a view
+        response = await self.get_response(request)
+        return self.atualiza_cookie(request, response)
@@ -1,11 +1,66 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
 import requests
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import redirect
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-from frontend.services.token_service import TokenService
+from frontend.services.http_client import HTTP_CLIENT
+from frontend.services.token_service import (SessaoExpirada, TokenService, aplica_novo_access_token,
+                                             decodificar_access_token)
+
+# Threads que fazem as chamadas independentes de uma página em paralelo (ver APIService.submit_many)
+EXECUTOR = ThreadPoolExecutor(max_workers=settings.API_PARALLEL_WORKERS, thread_name_prefix="api")
+
+def get_chave_user_data(request):
+    """
+    Chave de cache do perfil do usuário. O hash do token inteiro (que inclui o jti), e não
+    só o jti, impede que um token forjado leia o perfil de outro usuário.
+    """
+    access_token = request.COOKIES.get("access_token", "")
+    return "me:" + hashlib.sha256(access_token.encode()).hexdigest()
+
+
+def get_chave_validador(request, url):
+    """
+    Chave do cache de validadores (ETag + corpo) da URL para o usuário do access token,
+    ou None se o token não puder ser lido. É por usuário, e não por token, para sobreviver
+    aos refreshes; só é usada quando a API valida o token e responde 304.
+    """
+    if not settings.API_ETAG_CACHE_TIMEOUT:
+        return None
+    try:
+        user_id = decodificar_access_token(request.COOKIES.get("access_token", "")).get("user_id")
+    except jwt.InvalidTokenError:
+        return None
+    if not user_id:
+        return None
+    return f"etag:{user_id}:" + hashlib.sha256(url.encode()).hexdigest()
+
+
+def aplica_validador(response, chave, validador):
+    """
+    Completa a resposta com o corpo guardado quando a API responde 304 e guarda
+    o ETag e o corpo das respostas 200. Retorna a resposta pronta para .json().
+    """
+    if response.status_code == 304 and validador:
+        response.status_code = 200
+        response._content = validador["conteudo"]
+        return response
+
+    etag = response.headers.get("ETag")
+    if response.status_code == 200 and etag:
+        cache.set(chave, {"etag": etag, "conteudo": response.content}, settings.API_ETAG_CACHE_TIMEOUT)
+    return response
+
 
 class APIService:
     
@@ -21,11 +76,29 @@ class APIService:
             return redirect("login")
         return {"Authorization": f"Bearer {access_token}"}
 
-    def get_data(self, request, endpoint, page=None, stream=False):
-        headers = self.get_headers(request)
+    def renovar_access_token(self, request):
+        """
+        Renova o access token recusado pela API (401), por exemplo revogado após uma
+        mudança de grupo. Sem refresh válido, a sessão acabou: levanta SessaoExpirada.
+        """
+        refresh_token = request.COOKIES.get("refresh_token")
+        token_rejeitado = request.COOKIES.get("access_token")
+        tokens = self.token_service.renovar_tokens(refresh_token, token_rejeitado) if refresh_token else None
+        if not tokens:
+            raise SessaoExpirada()
+        aplica_novo_access_token(request, tokens["access"])
+
+    def get_data(self, request, endpoint, page=None, stream=False, extra_headers=None):
         if page:
             endpoint = f'{endpoint}?page={page}'
-        response = requests.get(f"{self.BASE_URL}/{endpoint}", headers=headers, stream=stream)
+        url = f"{self.BASE_URL}/{endpoint}"
+
+        response = self.get_condicional(request, url, stream, extra_headers)
+        if response.status_code == 401:
+            # Token recusado antes do exp: renova e tenta de novo uma única vez
+            response.close()
+            self.renovar_access_token(request)
+            response = self.get_condicional(request, url, stream, extra_headers)
 
         
         if response.status_code in (200, 201):
@@ -37,15 +110,171 @@ class APIService:
                 print("Erro do backend:", response.text)
             response.raise_for_status()
 
+    def get_condicional(self, request, url, stream=False, extra_headers=None):
+        """
+        GET condicional: envia o ETag da última resposta e reaproveita o corpo se vier 304.
+        """
+        headers = self.get_headers(request)
+        if extra_headers:
+            headers = {**headers, **extra_headers}
+
+        chave = None if stream else get_chave_validador(request, url)
+        validador = cache.get(chave) if chave else None
+        if validador:
+            headers = {**headers, "If-None-Match": validador["etag"]}
+        response = HTTP_CLIENT.get(url, headers=headers, stream=stream)
+        if chave:
+            response = aplica_validador(response, chave, validador)
+        return response
+
+    def submit_data(self, request, endpoint):
+        """
+        Inicia um GET em segundo plano e retorna um Future com o JSON da resposta.
+        """
+        return EXECUTOR.submit(lambda: self.get_data(request, endpoint).json())
+
+    def submit_many(self, request, endpoints):
+        """
+        Inicia GETs independentes em paralelo; retorna {endpoint: Future}.
+        """
+        return {endpoint: self.submit_data(request, endpoint) for endpoint in endpoints}
+
+    def get_many(self, request, endpoints):
+        """
+        Busca vários endpoints em paralelo: a latência total é a da chamada mais lenta, não a soma.
+        """
+        futures = self.submit_many(request, endpoints)
+        return {endpoint: future.result() for endpoint, future in futures.items()}
+
+    def prefetch_user_data(self, request):
+        """
+        Inicia a busca do perfil do usuário em segundo plano, uma única vez por requisição.
+        """
+        if not hasattr(request, "_user_data_future"):
+            request._user_data_future = EXECUTOR.submit(self.load_user_data, request)
+
+    def get_user_data(self, request):
+        """
+        Perfil do usuário autenticado, aguardando a busca iniciada por prefetch_user_data.
+        """
+        self.prefetch_user_data(request)
+        return request._user_data_future.result()
+
+    def load_user_data(self, request):
+        """
+        Busca o perfil do usuário autenticado (/me/). Com USER_DATA_CACHE_TIMEOUT > 0, o perfil
+        fica em cache pelo hash do access token (que inclui o jti), evitando a chamada entre páginas.
+        """
+        timeout = settings.USER_DATA_CACHE_TIMEOUT
+        if not timeout:
+            return self.get_data(request, "me/").json()
+
+        chave = get_chave_user_data(request)
+        user = cache.get(chave)
+        if user is None:
+            user = self.get_data(request, "me/").json()
+            cache.set(chave, user, timeout)
+        return user
+
+    def get_stream(self, request, endpoint, extra_headers=None):
+        """
+        Abre uma resposta em streaming da API sem validar o status,
+        para ser repassada ao navegador como está.
+        """
+        headers = {**self.get_headers(request), **(extra_headers or {})}
+        return HTTP_CLIENT.get(f"{self.BASE_URL}/{endpoint}", headers=headers, stream=True)
+
+    def iter_json_lines(self, request, endpoint):
+        """
+        Itera sobre os objetos de um endpoint em NDJSON à medida que chegam,
+        sem carregar o corpo inteiro da resposta em memória.
+        A conexão só volta ao pool quando o iterador termina ou é fechado (close()):
+        use contextlib.closing se ele puder ser abandonado antes do fim.
+        """
+        response = self.get_data(request, endpoint, stream=True, extra_headers={"Accept": "application/x-ndjson"})
+        try:
+            for linha in response.iter_lines(chunk_size=64 * 1024):
+                if linha:
+                    yield json.loads(linha)
+        finally:
+            response.close()
+
     def post_data(self, request, endpoint, data):
         headers = self.get_headers(request)
-        response = requests.post(f"{self.BASE_URL}/{endpoint}", json=data, headers=headers)
+        response = HTTP_CLIENT.post(f"{self.BASE_URL}/{endpoint}", json=data, headers=headers)
+        if response.status_code == 401:
+            # Mesmo tratamento do get_data para um token recusado antes do exp
+            self.renovar_access_token(request)
+            response = HTTP_CLIENT.post(f"{self.BASE_URL}/{endpoint}", json=data, headers=self.get_headers(request))
         return response
 
     def post_media_data(self, request, endpoint, data, file):
+        """
+        Envia o arquivo em blocos pelo upload retomável da API e cria o recurso ao final.
+        O arquivo é lido bloco a bloco de request.FILES, sem ser carregado inteiro em memória.
+        """
         headers = self.get_headers(request)
-        files = {"recurso": (file.name, file.read(), file.content_type)}
-        response = requests.post(f"{self.BASE_URL}/{endpoint}", data=data, files=files, headers=headers)
+        response = HTTP_CLIENT.post(
+            f"{self.BASE_URL}/{endpoint}uploads/",
+            json={"filename": file.name, "tamanho": file.size},
+            headers=headers,
+        )
+        if response.status_code != 201:
+            return self.valida_resposta(response)
+
+        upload_url = f"{self.BASE_URL}/{endpoint}uploads/{response.json()['upload_id']}/"
+        offset = 0
+        for bloco in file.chunks(settings.RECURSO_UPLOAD_CHUNK_SIZE):
+            offset = self.put_upload_chunk(upload_url, headers, offset, bloco)
+
+        response = HTTP_CLIENT.post(f"{upload_url}finalizar/", data=data, headers=headers)
+        return self.valida_resposta(response)
+
+    def get_upload_offset(self, upload_url, headers):
+        """
+        Consulta quantos bytes do upload a API já recebeu.
+        """
+        response = HTTP_CLIENT.get(upload_url, headers=headers)
+        response.raise_for_status()
+        return int(response.headers["Upload-Offset"])
+
+    def put_upload_chunk(self, upload_url, headers, offset, bloco):
+        """
+        Envia um bloco do upload a partir de offset, retomando de onde a API parou
+        em caso de falha de conexão. Retorna o offset ao final do bloco.
+        """
+        fim = offset + len(bloco)
+        enviado = offset
+        for tentativa in range(settings.RECURSO_UPLOAD_TENTATIVAS):
+            try:
+                response = HTTP_CLIENT.put(
+                    upload_url,
+                    data=bloco[enviado - offset:],
+                    headers={
+                        **headers,
+                        "Content-Type": "application/offset+octet-stream",
+                        "Upload-Offset": str(enviado),
+                    },
+                )
+                if response.status_code == 200:
+                    return int(response.headers["Upload-Offset"])
+                if response.status_code != 409:
+                    response.raise_for_status()
+                if "Retry-After" in response.headers:
+                    # Outro PUT deste upload ainda está gravando na API
+                    time.sleep(2 ** tentativa)
+            except (requests.ConnectionError, requests.Timeout):
+                time.sleep(2 ** tentativa)
+
+            # 409 ou falha de rede: parte do bloco pode ter chegado, então retoma pelo offset da API
+            enviado = self.get_upload_offset(upload_url, headers)
+            if enviado == fim:
+                return fim
+            if not offset <= enviado < fim:
+                raise requests.HTTPError(f"Offset inesperado no upload: {enviado}")
+        raise requests.HTTPError("Não foi possível enviar o bloco do upload.")
+
+    def valida_resposta(self, response):
         if response.status_code in (200, 201):
             return response
         else:
@@ -53,4 +282,4 @@ class APIService:
                 print("Erro do backend:", response.json())
             except Exception:
                 print("Erro do backend:", response.text)
-            response.raise_for_status()
\ No newline at end of file
+            response.raise_for_status()
@@ -0,0 +1,180 @@
+import asyncio
+import weakref
+from functools import partial
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+from frontend.services.api_service import get_chave_user_data, get_chave_validador
+from frontend.services.token_service import REFRESH_COMPARTILHADO, SessaoExpirada, aplica_novo_access_token
+
+
+class AsyncAPIService:
+    """
+    Versão assíncrona do APIService para as views servidas via ASGI (uvicorn): enquanto
+    aguarda a API, o worker continua atendendo outras requisições em vez de bloquear uma thread.
+    """
+
+    BASE_URL = str(os.getenv("API_URL", "http://localhost:8000/api/"))
+    # O httpx não compartilha conexões entre event loops, então há um cliente por loop.
+    # Só vale para o ASGI, em que o loop do worker dura o processo inteiro
+    _clients = weakref.WeakKeyDictionary()
+
+    def criar_cliente(self):
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.API_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.API_ASYNC_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            # Refaz apenas falhas de conexão, como o HTTPClient síncrono
+            retries=settings.API_HTTP_RETRIES,
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(settings.API_HTTP_READ_TIMEOUT, connect=settings.API_HTTP_CONNECT_TIMEOUT),
+        )
+
+    def get_client(self, request=None):
+        """
+        Retorna o cliente com pool de conexões keep-alive do event loop atual.
+
+        Fora do ASGI (runserver, gunicorn WSGI) o Django executa cada view assíncrona
+        num event loop novo; aí o cliente é da requisição e é fechado por fechar_cliente
+        no fim da view, em vez de ficar com os sockets abertos.
+        """
+        if request is not None and not isinstance(request, ASGIRequest):
+            client = getattr(request, "_async_api_client", None)
+            if client is None:
+                client = request._async_api_client = self.criar_cliente()
+            return client
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self.criar_cliente()
+        return client
+
+    async def fechar_cliente(self, request):
+        """
+        Fecha o cliente criado para a requisição fora do ASGI, se houver.
+        """
+        client = request.__dict__.pop("_async_api_client", None)
+        if client is not None:
+            await client.aclose()
+
+    def get_headers(self, request):
+        access_token = request.COOKIES.get("access_token")
+        return {"Authorization": f"Bearer {access_token}"}
+
+    async def get_data(self, request, endpoint, extra_headers=None):
+        url = f"{self.BASE_URL}/{endpoint}"
+        response = await self.get_condicional(request, url, extra_headers)
+        if response.status_code == 401:
+            # Token recusado antes do exp: renova e tenta de novo uma única vez
+            await self.renovar_access_token(request)
+            response = await self.get_condicional(request, url, extra_headers)
+
+        if response.status_code in (200, 201):
+            return response
+        else:
+            try:
+                print("Erro do backend:", response.json())
+            except Exception:
+                print("Erro do backend:", response.text)
+            response.raise_for_status()
+
+    async def get_condicional(self, request, url, extra_headers=None):
+        """
+        GET condicional, com o mesmo cache de validadores do APIService.
+        """
+        headers = {**self.get_headers(request), **(extra_headers or {})}
+        chave = get_chave_validador(request, url)
+        validador = await cache.aget(chave) if chave else None
+        if validador:
+            headers["If-None-Match"] = validador["etag"]
+        response = await self.get_client(request).get(url, headers=headers)
+        if chave:
+            response = await self.aplica_validador(response, chave, validador)
+        return response
+
+    async def renovar_access_token(self, request):
+        """
+        Versão assíncrona de APIService.renovar_access_token.
+        """
+        refresh_token = request.COOKIES.get("refresh_token")
+        token_rejeitado = request.COOKIES.get("access_token")
+        tokens = await self.renovar_tokens(refresh_token, token_rejeitado, request) if refresh_token else None
+        if not tokens:
+            raise SessaoExpirada()
+        aplica_novo_access_token(request, tokens["access"])
+
+    async def aplica_validador(self, response, chave, validador):
+        """
+        Versão assíncrona de api_service.aplica_validador para respostas do httpx.
+        """
+        if response.status_code == 304 and validador:
+            return httpx.Response(
+                200,
+                content=validador["conteudo"],
+                headers={"Content-Type": "application/json", "ETag": validador["etag"]},
+                request=response.request,
+            )
+
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            await cache.aset(chave, {"etag": etag, "conteudo": response.content}, settings.API_ETAG_CACHE_TIMEOUT)
+        return response
+
+    async def get_json(self, request, endpoint):
+        response = await self.get_data(request, endpoint)
+        return response.json()
+
+    async def get_many(self, request, endpoints):
+        """
+        Busca vários endpoints ao mesmo tempo; retorna {endpoint: JSON}.
+        """
+        resultados = await asyncio.gather(*(self.get_json(request, endpoint) for endpoint in endpoints))
+        return dict(zip(endpoints, resultados))
+
+    def get_user_data(self, request):
+        """
+        Perfil do usuário autenticado (/me/), buscado uma única vez por requisição.
+        Retorna uma task, que pode ser aguardada por mais de um mixin.
+        """
+        if not hasattr(request, "_user_data_task"):
+            request._user_data_task = asyncio.ensure_future(self.load_user_data(request))
+        return request._user_data_task
+
+    async def load_user_data(self, request):
+        """
+        Busca o perfil do usuário, usando o mesmo cache por hash do access token do APIService.
+        """
+        timeout = settings.USER_DATA_CACHE_TIMEOUT
+        if not timeout:
+            return await self.get_json(request, "me/")
+
+        chave = get_chave_user_data(request)
+        user = await cache.aget(chave)
+        if user is None:
+            user = await self.get_json(request, "me/")
+            await cache.aset(chave, user, timeout)
+        return user
+
+    async def refresh_jwt_token(self, refresh_token, request=None):
+        response = await self.get_client(request).post(f"{self.BASE_URL}/token/refresh/", data={"refresh": refresh_token})
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+    async def renovar_tokens(self, refresh_token, token_rejeitado=None, request=None):
+        """
+        refresh_jwt_token com uma única chamada à API por refresh token entre as requisições do event loop.
+        """
+        refresh = partial(self.refresh_jwt_token, request=request)
+        return await REFRESH_COMPARTILHADO.arenovar(refresh_token, refresh, token_rejeitado)
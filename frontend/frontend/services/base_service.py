@@ -1,7 +1,9 @@
 
 from .api_service import APIService
+from .async_api_service import AsyncAPIService
 from .token_service import TokenService
 
 
 TOKEN_SERVICE = TokenService()
-API_SERVICE = APIService()
\ No newline at end of file
+API_SERVICE = APIService()
+ASYNC_API_SERVICE = AsyncAPIService()
\ No newline at end of file
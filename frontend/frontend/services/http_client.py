@@ -0,0 +1,62 @@
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HTTPClient(requests.Session):
+    """
+    Sessão HTTP compartilhada com a API: mantém as conexões abertas (keep-alive) em um pool,
+    aplica timeout padrão e refaz requisições idempotentes quando a API falha temporariamente.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # A sessão atende todos os usuários: nenhum cookie da API pode ser guardado entre requisições
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        retry = Retry(
+            total=settings.API_HTTP_RETRIES,
+            backoff_factor=settings.API_HTTP_BACKOFF_FACTOR,
+            status_forcelist=(502, 503, 504),
+            # Respostas de erro são tratadas pelos services, não pelo urllib3
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=settings.API_HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.API_HTTP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        self.mount("http://", self.adapter)
+        self.mount("https://", self.adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (settings.API_HTTP_CONNECT_TIMEOUT, settings.API_HTTP_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+    def get_estatisticas(self):
+        """
+        Uso do pool por host neste processo. "reaproveitadas" são as requisições
+        que usaram uma conexão já aberta; muitas "conexoes_abertas" em relação
+        às requisições indicam um pool pequeno para a concorrência do worker.
+        """
+        pools = self.adapter.poolmanager.pools
+        estatisticas = []
+        for chave in pools.keys():
+            pool = pools[chave]
+            if pool is None:
+                continue
+            estatisticas.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "requisicoes": pool.num_requests,
+                "conexoes_abertas": pool.num_connections,
+                "reaproveitadas": pool.num_requests - pool.num_connections,
+                "ociosas": sum(1 for conexao in list(pool.pool.queue) if conexao is not None) if pool.pool else 0,
+                "tamanho_pool": settings.API_HTTP_POOL_MAXSIZE,
+            })
+        return estatisticas
+
+
+HTTP_CLIENT = HTTPClient()
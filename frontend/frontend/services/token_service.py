@@ -1,15 +1,193 @@
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+import jwt
 import requests
+from django.conf import settings
+from django.core.cache import cache
 from dotenv import load_dotenv
 import os
 
+from frontend.services.http_client import HTTP_CLIENT
+
 load_dotenv()
 
+
+class SessaoExpirada(Exception):
+    """
+    A API recusou o access token e não foi possível renová-lo: o usuário precisa entrar de novo.
+    Convertida em redirect para o login pelo JWTAuthenticationMiddleware.
+    """
+
+
+def decodificar_access_token(access_token) -> dict:
+    """
+    Decodifica o access token conferindo a assinatura com a chave local (JWT_SIGNING_KEY),
+    sem consultar o backend. A expiração não é validada aqui: o middleware usa o "exp"
+    para renovar o token antes que ele expire.
+    Sem a chave, a assinatura é conferida pela API (verificar_na_api).
+    Levanta jwt.InvalidTokenError se o token for inválido.
+    """
+    if settings.JWT_SIGNING_KEY:
+        payload = jwt.decode(
+            access_token,
+            settings.JWT_SIGNING_KEY,
+            algorithms=[settings.JWT_ALGORITHM],
+            options={"verify_exp": False, "require": ["exp"]},
+        )
+    else:
+        payload = jwt.decode(access_token, options={"verify_signature": False, "require": ["exp"]})
+        # Um token expirado só serve para pedir o refresh, que a API valida
+        if segundos_para_expirar(payload) > 0:
+            verificar_na_api(access_token, payload)
+
+    # Um refresh token assinado com a mesma chave não serve como access token
+    if payload.get("token_type", "access") != "access":
+        raise jwt.InvalidTokenError("O token informado não é um access token")
+    return payload
+
+
+def verificar_na_api(access_token, payload):
+    """
+    Confere a assinatura do token em /token/verify/ quando o frontend não tem a JWT_SIGNING_KEY.
+    O resultado fica em cache até o token expirar, então cada token é conferido uma vez.
+    Se a API recusar o token ou não responder, o token não é aceito.
+    """
+    chave = "jwt-verificado:" + hashlib.sha256(access_token.encode()).hexdigest()
+    if cache.get(chave):
+        return
+
+    try:
+        response = HTTP_CLIENT.post(f"{TokenService.BASE_URL}/token/verify/", data={"token": access_token})
+    except requests.RequestException as erro:
+        raise jwt.InvalidTokenError("Não foi possível conferir o token na API") from erro
+    if response.status_code != 200:
+        raise jwt.InvalidTokenError("Token recusado pela API")
+
+    cache.set(chave, True, timeout=max(1, int(segundos_para_expirar(payload))))
+
+
+def segundos_para_expirar(payload) -> float:
+    return payload["exp"] - time.time()
+
+
+def precisa_renovar(payload) -> bool:
+    return segundos_para_expirar(payload) <= settings.JWT_REFRESH_AHEAD
+
+
+class RefreshCompartilhado:
+    """
+    Garante um único /token/refresh/ por refresh token em cada processo: quando várias
+    requisições (abas, páginas abertas juntas) precisam renovar o mesmo token, a primeira
+    chama a API e as demais aguardam o resultado. Os tokens renovados ficam guardados
+    enquanto não precisarem de nova renovação, para as requisições que ainda chegam com o cookie antigo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        # Tasks do asyncio pertencem a um event loop: um dicionário de refreshes por loop
+        self._tarefas = weakref.WeakKeyDictionary()
+        self._recentes = {}
+
+    def get_chave(self, refresh_token):
+        return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    def get_recente(self, chave, token_rejeitado=None):
+        with self._lock:
+            item = self._recentes.get(chave)
+        if item and item[1] - time.time() > settings.JWT_REFRESH_AHEAD and item[0]["access"] != token_rejeitado:
+            return item[0]
+        return None
+
+    def guardar(self, chave, tokens):
+        if not tokens:
+            return
+        try:
+            exp = decodificar_access_token(tokens["access"])["exp"]
+        except (KeyError, jwt.InvalidTokenError):
+            return
+
+        agora = time.time()
+        with self._lock:
+            for outra_chave, (_, outro_exp) in list(self._recentes.items()):
+                if outro_exp <= agora:
+                    del self._recentes[outra_chave]
+            self._recentes[chave] = (tokens, exp)
+
+    def renovar(self, refresh_token, refresh, token_rejeitado=None):
+        """
+        Renova os tokens com a função síncrona `refresh`, compartilhando a chamada entre as threads.
+        token_rejeitado: access token recusado pela API, que não pode ser reaproveitado.
+        """
+        chave = self.get_chave(refresh_token)
+        tokens = self.get_recente(chave, token_rejeitado)
+        if tokens:
+            return tokens
+
+        with self._lock:
+            future = self._em_andamento.get(chave)
+            responsavel = future is None
+            if responsavel:
+                future = Future()
+                self._em_andamento[chave] = future
+        if not responsavel:
+            return future.result()
+
+        try:
+            tokens = refresh(refresh_token)
+            self.guardar(chave, tokens)
+            future.set_result(tokens)
+        except Exception as erro:
+            future.set_exception(erro)
+            raise
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+        return tokens
+
+    async def arenovar(self, refresh_token, refresh, token_rejeitado=None):
+        """
+        Versão assíncrona de renovar: `refresh` é uma corrotina, compartilhada entre as
+        requisições do mesmo event loop.
+        """
+        chave = self.get_chave(refresh_token)
+        tokens = self.get_recente(chave, token_rejeitado)
+        if tokens:
+            return tokens
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tarefas = self._tarefas.setdefault(loop, {})
+        tarefa = tarefas.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._arenovar(chave, refresh_token, refresh, tarefas))
+            tarefas[chave] = tarefa
+        # Uma requisição cancelada não cancela o refresh aguardado pelas outras
+        return await asyncio.shield(tarefa)
+
+    async def _arenovar(self, chave, refresh_token, refresh, tarefas):
+        try:
+            tokens = await refresh(refresh_token)
+            self.guardar(chave, tokens)
+            return tokens
+        finally:
+            tarefas.pop(chave, None)
+
+
+REFRESH_COMPARTILHADO = RefreshCompartilhado()
+
+
 class TokenService:
 
     BASE_URL = str(os.getenv("API_URL", "http://localhost:8000/api/"))
 
     def get_tokens(self, email: str, password: str) -> dict:
-        response = requests.post(f"{self.BASE_URL}/token/", data={"email": email, "password": password})
+        response = HTTP_CLIENT.post(f"{self.BASE_URL}/token/", data={"email": email, "password": password})
         if response.status_code == 401:
             return '401'
         if response.status_code == 200:
@@ -19,7 +197,21 @@ class TokenService:
             response.raise_for_status()
 
     def refresh_jwt_token(self, refresh_token) -> dict:
-        response = requests.post(f"{self.BASE_URL}/token/refresh/", data={"refresh": refresh_token})
+        response = HTTP_CLIENT.post(f"{self.BASE_URL}/token/refresh/", data={"refresh": refresh_token})
         if response.status_code == 200:
             return response.json()
-        return None
\ No newline at end of file
+        return None
+
+    def renovar_tokens(self, refresh_token, token_rejeitado=None) -> dict:
+        """
+        refresh_jwt_token com uma única chamada à API por refresh token, mesmo com requisições simultâneas.
+        """
+        return REFRESH_COMPARTILHADO.renovar(refresh_token, self.refresh_jwt_token, token_rejeitado)
+
+
+def aplica_novo_access_token(request, access_token):
+    """
+    Passa a usar o novo access token no restante da requisição; o middleware o grava no cookie da resposta.
+    """
+    request.COOKIES["access_token"] = access_token
+    request._new_access_token = access_token
@@ -1,3 +1,445 @@
-from django.test import TestCase
+import email
+import http.client
+import io
+import json
+import asyncio
+import threading
+import time
+import uuid
+from types import SimpleNamespace
 
-# Create your tests here.
+import httpx
+import jwt
+import requests
+from django.core.cache import cache
+from unittest import mock
+
+from django.core.handlers.asgi import ASGIRequest
+from django.test import TestCase, override_settings
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .services.api_service import APIService
+from .services.async_api_service import AsyncAPIService
+from .services.http_client import HTTP_CLIENT, HTTPClient
+from .services.token_service import RefreshCompartilhado
+
+CHAVE_JWT = "chave-dos-testes-do-frontend-com-32-bytes"
+
+
+def criar_access_token(user_id=None, expira_em=300):
+    payload = {"token_type": "access", "user_id": str(user_id or uuid.uuid4()), "exp": int(time.time()) + expira_em, "jti": uuid.uuid4().hex}
+    return jwt.encode(payload, CHAVE_JWT, algorithm="HS256")
+
+
+class CorpoFalso(io.BytesIO):
+    """Corpo da resposta falsa; como no urllib3, release_conn devolve a conexão ao pool."""
+
+    liberado = False
+
+    def release_conn(self):
+        self.liberado = True
+
+    def is_devolvido(self):
+        """A conexão foi devolvida ao pool ou descartada."""
+        return self.liberado or self.closed
+
+
+class APIFalsa(BaseAdapter):
+    """
+    Transporte do requests que responde com responder(request) -> (status, headers, corpo)
+    em vez de acessar a API, guardando as requisições recebidas.
+    """
+
+    def __init__(self, responder):
+        super().__init__()
+        self.responder = responder
+        self.requisicoes = []
+        self.respostas = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requisicoes.append((request, timeout))
+        status, headers, corpo = self.responder(request)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = CorpoFalso(corpo)
+        # Headers no formato do http.client, de onde o requests extrai os cookies
+        cabecalhos = "".join(f"{nome}: {valor}\r\n" for nome, valor in headers.items())
+        response.raw._original_response = SimpleNamespace(msg=email.message_from_string(cabecalhos, _class=http.client.HTTPMessage))
+        response.url = request.url
+        response.request = request
+        self.respostas.append(response)
+        return response
+
+    def close(self):
+        pass
+
+
+def get_endpoint(request):
+    """Caminho da requisição relativo à API (ex.: "turmas/1/"), sem a query string."""
+    caminho = request.url.split("?", 1)[0]
+    return caminho[len(APIService.BASE_URL):].lstrip("/")
+
+
+def responder_json(rotas):
+    """Responde com o JSON de cada endpoint em rotas ({endpoint: dados}), ou 404."""
+    def responder(request):
+        endpoint = get_endpoint(request)
+        if endpoint not in rotas:
+            return 404, {}, b""
+        return 200, {"Content-Type": "application/json"}, json.dumps(rotas[endpoint]).encode()
+    return responder
+
+
+USUARIO_ADMIN = {"id": "1", "nome": "Admin", "email": "admin@teste.com", "grupo": "admin"}
+
+
+@override_settings(JWT_SIGNING_KEY=CHAVE_JWT, JWT_ALGORITHM="HS256")
+class FrontendTestCase(TestCase):
+    """
+    Base dos testes do frontend: a API é simulada por um transporte falso montado no
+    HTTP_CLIENT, e o navegador envia um access token assinado com a chave dos testes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.access_token = criar_access_token()
+        self.client.cookies["access_token"] = self.access_token
+        self.client.cookies["refresh_token"] = "refresh"
+
+    def simular_api(self, responder):
+        api = APIFalsa(responder)
+        HTTP_CLIENT.mount(APIService.BASE_URL, api)
+        self.addCleanup(HTTP_CLIENT.adapters.pop, APIService.BASE_URL, None)
+        return api
+
+
+class ProxyRecursoTests(FrontendTestCase):
+    """baixar_recurso repassa Range e condicionais à API e devolve a resposta parcial como veio."""
+
+    conteudo = b"0123456789"
+
+    def responder(self, request):
+        if request.headers.get("Range") == "bytes=2-5":
+            return 206, {
+                "Content-Type": "application/pdf",
+                "Content-Length": "4",
+                "Content-Range": "bytes 2-5/10",
+                "Accept-Ranges": "bytes",
+                "ETag": '"v1"',
+                "X-Interno": "nao-repassar",
+            }, self.conteudo[2:6]
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"Content-Type": "application/pdf", "Content-Length": "10", "ETag": '"v1"'}, self.conteudo
+
+    def test_intervalo(self):
+        api = self.simular_api(self.responder)
+        response = self.client.get("/turmas/1/baixar_recurso", HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"v1"')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertNotIn("X-Interno", response)
+
+        request, _ = api.requisicoes[0]
+        self.assertEqual(get_endpoint(request), "turmas/1/baixar_recurso/")
+        self.assertEqual(request.headers["If-Range"], '"v1"')
+        self.assertEqual(request.headers["Authorization"], f"Bearer {self.access_token}")
+        # A conexão volta ao pool quando o corpo termina de ser repassado
+        self.assertTrue(api.respostas[0].raw.is_devolvido())
+
+    def test_if_none_match(self):
+        self.simular_api(self.responder)
+        response = self.client.get("/turmas/1/baixar_recurso", HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    @override_settings(RECURSO_PROXY_CHUNK_SIZE=2)
+    def test_download_abandonado_fecha_a_resposta_da_api(self):
+        api = self.simular_api(self.responder)
+        response = self.client.get("/turmas/1/baixar_recurso")
+        self.assertEqual(next(iter(response.streaming_content)), b"01")
+        self.assertFalse(api.respostas[0].raw.is_devolvido())
+        # O navegador desistiu: o Django fecha a resposta, e o proxy fecha a da API
+        response.close()
+        self.assertTrue(api.respostas[0].raw.closed)
+
+    def test_erro_da_api_volta_para_a_pagina_anterior(self):
+        api = self.simular_api(lambda request: (500, {}, b"erro"))
+        response = self.client.get("/turmas/1/baixar_recurso", HTTP_REFERER="/turmas/lista")
+        self.assertRedirects(response, "/turmas/lista", fetch_redirect_response=False)
+        self.assertTrue(api.respostas[0].raw.is_devolvido())
+
+
+class HTTPClientTests(FrontendTestCase):
+    """Sessão compartilhada com a API: timeouts padrão, pool configurável e nenhum cookie guardado."""
+
+    @override_settings(API_HTTP_CONNECT_TIMEOUT=1.5, API_HTTP_READ_TIMEOUT=7, API_HTTP_POOL_MAXSIZE=3, API_HTTP_RETRIES=4)
+    def test_configuracao(self):
+        cliente = HTTPClient()
+        self.assertEqual(cliente.adapter._pool_maxsize, 3)
+        self.assertEqual(cliente.adapter.max_retries.total, 4)
+        self.assertIs(cliente.get_adapter("https://api.exemplo.com/"), cliente.adapter)
+
+        api = APIFalsa(lambda request: (200, {}, b"{}"))
+        cliente.mount("http://api/", api)
+        cliente.get("http://api/turmas/")
+        cliente.get("http://api/turmas/", timeout=60)
+        self.assertEqual([timeout for _, timeout in api.requisicoes], [(1.5, 7), 60])
+
+    def test_nao_guarda_cookies_da_api(self):
+        # A sessão atende todos os usuários: um cookie da API vazaria para as requisições dos outros
+        api = self.simular_api(lambda request: (200, {"Set-Cookie": "sessionid=de-outro-usuario; Path=/"}, b"{}"))
+        HTTP_CLIENT.get(f"{APIService.BASE_URL}/me/")
+        HTTP_CLIENT.get(f"{APIService.BASE_URL}/me/")
+        self.assertEqual(len(HTTP_CLIENT.cookies), 0)
+        self.assertNotIn("Cookie", api.requisicoes[1][0].headers)
+
+
+class PerfilPorRequisicaoTests(FrontendTestCase):
+    """O /me/ é buscado uma única vez por requisição, mesmo lido pelo middleware e por mais de um mixin."""
+
+    def simular(self):
+        return self.simular_api(responder_json({"me/": USUARIO_ADMIN, "treinamentos/": {"results": []}}))
+
+    def contar(self, api, endpoint):
+        return sum(1 for request, _ in api.requisicoes if get_endpoint(request) == endpoint)
+
+    def test_uma_chamada_por_requisicao(self):
+        api = self.simular()
+        # AuthenticatedUserMixin e AdminGroupMixin leem o perfil
+        response = self.client.get("/turmas/cadastro")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], USUARIO_ADMIN)
+        self.assertEqual(self.contar(api, "me/"), 1)
+
+        self.client.get("/turmas/cadastro")
+        self.assertEqual(self.contar(api, "me/"), 2)
+
+    @override_settings(USER_DATA_CACHE_TIMEOUT=60)
+    def test_cache_entre_paginas_por_token(self):
+        api = self.simular()
+        self.client.get("/turmas/cadastro")
+        self.client.get("/turmas/cadastro")
+        self.assertEqual(self.contar(api, "me/"), 1)
+
+        # Outro token (ex.: após o refresh ou outro usuário) não reaproveita o perfil
+        self.client.cookies["access_token"] = criar_access_token()
+        self.client.get("/turmas/cadastro")
+        self.assertEqual(self.contar(api, "me/"), 2)
+
+
+class BuscaParalelaTests(FrontendTestCase):
+    """As views síncronas disparam o /me/ e os endpoints declarados juntos, no setup."""
+
+    def test_chamadas_simultaneas(self):
+        # Só passa se as duas chamadas estiverem em andamento ao mesmo tempo
+        barreira = threading.Barrier(2, timeout=5)
+        rotas = responder_json({"me/": USUARIO_ADMIN, "treinamentos/": {"results": [{"id": 1, "nome": "Python"}]}})
+
+        def responder(request):
+            barreira.wait()
+            return rotas(request)
+
+        self.simular_api(responder)
+        response = self.client.get("/turmas/cadastro")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["treinamentos"], [{"id": 1, "nome": "Python"}])
+
+    def test_erro_da_busca_antecipada_aparece_no_get_context_data(self):
+        rotas = responder_json({"me/": USUARIO_ADMIN})
+
+        def responder(request):
+            if get_endpoint(request) == "treinamentos/":
+                return 500, {"Content-Type": "application/json"}, b'{"erro": "falhou"}'
+            return rotas(request)
+
+        self.simular_api(responder)
+        with self.assertRaises(requests.HTTPError):
+            self.client.get("/turmas/cadastro")
+
+    def test_post_nao_busca_os_dados_da_pagina(self):
+        rotas = responder_json({"me/": USUARIO_ADMIN})
+
+        def responder(request):
+            if request.method == "POST":
+                return 201, {"Content-Type": "application/json"}, b"{}"
+            return rotas(request)
+
+        api = self.simular_api(responder)
+        response = self.client.post("/turmas/cadastro", {"nome": "Turma"})
+        self.assertRedirects(response, "/turmas/lista", fetch_redirect_response=False)
+        self.assertNotIn("treinamentos/", [get_endpoint(request) for request, _ in api.requisicoes])
+
+
+class ViewsAssincronasTests(FrontendTestCase):
+    """
+    As views assíncronas com o cliente httpx, servidas pelo handler WSGI (cliente por
+    requisição, fechado no fim) e pelo ASGI (cliente do event loop, reaproveitado).
+    """
+
+    rotas = {
+        "me/": USUARIO_ADMIN,
+        "turmas/": {"count": 1, "next": None, "previous": None, "results": [{"id": 1, "nome": "Turma"}]},
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.requisicoes = []
+        self.clientes = []
+        patcher = mock.patch.object(AsyncAPIService, "criar_cliente", self.criar_cliente)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def responder(self, request):
+        self.requisicoes.append(request)
+        endpoint = str(request.url).split("?", 1)[0][len(APIService.BASE_URL):].lstrip("/")
+        return httpx.Response(200, json=self.rotas[endpoint])
+
+    def criar_cliente(self):
+        cliente = httpx.AsyncClient(transport=httpx.MockTransport(self.responder))
+        self.clientes.append(cliente)
+        return cliente
+
+    def assertListaDeTurmas(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], USUARIO_ADMIN)
+        self.assertEqual(response.context["turmas"], [{"id": 1, "nome": "Turma"}])
+        self.assertEqual(len(self.requisicoes), 2)
+        self.assertEqual(self.requisicoes[0].headers["Authorization"], f"Bearer {self.access_token}")
+
+    def test_wsgi(self):
+        response = self.client.get("/turmas/lista")
+        self.assertListaDeTurmas(response)
+        # Cada requisição roda num event loop novo: o cliente é dela e é fechado no fim
+        self.assertEqual(len(self.clientes), 1)
+        self.assertTrue(self.clientes[0].is_closed)
+
+        self.client.get("/turmas/lista")
+        self.assertEqual(len(self.clientes), 2)
+        self.assertTrue(self.clientes[1].is_closed)
+
+    async def test_asgi(self):
+        self.async_client.cookies["access_token"] = self.access_token
+        response = await self.async_client.get("/turmas/lista")
+        self.assertIsInstance(response.asgi_request, ASGIRequest)
+        self.assertListaDeTurmas(response)
+
+        # O cliente é do event loop e mantém as conexões para as próximas requisições
+        await self.async_client.get("/turmas/lista")
+        self.assertEqual(len(self.clientes), 1)
+        self.assertFalse(self.clientes[0].is_closed)
+        await self.clientes[0].aclose()
+
+    def test_sem_permissao(self):
+        self.rotas = {**self.rotas, "me/": {**USUARIO_ADMIN, "grupo": "aluno"}}
+        response = self.client.get("/turmas/lista", HTTP_REFERER="/home/")
+        self.assertRedirects(response, "/home/", fetch_redirect_response=False)
+        self.assertTrue(self.clientes[0].is_closed)
+
+
+class RefreshCompartilhadoTests(FrontendTestCase):
+    """Um único /token/refresh/ por refresh token, para qualquer número de requisições simultâneas."""
+
+    def test_threads(self):
+        compartilhado = RefreshCompartilhado()
+        chamadas = []
+        liberar = threading.Event()
+
+        def refresh(refresh_token):
+            chamadas.append(refresh_token)
+            liberar.wait(5)
+            return {"access": criar_access_token()}
+
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(compartilhado.renovar("refresh", refresh)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        liberar.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(chamadas, ["refresh"])
+        self.assertEqual(len({tokens["access"] for tokens in resultados}), 1)
+        self.assertEqual(len(resultados), 5)
+
+        # Quem chega depois com o cookie antigo reaproveita os tokens renovados
+        self.assertEqual(compartilhado.renovar("refresh", refresh), resultados[0])
+        self.assertEqual(len(chamadas), 1)
+        # ...a menos que a API tenha recusado justamente esse access token
+        compartilhado.renovar("refresh", refresh, token_rejeitado=resultados[0]["access"])
+        self.assertEqual(len(chamadas), 2)
+
+    async def test_event_loop(self):
+        compartilhado = RefreshCompartilhado()
+        chamadas = []
+
+        async def refresh(refresh_token):
+            chamadas.append(refresh_token)
+            await asyncio.sleep(0.01)
+            return {"access": criar_access_token()}
+
+        resultados = await asyncio.gather(*(compartilhado.arenovar("refresh", refresh) for _ in range(5)))
+        self.assertEqual(chamadas, ["refresh"])
+        self.assertEqual(len({tokens["access"] for tokens in resultados}), 1)
+
+    def test_middleware_renova_antes_de_expirar(self):
+        novo_token = criar_access_token()
+        rotas = responder_json({"me/": USUARIO_ADMIN, "treinamentos/": {"results": []}})
+
+        def responder(request):
+            if get_endpoint(request) == "token/refresh/":
+                return 200, {"Content-Type": "application/json"}, json.dumps({"access": novo_token}).encode()
+            return rotas(request)
+
+        api = self.simular_api(responder)
+        self.client.cookies["access_token"] = criar_access_token(expira_em=30)
+        self.client.cookies["refresh_token"] = f"refresh-{uuid.uuid4().hex}"
+        response = self.client.get("/turmas/cadastro")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies["access_token"].value, novo_token)
+        chamadas = {get_endpoint(request): request for request, _ in api.requisicoes}
+        self.assertEqual(chamadas["me/"].headers["Authorization"], f"Bearer {novo_token}")
+
+
+@override_settings(JWT_SIGNING_KEY=None)
+class VerificacaoNaAPITests(FrontendTestCase):
+    """Sem JWT_SIGNING_KEY, cada novo access token é conferido em /token/verify/ antes de ser usado."""
+
+    def responder(self, aceitar):
+        rotas = responder_json({"me/": USUARIO_ADMIN, "treinamentos/": {"results": []}})
+
+        def responder(request):
+            if get_endpoint(request) == "token/verify/":
+                return (200, {}, b"{}") if aceitar else (401, {}, b"{}")
+            return rotas(request)
+        return responder
+
+    def test_token_conferido_uma_vez(self):
+        api = self.simular_api(self.responder(aceitar=True))
+        self.assertEqual(self.client.get("/turmas/cadastro").status_code, 200)
+        self.assertEqual(self.client.get("/turmas/cadastro").status_code, 200)
+        verificacoes = [request for request, _ in api.requisicoes if get_endpoint(request) == "token/verify/"]
+        self.assertEqual(len(verificacoes), 1)
+
+    def test_token_recusado(self):
+        self.simular_api(self.responder(aceitar=False))
+        response = self.client.get("/turmas/cadastro")
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+
+    def test_api_fora_do_ar(self):
+        def responder(request):
+            raise requests.ConnectionError()
+
+        self.simular_api(responder)
+        response = self.client.get("/turmas/cadastro")
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
@@ -3,7 +3,7 @@ from django.urls import path
 from django.conf import settings
 
 
-from .views.base_views import HomeView, LoginView
+from .views.base_views import HomeView, HTTPPoolStatusView, LoginView
 from .views.alunos_views import AlunoCreateView, AlunoDetailView, AlunoListView
 from .views.treinamentos_view import TreinamentoDetailView, TreinamentoListView, TreinamentoCreateView
 from .views.turmas_views import RecursoCreateView, TurmaCreateView, TurmaDetailView, TurmaListView, ViewMatricularAluno, baixar_recurso
@@ -12,6 +12,7 @@ from .views.turmas_views import RecursoCreateView, TurmaCreateView, TurmaDetailV
 urlpatterns = [
    path('', LoginView.as_view(), name="login"),
    path('home/', HomeView.as_view(), name="home"),
+   path('status/http-pool', HTTPPoolStatusView.as_view(), name="http_pool_status"),
 
    # Alunos
    path('alunos/lista', AlunoListView.as_view(), name='aluno_list'),
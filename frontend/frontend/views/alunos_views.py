@@ -3,11 +3,14 @@ from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
 from ..services.base_service import API_SERVICE
+from .async_mixins import AsyncAdminGroupMixin, AsyncAuthenticatedUserMixin, AsyncTemplateView
 from .mixins import AdminGroupMixin, AuthenticatedUserMixin, DetailMixin, ListMixin, PostForm
 
 
-class AlunoListView(AuthenticatedUserMixin, ListMixin, AdminGroupMixin, TemplateView):
+class AlunoListView(AsyncAuthenticatedUserMixin, ListMixin, AsyncAdminGroupMixin, AsyncTemplateView):
     template_name = "alunos/aluno_list.html"
+    list_object = "alunos"
+    cursor_pagination = True
 
     def get_context_data(self, **kwargs):
         alunos_json = self.get_objects('alunos')
@@ -24,8 +27,9 @@ class AlunoCreateView(AuthenticatedUserMixin, PostForm, AdminGroupMixin, Templat
         return self.valida_create(request, response, 'aluno_list', 'aluno')
         
 
-class AlunoDetailView(AuthenticatedUserMixin, DetailMixin, AdminGroupMixin, TemplateView):
+class AlunoDetailView(AsyncAuthenticatedUserMixin, DetailMixin, AsyncAdminGroupMixin, AsyncTemplateView):
     template_name = "alunos/aluno_detail.html"
+    detail_object = "alunos"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -0,0 +1,81 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import redirect
+from django.views.generic import TemplateView
+import sweetify
+
+from ..services.base_service import ASYNC_API_SERVICE
+from .mixins import APIEndpointsMixin
+
+
+class AsyncAPIDataMixin(APIEndpointsMixin):
+    """
+    Versão assíncrona do APIDataMixin: no dispatch, aguarda o /me/ e os endpoints
+    declarados pela view (ListMixin, DetailMixin, api_endpoints) ao mesmo tempo,
+    sem ocupar uma thread do worker enquanto a API responde.
+    """
+
+    async def load_api_data(self):
+        if hasattr(self, "api_data"):
+            return
+        self.user, self.api_data = await asyncio.gather(
+            ASYNC_API_SERVICE.get_user_data(self.request),
+            ASYNC_API_SERVICE.get_many(self.request, self.get_api_endpoints()),
+        )
+
+    def get_api_data(self, endpoint):
+        return self.api_data[endpoint]
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.load_api_data()
+            response = super().dispatch(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+        finally:
+            # Fora do ASGI o cliente HTTP é da requisição e precisa ser fechado aqui
+            await ASYNC_API_SERVICE.fechar_cliente(request)
+
+
+class AsyncAuthenticatedUserMixin(AsyncAPIDataMixin):
+    """
+    Mixin que injeta no context o usuário autenticado, carregado pelo AsyncAPIDataMixin.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["user"] = self.user
+        return context
+
+
+class AsyncAdminGroupMixin(AsyncAPIDataMixin):
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.load_api_data()
+            if self.user.get('grupo') != 'admin':
+                # A sessão usada pelo sweetify é lida do banco, fora do event loop
+                await sync_to_async(sweetify.toast)(
+                    request,
+                    'Você não tem permissão para acessar essa tela',
+                    icon='error',
+                    timer=3000,
+                    position='bottom-end',
+                )
+                return redirect(request.META.get('HTTP_REFERER'))
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            await ASYNC_API_SERVICE.fechar_cliente(request)
+
+
+class AsyncTemplateView(TemplateView):
+    """
+    TemplateView com get assíncrono. Os dados da API já foram carregados no dispatch
+    dos mixins assíncronos, então get_context_data continua síncrono.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        return self.render_to_response(context)
@@ -1,10 +1,12 @@
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import redirect
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, View
 import sweetify
 
 from ..services.base_service import API_SERVICE, TOKEN_SERVICE
-from .mixins import AuthenticatedUserMixin, ListMixin
+from ..services.http_client import HTTP_CLIENT
+from .async_mixins import AsyncAuthenticatedUserMixin, AsyncTemplateView
+from .mixins import AdminGroupMixin, ListMixin
 
 
 class LoginView(TemplateView):
@@ -32,11 +34,20 @@ class LoginView(TemplateView):
 
         return response
     
-class HomeView(AuthenticatedUserMixin, ListMixin, TemplateView):
+class HomeView(AsyncAuthenticatedUserMixin, ListMixin, AsyncTemplateView):
     template_name = "home.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.user.get('grupo') == 'aluno':
             context['turmas'] = self.user.get('turmas')
-        return context 
\ No newline at end of file
+        return context 
+    
+
+class HTTPPoolStatusView(AdminGroupMixin, View):
+    """
+    Estatísticas do pool de conexões com a API neste worker, para dimensionar API_HTTP_POOL_MAXSIZE.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({"pools": HTTP_CLIENT.get_estatisticas()})
@@ -1,4 +1,5 @@
 import math
+from urllib.parse import parse_qs, urlencode, urlparse
 
 from django.http import HttpResponseRedirect
 from django.shortcuts import redirect
@@ -7,16 +8,52 @@ import sweetify
 from ..services.base_service import API_SERVICE
 
 
-class AuthenticatedUserMixin:
+class APIEndpointsMixin:
+    """
+    Declaração dos dados de que a view depende: cada mixin acrescenta seus endpoints
+    em get_api_endpoints, e o mixin de dados (APIDataMixin ou AsyncAPIDataMixin)
+    busca todos em paralelo e os entrega por get_api_data.
+    """
+    # Endpoints extras da view, formatados com os kwargs da URL (ex.: "turmas/{id}")
+    api_endpoints = []
+
+    def get_api_endpoints(self):
+        return [endpoint.format(**self.kwargs) for endpoint in self.api_endpoints]
+
+
+class APIDataMixin(APIEndpointsMixin):
+    """
+    Busca em paralelo os dados de que a view depende.
+
+    No setup da view (antes do dispatch e das checagens de grupo), o /me/ e os
+    endpoints declarados são disparados juntos, e get_api_data apenas aguarda o
+    resultado. A latência da página passa a ser a da chamada mais lenta.
+    """
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.api_futures = {}
+        if request.method == "GET":
+            API_SERVICE.prefetch_user_data(request)
+            self.api_futures = API_SERVICE.submit_many(request, self.get_api_endpoints())
+
+    def get_api_data(self, endpoint):
+        """Retorna o JSON do endpoint, aguardando a busca antecipada ou fazendo-a agora."""
+        future = self.api_futures.get(endpoint)
+        if future is None:
+            return API_SERVICE.get_data(self.request, endpoint).json()
+        return future.result()
+
+
+class AuthenticatedUserMixin(APIDataMixin):
     """
     Mixin que busca o usuário autenticado via JWT e o injeta no context.
     """
 
     def get_data_user(self, request):
-        """Obtém o usuário autenticado do backend usando o JWT armazenado em cookie."""
-        user = API_SERVICE.get_data(request, "me/").json()
-        self.user = user
-        return user
+        """Obtém o usuário autenticado, buscado na API uma única vez por requisição pelo middleware."""
+        self.user = request.user_data
+        return self.user
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -24,12 +61,11 @@ class AuthenticatedUserMixin:
         return context
     
 
-class AdminGroupMixin:
+class AdminGroupMixin(APIDataMixin):
 
     def get_data_user(self, request):
-        user = API_SERVICE.get_data(request, "me/").json()
-        self.user = user
-        return user
+        self.user = request.user_data
+        return self.user
 
     def dispatch(self, request, *args, **kwargs):
         user = self.get_data_user(request)
@@ -44,30 +80,67 @@ class AdminGroupMixin:
             return redirect(request.META.get('HTTP_REFERER'))
         return super().dispatch(request, *args, **kwargs)
     
-class ListMixin:
+class ListMixin(APIEndpointsMixin):
+    # Lista buscada antecipadamente pelo mixin de dados da view (ex.: "turmas")
+    list_object = None
     page = 1
     next_page = None
     previous_page = None
     qtd_pages = 1
+    page_size = 10
+    # Pagina por cursor (apenas anterior/próxima), sem o custo da contagem total na API
+    cursor_pagination = False
+    next_cursor = None
+    previous_cursor = None
+
+    def get_api_endpoints(self):
+        endpoints = super().get_api_endpoints()
+        if self.list_object:
+            endpoints.append(self.get_list_endpoint(self.list_object))
+        return endpoints
+
+    def get_list_endpoint(self, obj):
+        """Endpoint da página atual da lista, conforme o modo de paginação."""
+        if self.cursor_pagination:
+            params = {'paginacao': 'cursor', 'page_size': self.page_size}
+            cursor = self.request.GET.get('cursor')
+            if cursor:
+                params['cursor'] = cursor
+            return f"{obj}/?{urlencode(params)}"
+
+        page = self.request.GET.get('page') or 1
+        return f"{obj}/?page={page}"
 
     def get_objects(self, obj):
         """Requisita uma lista de objetos."""
-        page = self.request.GET.get('page') or 1
-        json = API_SERVICE.get_data(self.request, f"{obj}/", page).json()
-        return json
+        return self.get_api_data(self.get_list_endpoint(obj))
+
+    def get_cursor(self, url):
+        """Extrai o cursor de um link next/previous retornado pela API."""
+        if not url:
+            return None
+        return parse_qs(urlparse(url).query).get('cursor', [None])[0]
 
     def update_pages_context(self, request, lista_obj):
+        if self.cursor_pagination:
+            self.next_cursor = self.get_cursor(lista_obj.get('next'))
+            self.previous_cursor = self.get_cursor(lista_obj.get('previous'))
+            return
+
         self.page = int(request.GET.get('page', 1))
         if lista_obj.get('next'):
             self.next_page = self.page + 1
         if lista_obj.get('previous'):
             self.previous_page = self.page - 1
         
-        self.qtd_pages = math.ceil(int(lista_obj.get('count')) / 10)
+        self.qtd_pages = math.ceil(int(lista_obj.get('count')) / self.page_size)
 
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context["cursor_pagination"] = self.cursor_pagination
+        context["next_cursor"] = self.next_cursor
+        context["previous_cursor"] = self.previous_cursor
         context["page"] = self.page
         context["next_page"] = self.next_page
         context["previous_page"] = self.previous_page
@@ -76,18 +149,22 @@ class ListMixin:
         return context
 
 class PostForm:
+    def get_mensagem_sucesso(self, response, obj):
+        return f'{obj.title()} cadastrado com sucesso'
+
     def valida_create(self, request, response, url_redirect, obj):
         if response.status_code in (200, 201):
             sweetify.toast(
                 request,
-                f'{obj.title()} cadastrado com sucesso',
+                self.get_mensagem_sucesso(response, obj),
                 icon='success',
                 timer=3000,
                 position='bottom-end',
             )
             return redirect(url_redirect)
         elif response.status_code == 400:
-            erros = [valor[0] for valor in response.json().values()]
+            # Erros de campo vêm em listas; erros gerais da API, como {"erro": "..."}, em texto
+            erros = [valor if isinstance(valor, str) else valor[0] for valor in response.json().values()]
             mensagem_erro = "<br><br>".join(erros)
             sweetify.toast(
                 request,
@@ -100,8 +177,18 @@ class PostForm:
         else:
             return redirect(request.META.get('HTTP_REFERER'))
         
-class DetailMixin:
+class DetailMixin(APIEndpointsMixin):
+    # Objeto buscado antecipadamente pelo mixin de dados da view (ex.: "turmas")
+    detail_object = None
+
+    def get_api_endpoints(self):
+        endpoints = super().get_api_endpoints()
+        if self.detail_object:
+            endpoints.append(self.get_detail_endpoint(self.detail_object))
+        return endpoints
+
+    def get_detail_endpoint(self, obj):
+        return f"{obj}/{self.kwargs['id']}"
+
     def get_object(self, obj):
-        id_object = self.kwargs['id']
-        object = API_SERVICE.get_data(self.request, f'{obj}/{id_object}').json()
-        return object
\ No newline at end of file
+        return self.get_api_data(self.get_detail_endpoint(obj))
\ No newline at end of file
@@ -1,11 +1,13 @@
 from django.views.generic import TemplateView
 
 from ..services.base_service import API_SERVICE
+from .async_mixins import AsyncAdminGroupMixin, AsyncAuthenticatedUserMixin, AsyncTemplateView
 from .mixins import AdminGroupMixin, AuthenticatedUserMixin, DetailMixin, ListMixin, PostForm
 
 
-class TreinamentoListView(AuthenticatedUserMixin, ListMixin, AdminGroupMixin, TemplateView):
+class TreinamentoListView(AsyncAuthenticatedUserMixin, ListMixin, AsyncAdminGroupMixin, AsyncTemplateView):
     template_name = "treinamentos/treinamento_list.html"
+    list_object = "treinamentos"
 
     def get_context_data(self, **kwargs):
         treinamentos_json = self.get_objects('treinamentos')
@@ -21,8 +23,9 @@ class TreinamentoCreateView(AuthenticatedUserMixin, PostForm, AdminGroupMixin, T
         response = API_SERVICE.post_data(self.request, 'treinamentos/', request.POST)
         return self.valida_create(request, response, 'treinamento_list', 'treinamento')
     
-class TreinamentoDetailView(AuthenticatedUserMixin, DetailMixin, AdminGroupMixin, TemplateView):
+class TreinamentoDetailView(AsyncAuthenticatedUserMixin, DetailMixin, AsyncAdminGroupMixin, AsyncTemplateView):
     template_name = "treinamentos/treinamento_detail.html"
+    detail_object = "treinamentos"
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1,12 +1,17 @@
-from django.http import FileResponse, HttpResponseRedirect
+from contextlib import closing
+
+from django.conf import settings
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.views.generic import TemplateView
 
 from ..services.base_service import API_SERVICE
+from .async_mixins import AsyncAdminGroupMixin, AsyncAuthenticatedUserMixin, AsyncTemplateView
 from .mixins import AdminGroupMixin, AuthenticatedUserMixin, DetailMixin, ListMixin, PostForm
 
 
-class TurmaListView(AuthenticatedUserMixin, ListMixin, AdminGroupMixin, TemplateView):
+class TurmaListView(AsyncAuthenticatedUserMixin, ListMixin, AsyncAdminGroupMixin, AsyncTemplateView):
     template_name = "turmas/turma_list.html"
+    list_object = "turmas"
 
     def get_context_data(self, **kwargs):
         turmas_json = self.get_objects('turmas')
@@ -17,6 +22,7 @@ class TurmaListView(AuthenticatedUserMixin, ListMixin, AdminGroupMixin, Template
     
 class TurmaCreateView(AuthenticatedUserMixin, PostForm, AdminGroupMixin, TemplateView):
     template_name = "turmas/turma_create.html"
+    api_endpoints = ["treinamentos/"]
 
     def post(self, request, *args, **kwargs):
         response = API_SERVICE.post_data(self.request, 'turmas/', request.POST)
@@ -24,12 +30,13 @@ class TurmaCreateView(AuthenticatedUserMixin, PostForm, AdminGroupMixin, Templat
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['treinamentos'] = API_SERVICE.get_data(self.request, 'treinamentos/').json().get('results')
+        context['treinamentos'] = self.get_api_data('treinamentos/').get('results')
         return context
     
 
-class TurmaDetailView(AuthenticatedUserMixin, DetailMixin, TemplateView):
+class TurmaDetailView(AsyncAuthenticatedUserMixin, DetailMixin, AsyncTemplateView):
     template_name = "turmas/turma_detail.html"
+    detail_object = "turmas"
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -41,6 +48,7 @@ class TurmaDetailView(AuthenticatedUserMixin, DetailMixin, TemplateView):
     
 class RecursoCreateView(AuthenticatedUserMixin, PostForm, DetailMixin, AdminGroupMixin, TemplateView):
     template_name = "turmas/cadastrar_recurso.html"
+    detail_object = "turmas"
 
     def post(self, request, *args, **kwargs):
         arquivo = request.FILES['recurso']
@@ -55,6 +63,7 @@ class RecursoCreateView(AuthenticatedUserMixin, PostForm, DetailMixin, AdminGrou
     
 class ViewMatricularAluno(AuthenticatedUserMixin, PostForm, DetailMixin, AdminGroupMixin, TemplateView):
     template_name = "alunos/matricular_alunos.html"
+    detail_object = "turmas"
 
     def post(self, request, *args, **kwargs):
         turma_id = self.kwargs['id']
@@ -63,10 +72,22 @@ class ViewMatricularAluno(AuthenticatedUserMixin, PostForm, DetailMixin, AdminGr
         }
         response = API_SERVICE.post_data(self.request, f'turmas/{turma_id}/alunos/', data)
         return self.valida_create(request, response, 'turma_list', 'alunos')
+
+    def get_mensagem_sucesso(self, response, obj):
+        # A matrícula é idempotente: o resumo mostra o que de fato mudou
+        totais = response.json().get('totais', {})
+        return (
+            f"{totais.get('matriculados', 0)} matriculado(s), "
+            f"{totais.get('ja_matriculados', 0)} já matriculado(s), "
+            f"{totais.get('nao_encontrados', 0)} não encontrado(s)"
+        )
     
     def get_alunos(self):
-        response = API_SERVICE.get_data(self.request, 'alunos/todos').json()
-        return response
+        # Os alunos chegam em streaming (NDJSON) e são lidos aqui, antes da renderização, para que
+        # a conexão com a API seja liberada mesmo se o template falhar no meio da lista.
+        # O seletor só precisa dos dados de identificação, sem as turmas de cada aluno.
+        with closing(API_SERVICE.iter_json_lines(self.request, 'alunos/todos?fields=id,nome,sobrenome,email')) as alunos:
+            return list(alunos)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -76,19 +97,51 @@ class ViewMatricularAluno(AuthenticatedUserMixin, PostForm, DetailMixin, AdminGr
         return context
     
 
+# Headers do navegador repassados à API, para downloads retomáveis e navegação em vídeos
+HEADERS_REQUISICAO_RECURSO = {
+    'Range': 'HTTP_RANGE',
+    'If-Range': 'HTTP_IF_RANGE',
+    'If-None-Match': 'HTTP_IF_NONE_MATCH',
+    'If-Modified-Since': 'HTTP_IF_MODIFIED_SINCE',
+}
+# Headers da API repassados ao navegador
+HEADERS_RESPOSTA_RECURSO = (
+    'Content-Type', 'Content-Length', 'Content-Range', 'Content-Disposition',
+    'Accept-Ranges', 'ETag', 'Last-Modified',
+)
+
+
+def repassar_conteudo(response, chunk_size):
+    """Repassa o corpo da API em blocos, liberando a conexão ao final ou se o navegador desistir."""
+    try:
+        yield from response.iter_content(chunk_size=chunk_size)
+    finally:
+        response.close()
+
+
 def baixar_recurso(request, id):
     """
-    Faz download do recurso no computador local.
+    Faz download do recurso no computador local, repassando em streaming
+    a resposta da API (inclusive respostas parciais 206 e 304).
     """
 
     endpoint = f"turmas/{id}/baixar_recurso/"
-    response = API_SERVICE.get_data(request, endpoint, stream=True)
+    extra_headers = {
+        header: request.META[meta]
+        for header, meta in HEADERS_REQUISICAO_RECURSO.items() if meta in request.META
+    }
+    response = API_SERVICE.get_stream(request, endpoint, extra_headers)
 
-    if response.status_code != 200:
+    if response.status_code not in (200, 206, 304, 416):
         # Erro inesperado → volta pra tela anterior
+        response.close()
         return HttpResponseRedirect(request.META.get("HTTP_REFERER", "/"))
 
-    # Extrai o nome do arquivo do header HTTP
-    filename = response.headers.get("Content-Disposition").split("filename=")[-1].strip('"')
-
-    return FileResponse(response.raw, as_attachment=True, filename=filename)
+    proxy = StreamingHttpResponse(
+        repassar_conteudo(response, settings.RECURSO_PROXY_CHUNK_SIZE),
+        status=response.status_code,
+    )
+    for header in HEADERS_RESPOSTA_RECURSO:
+        if header in response.headers:
+            proxy[header] = response.headers[header]
+    return proxy